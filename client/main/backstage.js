@@ -1023,6 +1023,7 @@ const BackstageModel = Backbone.Model.extend({
             { extensions: ['html', 'htm'], description: "Web Page (.html, .htm)" },
             { extensions: ['omt'], description: 'jamovi template (.omt)' },
             { extensions: ['csv'], description: 'CSV (Comma delimited) (.csv)' },
+            { extensions: ['gz'], description: 'CSV (gzip compressed) (.csv.gz)' },
             { extensions: ['zip'], description: 'LaTeX bundle (.zip)' },
             { extensions: ['rds'], description: 'R object (.rds)' },
             { extensions: ['RData'], description: 'R object (.RData)' },
@@ -1046,6 +1047,7 @@ const BackstageModel = Backbone.Model.extend({
             { extensions: ['html', 'htm'], description: "Web Page (.html, .htm)" },
             { extensions: ['omt'], description: 'jamovi template (.omt)' },
             { extensions: ['csv'], description: 'CSV (Comma delimited) (.csv)' },
+            { extensions: ['gz'], description: 'CSV (gzip compressed) (.csv.gz)' },
             { extensions: ['zip'], description: 'LaTeX bundle (.zip)' },
             { extensions: ['rds'], description: 'R object (.rds)' },
             { extensions: ['RData'], description: 'R object (.RData)' },
@@ -13,6 +13,9 @@
 #include <vector>
 #include <utility>
 #include <cmath>
+#include <cstring>
+#include <algorithm>
+#include <stdexcept>
 
 #ifdef _WIN32
 #define ALIGN_8 alignas(8)
@@ -160,6 +163,61 @@ public:
         return cellAt<T>(rowIndex);
     }
 
+    template<typename T> int rowsPerBlock() const
+    {
+        return VALUES_SPACE / sizeof(T);
+    }
+
+    template<typename T> int blockCount() const
+    {
+        int perBlock = rowsPerBlock<T>();
+        return (rowCount() + perBlock - 1) / perBlock;
+    }
+
+    // the values of a block, in place. the pointer is only valid until
+    // the memory map is next enlarged (i.e. until something is written)
+
+    template<typename T> T *blockValues(int blockIndex)
+    {
+        ColumnStruct *cs = _mm->resolve<ColumnStruct>(_rel);
+
+        if (blockIndex < 0 || blockIndex >= blockCount<T>())
+            throw std::runtime_error("index out of bounds");
+
+        Block **blocks = _mm->resolve<Block*>(cs->blocks);
+        Block *block = _mm->resolve<Block>(blocks[blockIndex]);
+
+        return (T*) &block->values[0];
+    }
+
+    // copies the values of rows [rowStart, rowEnd) into dest, a block
+    // at a time
+
+    template<typename T> void gather(int rowStart, int rowEnd, T *dest)
+    {
+        ColumnStruct *cs = _mm->resolve<ColumnStruct>(_rel);
+
+        if (rowStart < 0 || rowEnd > cs->rowCount || rowStart > rowEnd)
+            throw std::runtime_error("index out of bounds");
+
+        int perBlock = rowsPerBlock<T>();
+        Block **blocks = _mm->resolve<Block*>(cs->blocks);
+
+        int rowIndex = rowStart;
+        while (rowIndex < rowEnd)
+        {
+            int blockIndex = rowIndex / perBlock;
+            int index = rowIndex % perBlock;
+            int count = std::min(perBlock - index, rowEnd - rowIndex);
+
+            Block *block = _mm->resolve<Block>(blocks[blockIndex]);
+            std::memcpy(dest, &block->values[index * sizeof(T)], count * sizeof(T));
+
+            dest += count;
+            rowIndex += count;
+        }
+    }
+
 protected:
 
     ColumnStruct *struc() const;
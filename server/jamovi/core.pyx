@@ -7,6 +7,7 @@ from libcpp.string cimport string
 from libcpp.vector cimport vector
 from libcpp.list cimport list as cpplist
 from libcpp.pair cimport pair
+from libcpp.unordered_map cimport unordered_map
 
 from cython.operator cimport dereference as deref, postincrement as inc
 
@@ -16,8 +17,13 @@ import math
 import os
 import os.path
 
+import numpy as np
+
 from enum import Enum
 
+# the cells of ID columns are string pointers
+ctypedef char* cstring
+
 cdef extern from "column.h":
     cdef cppclass CLevelData "LevelData":
         CLevelData()
@@ -205,9 +211,16 @@ cdef extern from "columnw.h":
         void append[T](const T &value)
         T raw[T](int index)
         const char *raws(int index);
+        int rowsPerBlock[T]() const
+        int blockCount[T]() const
+        T *blockValues[T](int blockIndex) except +
+        void gather[T](int rowStart, int rowEnd, T *dest) except +
         void setIValue(int index, int value, bool init)
         void setDValue(int index, double value, bool init)
         void setSValue(int index, const char *value, bool init)
+        void setDValues(int rowStart, const double *values, int count, bool init) except +
+        void setIValues(int rowStart, const int *values, int count, bool init) except +
+        void setSValues(int rowStart, const int *offsets, int count, const char *strings, int stringsSize, bool init) except +
         const char *getLabel(int value) const
         const char *getLabel(const char* value) const
         const char *getImportValue(int value) const
@@ -222,6 +235,7 @@ cdef extern from "columnw.h":
         bool hasLevels() const
         void clearLevels()
         void updateLevelCounts()
+        void setLevelCount(int value, int count, int countExFiltered) except +
         void trimUnusedLevels()
         const vector[CLevelData] levels()
         void setLevels(vector[CLevelData] levels)
@@ -376,7 +390,10 @@ cdef class Column:
                 max_dps = max(max_dps, Column.how_many_dps(value, ceiling_dps))
                 if max_dps == ceiling_dps:
                     break
-            self.dps = max_dps
+            # setting the dps counts as a schema change, so only if
+            # they're different
+            if max_dps != self.dps:
+                self.dps = max_dps
 
     property active:
         def __get__(self):
@@ -432,12 +449,40 @@ cdef class Column:
     def get_value_for_label(self, label):
         return self._this.valueForLabel(label.encode('utf-8'))
 
+    def encode_labels(self, labels):
+        # returns the values (as an int32 array) for a sequence of labels
+        # of a (non-ID) text column, where '' or None is missing. labels
+        # without a level have one added, as when pasting. each distinct
+        # label is looked up once, rather than for every row
+        codes = { }
+        for label in labels:
+            if label is None or label == '' or label in codes:
+                continue
+            if self.has_level(label):
+                codes[label] = self.get_value_for_label(label)
+            else:
+                value = self.level_count
+                self.insert_level(value, label)
+                codes[label] = value
+
+        return np.fromiter(
+            (-2147483648 if label is None or label == '' else codes[label] for label in labels),
+            dtype=np.int32,
+            count=len(labels))
+
     def clear_levels(self):
         self._this.clearLevels()
 
     def trim_unused_levels(self):
         self._this.trimUnusedLevels()
 
+    def update_level_counts(self):
+        # counts the uses of each level from the values
+        self._this.updateLevelCounts()
+
+    def set_level_count(self, raw, count, count_ex_filtered):
+        self._this.setLevelCount(raw, count, count_ex_filtered)
+
     @property
     def has_levels(self):
         return self._this.hasLevels()
@@ -582,6 +627,143 @@ cdef class Column:
         else:
             return self._this.raw[int](index)
 
+    @property
+    def block_count(self):
+        if self.data_type == DataType.DECIMAL:
+            return self._this.blockCount[double]()
+        elif self.data_type == DataType.TEXT and self.measure_type == MeasureType.ID:
+            return self._this.blockCount[cstring]()
+        else:
+            return self._this.blockCount[int]()
+
+    def block(self, index):
+        # a read-only array over the raw values of a block, without
+        # copying them. it is only valid until the data set is next
+        # written to, so shouldn't be held on to
+        cdef int[:] ivalues
+        cdef double[:] dvalues
+        cdef int per_block
+        cdef int count
+
+        if self.data_type == DataType.TEXT and self.measure_type == MeasureType.ID:
+            raise TypeError('ID columns have no raw values')
+
+        if self.data_type == DataType.DECIMAL:
+            per_block = self._this.rowsPerBlock[double]()
+            count = min(per_block, self.row_count - index * per_block)
+            dvalues = <double[:count]>self._this.blockValues[double](index)
+            values = np.asarray(dvalues)
+        else:
+            per_block = self._this.rowsPerBlock[int]()
+            count = min(per_block, self.row_count - index * per_block)
+            ivalues = <int[:count]>self._this.blockValues[int](index)
+            values = np.asarray(ivalues)
+
+        values.flags.writeable = False
+        return values
+
+    def blocks(self):
+        for index in range(self.block_count):
+            yield self.block(index)
+
+    def gather(self, row_start, row_end):
+        # copies the raw values of a range of rows into a new array
+        cdef int[:] ivalues
+        cdef double[:] dvalues
+
+        if row_start < 0 or row_end > self.row_count or row_start > row_end:
+            raise IndexError()
+
+        if self.data_type == DataType.TEXT and self.measure_type == MeasureType.ID:
+            return np.array([
+                self._this.raws(index).decode()
+                for index in range(row_start, row_end) ], dtype=object)
+        elif self.data_type == DataType.DECIMAL:
+            values = np.empty(row_end - row_start, dtype=np.float64)
+            if row_end > row_start:
+                dvalues = values
+                self._this.gather[double](row_start, row_end, &dvalues[0])
+        else:
+            values = np.empty(row_end - row_start, dtype=np.int32)
+            if row_end > row_start:
+                ivalues = values
+                self._this.gather[int](row_start, row_end, &ivalues[0])
+        return values
+
+    def set_values(self, row_start, values, string_table=None, initing=False):
+        # writes a buffer (a numpy array, an array.array, bytes, etc.) of
+        # raw values, starting at row_start. raw bytes are interpreted as
+        # int32s, or as doubles for decimal columns. the values of ID
+        # columns are offsets into string_table, a buffer of null
+        # terminated utf-8 strings, or -2147483648 for empty
+        cdef const int[:] ivalues
+        cdef const double[:] dvalues
+        cdef const char[:] strings
+        cdef int count
+
+        if self.data_type == DataType.DECIMAL:
+            dtype = np.float64
+        else:
+            dtype = np.int32
+
+        if (isinstance(values, (bytes, bytearray, memoryview))
+                and memoryview(values).format in ('B', 'b', 'c')):
+            values = np.frombuffer(values, dtype=dtype)
+        else:
+            values = np.ascontiguousarray(values, dtype=dtype)
+
+        count = len(values)
+        if row_start < 0 or row_start + count > self.row_count:
+            raise IndexError()
+        if count == 0:
+            return
+
+        if self.data_type == DataType.DECIMAL:
+            dvalues = values
+            self._this.setDValues(row_start, &dvalues[0], count, initing)
+        elif self.data_type == DataType.TEXT and self.measure_type == MeasureType.ID:
+            if string_table is None:
+                raise ValueError('A string table is required for ID columns')
+            ivalues = values
+            strings = np.frombuffer(string_table, dtype=np.int8)
+            if len(strings) == 0 or strings[-1] != 0:
+                # the last string runs to the end of the table
+                strings = np.append(strings, np.int8(0))
+            self._this.setSValues(row_start, &ivalues[0], count, &strings[0], len(strings), initing)
+        else:
+            ivalues = values
+            self._this.setIValues(row_start, &ivalues[0], count, initing)
+
+    def get_values(self, row_start, count):
+        # the counterpart of set_values(). returns an array of the raw
+        # values, or for ID columns, a tuple of (offsets, string table).
+        # repeated strings appear in the table once
+        cdef string table
+        cdef string value
+        cdef unordered_map[string, int] seen
+        cdef int[:] offsets
+        cdef int i
+
+        if self.data_type == DataType.TEXT and self.measure_type == MeasureType.ID:
+            if row_start < 0 or row_start + count > self.row_count:
+                raise IndexError()
+            values = np.empty(count, dtype=np.int32)
+            offsets = values
+            for i in range(count):
+                value = self._this.raws(row_start + i)
+                if value.empty():
+                    offsets[i] = -2147483648
+                elif seen.count(value):
+                    offsets[i] = seen[value]
+                else:
+                    offsets[i] = table.size()
+                    seen[value] = table.size()
+                    table.append(value)
+                    table.push_back(0)
+            return values, table
+        else:
+            return self.gather(row_start, row_start + count)
+
     def set_data_type(self, data_type):
         self._this.setDataType(data_type.value)
 
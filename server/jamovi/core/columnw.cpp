@@ -8,8 +8,11 @@
 #include <climits>
 #include <map>
 #include <set>
+#include <unordered_map>
 #include <iomanip>
 #include <cmath>
+#include <cstring>
+#include <algorithm>
 
 #include "dataset.h"
 
@@ -219,6 +222,78 @@ void ColumnW::setSValue(int rowIndex, const char *value, bool initing)
     }
 }
 
+void ColumnW::setDValues(int rowStart, const double *values, int count, bool initing)
+{
+    if (rowStart < 0 || count < 0 || rowStart + count > rowCount())
+        throw runtime_error("index out of bounds");
+
+    if ( ! initing)
+        _discardScratchColumn();
+
+    _scatter<double>(rowStart, values, count);
+}
+
+void ColumnW::setIValues(int rowStart, const int *values, int count, bool initing)
+{
+    if (rowStart < 0 || count < 0 || rowStart + count > rowCount())
+        throw runtime_error("index out of bounds");
+
+    if (hasLevels())
+    {
+        // the level counts need maintaining
+        for (int i = 0; i < count; i++)
+            setIValue(rowStart + i, values[i], initing);
+    }
+    else
+    {
+        if ( ! initing)
+            _discardScratchColumn();
+
+        _scatter<int>(rowStart, values, count);
+    }
+}
+
+void ColumnW::setSValues(int rowStart, const int *offsets, int count, const char *strings, int stringsSize, bool initing)
+{
+    // offsets are into strings, a table of null terminated strings.
+    // INT_MIN represents an empty string, as does an offset outside
+    // the table (i.e. from a corrupt file). rows with the same offset
+    // share the one copy of the string
+
+    if (rowStart < 0 || count < 0 || rowStart + count > rowCount())
+        throw runtime_error("index out of bounds");
+
+    if (stringsSize > 0 && strings[stringsSize - 1] != '\0')
+        throw runtime_error("string table is not null terminated");
+
+    if ( ! initing)
+        _discardScratchColumn();
+
+    unordered_map<int, char*> stored;
+
+    for (int i = 0; i < count; i++)
+    {
+        int offset = offsets[i];
+        if (offset == INT_MIN || offset < 0 || offset >= stringsSize)
+        {
+            setSValue(rowStart + i, NULL, true);
+        }
+        else
+        {
+            auto existing = stored.find(offset);
+            if (existing != stored.end())
+            {
+                cellAt<char*>(rowStart + i) = existing->second;
+            }
+            else
+            {
+                setSValue(rowStart + i, &strings[offset], true);
+                stored[offset] = cellAt<char*>(rowStart + i);
+            }
+        }
+    }
+}
+
 void ColumnW::setIValue(int rowIndex, int value, bool initing)
 {
     if ( ! initing)
@@ -386,6 +461,16 @@ void ColumnW::appendLevel(int value, const char *label, const char *importValue)
     s->changes++;
 }
 
+void ColumnW::setLevelCount(int value, int count, int countExFiltered)
+{
+    Level *level = rawLevel(value);
+    if (level == NULL)
+        throw runtime_error("level does not exist");
+
+    level->count = count;
+    level->countExFiltered = countExFiltered;
+}
+
 void ColumnW::updateLevelCounts() {
 
     if (hasLevels())
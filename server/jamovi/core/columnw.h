@@ -37,6 +37,7 @@ public:
     void removeLevel(int value);
     void clearLevels();
     void updateLevelCounts();
+    void setLevelCount(int value, int count, int countExFiltered);
     void insertRows(int from, int to);
     void setDPs(int dps);
     void setFormula(const char *value);
@@ -47,6 +48,9 @@ public:
     void setDValue(int rowIndex, double value, bool initing = false);
     void setIValue(int rowIndex, int value, bool initing = false);
     void setSValue(int rowIndex, const char *value, bool initing = false);
+    void setDValues(int rowStart, const double *values, int count, bool initing = false);
+    void setIValues(int rowStart, const int *values, int count, bool initing = false);
+    void setSValues(int rowStart, const int *offsets, int count, const char *strings, int stringsSize, bool initing = false);
     void changeDMType(DataType::Type dataType, MeasureType::Type measureType);
     void setLevels(const std::vector<LevelData> &levels);
     void setMissingValues(const std::vector<MissingValue> &missingValues);
@@ -82,6 +86,28 @@ private:
     static void _transferLevels(ColumnW &dest, ColumnW &src);
     void _discardScratchColumn();
 
+    template<typename T> void _scatter(int rowStart, const T *values, int count)
+    {
+        ColumnStruct *cs = _mm->resolve<ColumnStruct>(_rel);
+        Block **blocks = _mm->resolve<Block*>(cs->blocks);
+        int perBlock = rowsPerBlock<T>();
+
+        int rowIndex = rowStart;
+        int rowEnd = rowStart + count;
+        while (rowIndex < rowEnd)
+        {
+            int blockIndex = rowIndex / perBlock;
+            int index = rowIndex % perBlock;
+            int n = std::min(perBlock - index, rowEnd - rowIndex);
+
+            Block *block = _mm->resolve<Block>(blocks[blockIndex]);
+            std::memcpy(&block->values[index * sizeof(T)], values, n * sizeof(T));
+
+            values += n;
+            rowIndex += n;
+        }
+    }
+
     template<typename T> void _setRowCount(size_t count)
     {
         ColumnStruct *cs = _mm->resolve<ColumnStruct>(_rel);
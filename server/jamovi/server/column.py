@@ -2,6 +2,8 @@
 import ast
 import re
 
+import numpy as np
+
 from jamovi.core import ColumnType
 from jamovi.core import MeasureType
 from jamovi.core import DataType
@@ -15,9 +17,12 @@ from .compute import Transfilterifier
 from .compute import Transfudgifier
 from .compute import Checker
 from .compute import Messages
+from .compute import Compiler
 
 from .compute import FValues
 from .compute import convert
+from .compute import convert_array
+from .compute import get_missing_array
 from .compute import is_missing
 
 from collections import namedtuple
@@ -46,34 +51,57 @@ class Column:
         self._missing_values = []
 
         self._node = None
+        self._compiled = None
         self._fields = ('name',)  # for AST compatibility
         self._node_parents = [ ]
         self._needs_parse = False
         self._needs_recalc = False
+        self._dirty_rows = None  # None means all rows
         self._formula_status = FormulaStatus.EMPTY
 
     def _create_child(self):
         if self._child is None:
             self._parent._realise_column(self)
 
+    def _read_deferred(self):
+        # the values may not have been read in yet (see omv.read())
+        if self._parent.has_deferred_reads:
+            self._parent.read_deferred(self)
+
     def __setitem__(self, index, value):
         if self._child is None:
             self._create_child()
+        self._read_deferred()
         self._child.set_value(index, value)
 
     def set_value(self, index, value):
         if self._child is None:
             self._create_child()
+        self._read_deferred()
         self._child.set_value(index, value)
 
+    def set_values(self, row_start, values, string_table=None):
+        if self._child is None:
+            self._create_child()
+        self._read_deferred()
+        self._child.set_values(row_start, values, string_table)
+
+    def get_values(self, row_start, count):
+        if self._child is None:
+            self._create_child()
+        self._read_deferred()
+        return self._child.get_values(row_start, count)
+
     def __getitem__(self, index):
         if self._child is not None:
+            self._read_deferred()
             return self._child[index]
         else:
             return (-2147483648, '')
 
     def get_value(self, index, cell=False):
         if self._child is not None:
+            self._read_deferred()
             value = self._child.get_value(index)
             if cell:
                 stam = self._child.should_treat_as_missing(index)
@@ -96,6 +124,7 @@ class Column:
 
     def fvalue(self, index, row_count, filt):
         if self._child is not None:
+            self._read_deferred()
             if filt and self._parent.is_row_filtered(index):
                 return (-2147483648, '')
             if self._child.should_treat_as_missing(index):
@@ -116,6 +145,50 @@ class Column:
     def fvalues(self, row_count, filt):
         return FValues(self, row_count, filt)
 
+    @property
+    def stat_cache(self):
+        return self._parent.stat_cache
+
+    @property
+    def supports_arrays(self):
+        return self.data_type is not DataType.TEXT
+
+    @property
+    def yields_labels(self):
+        # see fvalue()
+        return self.data_type is DataType.INTEGER and self.has_levels
+
+    def fgroups_array(self, row_count, filt):
+        # see Node.fgroups_array(). text columns (with levels) are
+        # grouped by their level values
+        if self.data_type is DataType.TEXT and self.measure_type is MeasureType.ID:
+            return None
+        return self.fvalues_array(0, row_count, row_count, filt)
+
+    def fvalues_array(self, start, end, row_count, filt):
+        count = end - start
+
+        if self._child is None:
+            return get_missing_array(count)
+
+        self._read_deferred()
+        values = self._child.gather(start, end)
+
+        if self._child.data_type is DataType.DECIMAL:
+            missing = np.isnan(values)
+        else:
+            values = values.astype(np.int64)
+            missing = (values == -2147483648)
+
+        if self._child.missing_values:
+            stam = map(self._child.should_treat_as_missing, range(start, end))
+            missing |= np.fromiter(stam, dtype=bool, count=count)
+
+        if filt:
+            missing |= self._parent.filtered_rows(start, end)
+
+        return values, missing
+
     def is_atomic_node(self):
         return False
 
@@ -124,6 +197,7 @@ class Column:
         if self._node is not None:
             self._node._remove_node_parent(self)
             self._node = None
+            self._compiled = None
 
         self._hidden = False
         self._filter_no = -1
@@ -135,6 +209,7 @@ class Column:
         self._node_parents = [ ]
         self._needs_parse = False
         self._needs_recalc = False
+        self._dirty_rows = None  # None means all rows
         self._formula_status = FormulaStatus.EMPTY
 
     @property
@@ -363,6 +438,7 @@ class Column:
 
     def determine_dps(self):
         if self._child is not None:
+            self._read_deferred()
             self._child.determine_dps()
 
     def append(self, value):
@@ -386,6 +462,11 @@ class Column:
         else:
             return -2147483648
 
+    def encode_labels(self, labels):
+        if self._child is None:
+            self._create_child()
+        return self._child.encode_labels(labels)
+
     def refresh_filter_state(self):
         if self._child is None:
             self._create_child()
@@ -397,10 +478,12 @@ class Column:
 
     def clear(self):
         if self._child is not None:
+            self._read_deferred()
             self._child.clear()
 
     def trim_unused_levels(self):
         if self._child is not None:
+            self._read_deferred()
             self._child.trim_unused_levels()
 
     @property
@@ -464,26 +547,54 @@ class Column:
     def clear_at(self, index):
         if self._child is None:
             self._create_child()
+        self._read_deferred()
         self._child.clear_at(index)
 
     def __iter__(self):
         if self._child is None:
             self._create_child()
+        self._read_deferred()
         return self._child.__iter__()
 
     def raw(self, index):
         if self._child is not None:
+            self._read_deferred()
             return self._child.raw(index)
         return -2147483648
 
+    def gather(self, row_start, row_end):
+        if self._child is not None:
+            self._read_deferred()
+            return self._child.gather(row_start, row_end)
+        return np.full(row_end - row_start, -2147483648, dtype=np.int32)
+
+    def cells(self, row_start, row_end):
+        # returns the values of a range of rows as a list, the same as
+        # __getitem__() would (i.e. labels for text columns with levels).
+        # each level's label is looked up once
+        values = self.gather(row_start, row_end)
+        if self.data_type is DataType.TEXT and self.measure_type is not MeasureType.ID:
+            labels = np.unique(values).tolist()
+            labels = dict(map(lambda value: (value, self.get_label(value)), labels))
+            return list(map(labels.__getitem__, values.tolist()))
+        return values.tolist()
+
+    def blocks(self):
+        if self._child is not None:
+            self._read_deferred()
+            return self._child.blocks()
+        return iter(())
+
     def set_data_type(self, data_type):
         if self._child is None:
             self._create_child()
+        self._read_deferred()
         self._child.set_data_type(data_type)
 
     def set_measure_type(self, measure_type):
         if self._child is None:
             self._create_child()
+        self._read_deferred()
         self._child.set_measure_type(measure_type)
 
     def change(self,
@@ -493,6 +604,7 @@ class Column:
 
         if self._child is None:
             self._create_child()
+        self._read_deferred()
 
         self._child.change(
             data_type=data_type,
@@ -540,12 +652,48 @@ class Column:
         if self.column_type != ColumnType.DATA and self.column_type != ColumnType.NONE:
             self._needs_parse = True
 
-    def set_needs_recalc(self):
+    def set_needs_recalc(self, start=None, end=None):
+        # start and end specify the rows which have changed, if None,
+        # then all rows have changed
+        if start is None:
+            self._set_needs_recalc(None)
+        else:
+            self._set_needs_recalc([ (start, end) ])
+
+    def set_rows_need_recalc(self, rows):
+        # rows specifies the (row numbers of the) rows which have changed,
+        # i.e. the rows of a paste which skips the filtered rows
+        ranges = Column._merge_ranges(map(lambda row_no: (row_no, row_no + 1), rows), self.row_count)
+        if len(ranges) > 0:
+            self._set_needs_recalc(ranges)
+
+    def _set_needs_recalc(self, ranges):
+        # ranges is a list of (start, end) of the rows which have changed,
+        # or None for all rows
+        self._parent.stat_cache.invalidate(self.id)
+        if self.is_filter:
+            self._parent.stat_cache.invalidate_filtered()
         for parent in self._node_parents:
-            parent.set_needs_recalc()
+            parent._set_needs_recalc(ranges)
         if self.column_type != ColumnType.DATA and self.column_type != ColumnType.NONE:
+            if ranges is None:
+                self._dirty_rows = None
+            elif not self._needs_recalc:
+                self._dirty_rows = list(ranges)
+            elif self._dirty_rows is not None:
+                self._dirty_rows.extend(ranges)
             self._needs_recalc = True
 
+    @property
+    def _can_recalc_rows(self):
+        # whether individual rows can be recalculated, rather than the
+        # whole column. column formulas, filters, and text columns (with
+        # their levels) need to be recalculated in their entirety
+        return (self._node is not None
+                and not self.is_filter
+                and not self.uses_column_formula
+                and self.data_type is not DataType.TEXT)
+
     def recalc(self, start=None, end=None):
 
         if not self.needs_recalc:
@@ -555,17 +703,25 @@ class Column:
             if dep.needs_recalc:
                 dep.recalc()
 
-        if start is None:
-            start = 0
-            end = self.row_count
-        elif end is None:
-            end = start + 1
+        if start is not None:
+            if end is None:
+                end = start + 1
+            ranges = [ (start, end) ]
+        else:
+            ranges = self._dirty_rows
 
-        self._child.clear_levels()
+        if ranges is not None and self._can_recalc_rows:
+            ranges = Column._merge_ranges(ranges, self.row_count)
+            initing = False
+        else:
+            ranges = [ (0, self.row_count) ]
+            initing = True
 
-        if self._node is not None and self._node.has_levels:
-            for level in self._node.get_levels(self.row_count):
-                self._child.append_level(level[0], level[1])
+            self._child.clear_levels()
+
+            if self._node is not None and self._node.has_levels:
+                for level in self._node.get_levels(self.row_count):
+                    self._child.append_level(level[0], level[1])
 
         if self.data_type is DataType.DECIMAL:
             ul_type = float
@@ -579,28 +735,89 @@ class Column:
                 v = convert(NaN, ul_type)
             else:
                 v = 1
-            for row_no in range(start, end):
-                self._child.set_value(row_no, v, True)
+            for start, end in ranges:
+                for row_no in range(start, end):
+                    self._child.set_value(row_no, v, initing)
         else:
-            for row_no in range(start, end):
-                try:
-                    if self.is_filter:
-                        v = self._node.fvalue(row_no, self.row_count, False)
-                    elif self.uses_column_formula and self._parent.is_row_filtered(row_no):
-                        v = NaN
-                    else:
-                        v = self._node.fvalue(row_no, self.row_count, self.uses_column_formula)
-                    v = convert(v, ul_type)
-                except Exception as e:
-                    if not self.is_filter:
-                        v = convert(NaN, ul_type)
-                    else:
-                        v = 1
-                    self._parent._log.exception(e)
-                self._child.set_value(row_no, v, True)
+            arrays = ul_type is not str and self._node.supports_arrays
+            for start, end in ranges:
+                values = None
+                if arrays:
+                    values = self._evaluate_array(start, end, ul_type)
+                if values is not None:
+                    self._child.set_values(start, values, initing=initing)
+                else:
+                    self._recalc_rows(start, end, ul_type, initing)
             self.determine_dps()
 
         self._needs_recalc = False
+        self._dirty_rows = None
+
+    @staticmethod
+    def _merge_ranges(ranges, row_count):
+        merged = [ ]
+        for start, end in sorted(ranges):
+            end = min(end, row_count)
+            if start >= end:
+                continue
+            if len(merged) > 0 and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _recalc_rows(self, start, end, ul_type, initing=True):
+        if self._compiled is None:
+            self._compiled = Compiler().visit(self._node)
+        fvalue = self._compiled
+        row_count = self.row_count
+        is_filter = self.is_filter
+        ucf = self.uses_column_formula
+
+        for row_no in range(start, end):
+            try:
+                if is_filter:
+                    v = fvalue(row_no, row_count, False)
+                elif ucf and self._parent.is_row_filtered(row_no):
+                    v = NaN
+                else:
+                    v = fvalue(row_no, row_count, ucf)
+                v = convert(v, ul_type)
+            except Exception as e:
+                if not self.is_filter:
+                    v = convert(NaN, ul_type)
+                else:
+                    v = 1
+                self._parent._log.exception(e)
+            self._child.set_value(row_no, v, initing)
+
+    def _evaluate_array(self, start, end, ul_type):
+        # evaluates the whole range in one go, rather than row by row.
+        # returns None if this fails, in which case the caller falls
+        # back to _recalc_rows()
+
+        row_count = self.row_count
+
+        try:
+            if self.is_filter:
+                values, missing = self._node.fvalues_array(start, end, row_count, False)
+            else:
+                ucf = self.uses_column_formula
+                values, missing = self._node.fvalues_array(start, end, row_count, ucf)
+                if ucf:
+                    missing = missing | self._parent.filtered_rows(start, end)
+            values, missing = convert_array(values, missing, ul_type)
+        except Exception:
+            return None
+
+        if ul_type is int:
+            # the data set's ints are 32-bit, and _recalc_rows() raises an
+            # OverflowError for wider values. these ranges are left to it,
+            # so the error is the same either way
+            if np.any((values < -2147483648) | (values > 2147483647)):
+                return None
+
+        return values
 
     def parse_formula(self):
 
@@ -730,6 +947,8 @@ class Column:
             # print(traceback.format_exc())
 
         self._needs_parse = False
+        self._compiled = None
+        self._dirty_rows = None  # a new formula requires a full recalc
 
     def _add_node_parent(self, parent):
         self._node_parents.append(parent)
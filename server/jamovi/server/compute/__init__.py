@@ -8,6 +8,8 @@ from .typevalues import convert
 from .typevalues import is_missing
 from .typevalues import is_equal
 from .typevalues import get_missing
+from .typevalues import get_missing_array
+from .typevalues import convert_array
 
 from .parser import Parser
 from .transmogrifier import Transmogrifier
@@ -15,6 +17,8 @@ from .transfilterifier import Transfilterifier
 from .transfudgifier import Transfudgifier
 from .checker import Checker
 from .messages import Messages
+from .statcache import StatCache
+from .compiler import Compiler
 
 
 class FormulaStatus(Enum):
@@ -0,0 +1,527 @@
+# array counterparts of the row functions in functions.py
+#
+# each argument is a tuple of (values, missing), where values is a numpy
+# array, and missing is a numpy bool array of the same length. these
+# functions return the same, and should produce the same results (and
+# the same missing values) as calling the row function for each row.
+# where the row function would raise an exception, the row should be
+# missing. the sums (MEAN(), SUM(), STDEV() and VAR()) are the exception,
+# and only agree with the row functions to a relative tolerance of 1e-12
+# or so (see _reduce())
+
+import numpy as np
+
+from . import functions
+
+from .funcmeta import vectorises
+
+
+NaN = float('nan')
+
+
+def _stack(arg0, args):
+    values = np.vstack([ arg0[0] ] + [ arg[0] for arg in args ]).astype(np.float64)
+    missing = np.vstack([ arg0[1] ] + [ arg[1] for arg in args ])
+    return values, missing
+
+
+def _common(*args):
+    # converts the arguments to a common type, the same as the
+    # data set would when the values are written to a column
+    for values, missing in args:
+        if values.dtype.kind == 'f':
+            break
+    else:
+        return args
+
+    converted = [ ]
+    for values, missing in args:
+        values = values.astype(np.float64)
+        values[missing] = NaN
+        converted.append((values, missing))
+    return converted
+
+
+def _set_missing(values, missing):
+    if values.dtype.kind == 'f':
+        values[missing] = NaN
+    else:
+        values[missing] = -2147483648
+    return values, missing
+
+
+def _float_result(values, inputs):
+    # the math functions raise exceptions where numpy produces infs
+    # and nans, so these are treated as missing
+    missing = np.isnan(values)
+    missing |= np.isinf(values) & np.isfinite(inputs)
+    values[missing] = NaN
+    return values, missing
+
+
+def _is_equal(a, b):
+    # the array counterpart of is_equal()
+    a_values, a_missing = a
+    b_values, b_missing = b
+    if a_values.dtype.kind == 'f' or b_values.dtype.kind == 'f':
+        a_values = a_values.astype(np.float64)
+        b_values = b_values.astype(np.float64)
+        tol = 1e-09 * np.maximum(np.abs(a_values), np.abs(b_values))
+        with np.errstate(invalid='ignore'):
+            equal = (a_values == b_values) | (np.abs(a_values - b_values) <= tol)
+    else:
+        equal = (a_values == b_values)
+    return equal & ~a_missing & ~b_missing
+
+
+@vectorises(functions.MAX)
+def MAX(index, arg0, *args):
+    values, missing = _stack(arg0, args)
+    values[missing] = NaN
+    values = np.fmax.reduce(values, axis=0)
+    return values, np.isnan(values)
+
+
+@vectorises(functions.MIN)
+def MIN(index, arg0, *args):
+    values, missing = _stack(arg0, args)
+    values[missing] = NaN
+    values = np.fmin.reduce(values, axis=0)
+    return values, np.isnan(values)
+
+
+def _by_row(row_func, index, values, kwargs):
+    # calls the row function for each row (values being stacked, with
+    # NaNs for the missing values), a row which raises being missing
+    kwargs = { name: kwarg.tolist() for name, kwarg in kwargs.items() }
+    results = np.empty(len(index), dtype=np.float64)
+    for i, (row_no, row) in enumerate(zip(index.tolist(), values.T.tolist())):
+        row_kwargs = { name: kwarg[i] for name, kwarg in kwargs.items() }
+        try:
+            results[i] = row_func(row_no, *row, **row_kwargs)
+        except Exception:
+            results[i] = NaN
+    return results
+
+
+def _kwarg(kwarg, count):
+    # the kwarg's values, or the row function's default (0)
+    if kwarg is None:
+        return np.zeros(count, dtype=np.int64)
+    return kwarg[0]
+
+
+def _fsum(values, valid):
+    # sums the valid values of each column with a compensated sum, which
+    # comes within an ulp or so of math.fsum()
+    total = np.zeros(values.shape[1], dtype=np.float64)
+    comp = np.zeros(values.shape[1], dtype=np.float64)
+    with np.errstate(invalid='ignore', over='ignore'):
+        for row, row_valid in zip(values, valid):
+            row = np.where(row_valid, row, 0.0)
+            t = total + row
+            comp += np.where(
+                np.abs(total) >= np.abs(row),
+                (total - t) + row,
+                (row - t) + total)
+            total = t
+        return total + comp
+
+
+def _ss(values, valid, n):
+    # the sum of the squared deviations from the mean. the values are
+    # shifted by the first valid value first, so this stays accurate
+    # where the deviations are small next to the values themselves
+    first = np.argmax(valid, axis=0)
+    shift = values[first, np.arange(values.shape[1])]
+    with np.errstate(invalid='ignore', over='ignore', divide='ignore'):
+        shifted = values - shift
+        mean = _fsum(shifted, valid) / n
+        dev = shifted - mean
+        return _fsum(dev * dev, valid)
+
+
+def _reduce(row_func, index, arg0, args, kwargs, reduce, min_n):
+    # the common part of MEAN(), SUM(), STDEV() and VAR(). reduce()
+    # takes the stacked values, the valid values, and the count of each
+    # column. the results only differ from the row function's in the
+    # last digit or so (statistics and math.fsum() sum exactly), except
+    # where the row function would overflow, or is passed infs; these
+    # rows are left to the row function
+    values, missing = _stack(arg0, args)
+    values[missing] = NaN
+    count = len(index)
+
+    ignore_missing = _kwarg(kwargs.get('ignore_missing'), count)
+    min_valid = _kwarg(kwargs.get('min_valid'), count)
+
+    # the row functions only drop the missing values if asked to, and
+    # otherwise, any missing value makes the result missing
+    filtered = (ignore_missing != 0) | (min_valid > 0)
+    n_valid = np.count_nonzero(~missing, axis=0)
+    n = np.where(filtered, n_valid, len(values))
+    invalid = (n < min_valid) | (n < min_n) | (~filtered & (n_valid < len(values)))
+
+    results = reduce(values, ~missing, n)
+    results[invalid] = NaN
+
+    by_row = ~invalid & ~np.isfinite(results)
+    if np.any(by_row):
+        kwargs = { name: _kwarg(kwarg, count)[by_row] for name, kwarg in kwargs.items() }
+        results[by_row] = _by_row(row_func, index[by_row], values[:, by_row], kwargs)
+
+    return results, np.isnan(results)
+
+
+def _mean(values, valid, n):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _fsum(values, valid) / n
+
+
+def _var(values, valid, n):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _ss(values, valid, n) / (n - 1)
+
+
+def _stdev(values, valid, n):
+    with np.errstate(invalid='ignore'):
+        return np.sqrt(_var(values, valid, n))
+
+
+@vectorises(functions.MEAN)
+def MEAN(index, arg0, *args, ignore_missing=None, min_valid=None):
+    kwargs = { 'ignore_missing': ignore_missing, 'min_valid': min_valid }
+    return _reduce(functions.MEAN, index, arg0, args, kwargs, _mean, 1)
+
+
+@vectorises(functions.SUM)
+def SUM(index, arg0, *args, ignore_missing=None, min_valid=None):
+    kwargs = { 'ignore_missing': ignore_missing, 'min_valid': min_valid }
+    return _reduce(functions.SUM, index, arg0, args, kwargs, lambda v, valid, n: _fsum(v, valid), 0)
+
+
+@vectorises(functions.STDEV)
+def STDEV(index, arg0, *args, ignore_missing=None):
+    kwargs = { 'ignore_missing': ignore_missing }
+    return _reduce(functions.STDEV, index, arg0, args, kwargs, _stdev, 2)
+
+
+@vectorises(functions.VAR)
+def VAR(index, arg0, *args, ignore_missing=None):
+    kwargs = { 'ignore_missing': ignore_missing }
+    return _reduce(functions.VAR, index, arg0, args, kwargs, _var, 2)
+
+
+@vectorises(functions.ABS)
+def ABS(index, value):
+    values, missing = value
+    values = np.where(missing, values, np.abs(values))
+    return values, missing
+
+
+@vectorises(functions.EXP)
+def EXP(index, value):
+    with np.errstate(all='ignore'):
+        return _float_result(np.exp(value[0]), value[0])
+
+
+@vectorises(functions.LN)
+def LN(index, value):
+    with np.errstate(all='ignore'):
+        return _float_result(np.log(value[0]), value[0])
+
+
+@vectorises(functions.LOG10)
+def LOG10(index, value):
+    with np.errstate(all='ignore'):
+        return _float_result(np.log10(value[0]), value[0])
+
+
+@vectorises(functions.SQRT)
+def SQRT(index, value):
+    with np.errstate(all='ignore'):
+        return _float_result(np.sqrt(value[0]), value[0])
+
+
+@vectorises(functions.IIQR)
+def IIQR(index, value, q1, q3):
+    value, q1, q3 = value[0], q1[0], q3[0]
+    width = q3 - q1
+    below = (value < q1)
+    above = (value > q3)
+    with np.errstate(all='ignore'):
+        values = np.where(below, (value - q1) / width, 0.0)
+        values = np.where(above, (value - q3) / width, values)
+    # the row function divides by zero
+    missing = (below | above) & (width == 0)
+    values[missing] = NaN
+    return values, missing
+
+
+@vectorises(functions.BOXCOX)
+def BOXCOX(index, x, lmbda):
+    x, lmbda = x[0], lmbda[0]
+    with np.errstate(all='ignore'):
+        values = np.where(
+            lmbda > 0,
+            (np.power(x, lmbda) - 1) / lmbda,
+            np.where(lmbda == 0, np.log(x), NaN))
+    return _float_result(values, x)
+
+
+@vectorises(functions.Z)
+@vectorises(functions.ABSZ)
+@vectorises(functions.MAXABSZ)
+@vectorises(functions.SCALE)
+def _identity(index, x):
+    # see the transfudgifier
+    return x
+
+
+def _choose(index, choose_x, x, y):
+    count = len(index)
+    if x is None:
+        x = (np.ones(count, dtype=np.int64), np.zeros(count, dtype=bool))
+    if y is None:
+        y = (np.full(count, -2147483648, dtype=np.int64), np.ones(count, dtype=bool))
+    x, y = _common(x, y)
+    values = np.where(choose_x, x[0], y[0])
+    missing = np.where(choose_x, x[1], y[1])
+    return values, missing
+
+
+@vectorises(functions.IF)
+def IF(index, cond, x=None, y=None):
+    cond_values, cond_missing = cond
+    values, missing = _choose(index, cond_values != 0, x, y)
+    return _set_missing(values, missing | cond_missing)
+
+
+@vectorises(functions.IFMISS)
+def IFMISS(index, cond, x=None, y=None):
+    return _choose(index, cond[1], x, y)
+
+
+@vectorises(functions.NOT)
+def NOT(index, x):
+    values, missing = x
+    values = np.where(missing, values, (values == 0).astype(values.dtype))
+    return values, missing
+
+
+@vectorises(functions.FILTER)
+def FILTER(index, x, *conds):
+    values, missing = x
+    for cond_values, cond_missing in conds:
+        missing = missing | cond_missing | (cond_values == 0)
+    return _set_missing(values.copy(), missing)
+
+
+@vectorises(functions.INT)
+def INT(index, x):
+    values, missing = x
+    if values.dtype.kind == 'f':
+        missing = missing | ~np.isfinite(values)
+        values = np.trunc(np.where(missing, 0, values))
+    values = values.astype(np.int64)
+    return _set_missing(values, missing)
+
+
+@vectorises(functions.MATCH)
+def MATCH(index, needle, *haystack):
+    values = np.full(len(index), -2147483648, dtype=np.int64)
+    found = np.zeros(len(index), dtype=bool)
+    for i, value in enumerate(haystack):
+        matches = _is_equal(needle, value) & ~found
+        values[matches] = i + 1
+        found |= matches
+    return values, ~found
+
+
+@vectorises(functions.HLOOKUP)
+def HLOOKUP(index, lookup_index, *args):
+    count = len(index)
+    args = _common(*args)
+    lookup_index = lookup_index[0] - 1  # was indexed from 1
+    in_range = (lookup_index >= 0) & (lookup_index < len(args))
+    if len(args) == 0:
+        return np.full(count, -2147483648, dtype=np.int64), ~in_range
+    values = np.vstack([ arg[0] for arg in args ])
+    missing = np.vstack([ arg[1] for arg in args ])
+    choice = np.where(in_range, lookup_index, 0)
+    rows = np.arange(count)
+    values = values[choice, rows]
+    missing = missing[choice, rows] | ~in_range
+    return _set_missing(values, missing)
+
+
+@vectorises(functions.ROW)
+def ROW(index):
+    return index + 1, np.zeros(len(index), dtype=bool)
+
+
+@vectorises(functions.RECODE)
+def RECODE(index, x, *args):
+    if len(args) % 2 == 1:
+        pairs = args[:-1]
+        default = args[-1]
+    else:
+        pairs = args
+        default = x
+
+    choices = [ default ] + [ pairs[i + 1] for i in range(0, len(pairs) - 1, 2) ]
+    choices = _common(*choices)
+    default = choices[0]
+
+    values = default[0].copy()
+    missing = default[1].copy()
+    decided = np.zeros(len(index), dtype=bool)
+
+    for i in range(0, len(pairs) - 1, 2):
+        cond_values, cond_missing = pairs[i]
+        value = choices[i // 2 + 1]
+        use = ~decided & ~cond_missing & (cond_values != 0)
+        values[use] = value[0][use]
+        missing[use] = value[1][use]
+        decided |= use
+
+    return values, missing
+
+
+# the array counterparts of the column functions. these are passed the
+# values of the argument (as floats) and which of them are missing, the
+# group of each row (-1 where the row's group is missing), and the number
+# of groups, and return a numpy array of the value of each group. where a
+# float value isn't finite (including where the column function would
+# raise an exception), the column function itself is called for that
+# group (see SplitValues). the sums, as above, agree with the column
+# functions to a relative tolerance of 1e-12 or so
+
+
+def _group(values, missing, codes, n_groups):
+    # the valid values, their groups, and the number in each group
+    valid = ~missing & (codes >= 0)
+    values = values[valid]
+    codes = codes[valid]
+    n = np.bincount(codes, minlength=n_groups)
+    return values, codes, n
+
+
+def _group_mean(values, codes, n):
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        mean = np.bincount(codes, weights=values, minlength=len(n)) / n
+        # a second pass corrects for the rounding of the first
+        dev = values - mean[codes]
+        mean += np.bincount(codes, weights=dev, minlength=len(n)) / n
+    return mean
+
+
+def _group_var(values, missing, codes, n_groups):
+    values, codes, n = _group(values, missing, codes, n_groups)
+    mean = _group_mean(values, codes, n)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        dev = values - mean[codes]
+        var = np.bincount(codes, weights=dev * dev, minlength=n_groups) / (n - 1)
+    var[n < 2] = NaN
+    return var, n
+
+
+def _group_sorted(values, missing, codes, n_groups):
+    # the valid values sorted by group, and then by value, along with
+    # where each group starts, and the number in each
+    values, codes, n = _group(values, missing, codes, n_groups)
+    order = np.lexsort((values, codes))
+    starts = np.cumsum(n) - n
+    return values[order], starts, n
+
+
+@vectorises(functions.VN)
+def VN(values, missing, codes, n_groups):
+    values, codes, n = _group(values, missing, codes, n_groups)
+    return n
+
+
+@vectorises(functions.VROWS)
+def VROWS(values, missing, codes, n_groups):
+    return np.bincount(codes[codes >= 0], minlength=n_groups)
+
+
+@vectorises(functions.VSUM)
+def VSUM(values, missing, codes, n_groups):
+    values, codes, n = _group(values, missing, codes, n_groups)
+    return np.bincount(codes, weights=values, minlength=n_groups)
+
+
+@vectorises(functions.VMEAN)
+def VMEAN(values, missing, codes, n_groups):
+    values, codes, n = _group(values, missing, codes, n_groups)
+    return _group_mean(values, codes, n)
+
+
+@vectorises(functions.VVAR)
+def VVAR(values, missing, codes, n_groups):
+    var, n = _group_var(values, missing, codes, n_groups)
+    return var
+
+
+@vectorises(functions.VSTDEV)
+def VSTDEV(values, missing, codes, n_groups):
+    var, n = _group_var(values, missing, codes, n_groups)
+    with np.errstate(invalid='ignore'):
+        return np.sqrt(var)
+
+
+@vectorises(functions.VSE)
+def VSE(values, missing, codes, n_groups):
+    var, n = _group_var(values, missing, codes, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt(var / n)
+
+
+@vectorises(functions.VMIN)
+def VMIN(values, missing, codes, n_groups):
+    values, starts, n = _group_sorted(values, missing, codes, n_groups)
+    results = np.full(n_groups, NaN)
+    results[n > 0] = values[starts[n > 0]]
+    return results
+
+
+@vectorises(functions.VMAX)
+def VMAX(values, missing, codes, n_groups):
+    values, starts, n = _group_sorted(values, missing, codes, n_groups)
+    results = np.full(n_groups, NaN)
+    results[n > 0] = values[(starts + n - 1)[n > 0]]
+    return results
+
+
+@vectorises(functions.VMED)
+def VMED(values, missing, codes, n_groups):
+    values, starts, n = _group_sorted(values, missing, codes, n_groups)
+    results = np.full(n_groups, NaN)
+    has = n > 0
+    lower = values[(starts + (n - 1) // 2)[has]]
+    upper = values[(starts + n // 2)[has]]
+    with np.errstate(over='ignore'):
+        # as statistics.median(), which returns the middle value as-is
+        results[has] = np.where((n % 2 == 1)[has], lower, (lower + upper) / 2)
+    return results
+
+
+def _group_quantile(values, missing, codes, n_groups, q):
+    # numpy's quantile() is applied to each group's (sorted) values
+    values, starts, n = _group_sorted(values, missing, codes, n_groups)
+    results = np.full(n_groups, NaN)
+    for group in np.flatnonzero(n):
+        start = starts[group]
+        results[group] = np.quantile(values[start:start + n[group]], q)
+    return results
+
+
+@vectorises(functions.Q1)
+def Q1(values, missing, codes, n_groups):
+    return _group_quantile(values, missing, codes, n_groups, 0.25)
+
+
+@vectorises(functions.Q3)
+def Q3(values, missing, codes, n_groups):
+    return _group_quantile(values, missing, codes, n_groups, 0.75)
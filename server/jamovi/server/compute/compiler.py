@@ -0,0 +1,261 @@
+
+import ast
+from ast import NodeVisitor
+import operator
+
+from jamovi.core import DataType
+
+from . import convert
+from . import is_missing
+from . import get_missing
+from .nodes import Compare
+
+
+NaN = float('nan')
+
+
+class Compiler(NodeVisitor):
+
+    # compiles a (transmogrified) formula into a single function with the
+    # same signature and result as the node's fvalue(). the decisions the
+    # nodes would make on every row (the operator, the data types, the
+    # argument conversions, etc.) are made once, here, up front
+
+    def generic_visit(self, node):
+        # columns, and anything else, evaluate themselves
+        return node.fvalue
+
+    def visit_Num(self, node):
+        value = node.n
+
+        def fvalue(index, row_count, filt):
+            return value
+        return fvalue
+
+    def visit_Str(self, node):
+        value = node.s
+
+        def fvalue(index, row_count, filt):
+            return value
+        return fvalue
+
+    def visit_Tuple(self, node):
+        value = (node.elts[0].n, node.elts[1].s)
+
+        def fvalue(index, row_count, filt):
+            return value
+        return fvalue
+
+    def visit_keyword(self, node):
+        return self.visit(node.value)
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        op = node.op
+
+        if isinstance(op, ast.USub):
+            def fvalue(index, row_count, filt):
+                v = operand(index, row_count, filt)
+                if is_missing(v):
+                    return v
+                elif isinstance(v, tuple):
+                    v = v[0]
+                return -v
+        elif isinstance(op, ast.UAdd):
+            def fvalue(index, row_count, filt):
+                v = operand(index, row_count, filt)
+                if is_missing(v):
+                    return v
+                elif isinstance(v, tuple):
+                    v = v[0]
+                elif isinstance(v, str):
+                    v = float(v)
+                return v
+        elif isinstance(op, ast.Not):
+            def fvalue(index, row_count, filt):
+                v = operand(index, row_count, filt)
+                if is_missing(v):
+                    return v
+                elif isinstance(v, tuple):
+                    v = v[0]
+                return 1 if not v else 0
+        elif isinstance(op, ast.Invert):
+            def fvalue(index, row_count, filt):
+                v = operand(index, row_count, filt)
+                if is_missing(v):
+                    return 0
+                else:
+                    return v
+        else:
+            raise RuntimeError("Shouldn't get here")
+
+        return fvalue
+
+    def visit_BoolOp(self, node):
+        values = list(map(self.visit, node.values))
+
+        if isinstance(node.op, ast.And):
+            def fvalue(index, row_count, filt):
+                to_return = 1
+                for v in values:
+                    value = v(index, row_count, filt)
+                    if is_missing(value):
+                        to_return = value
+                        continue
+                    if isinstance(value, tuple):
+                        value = value[0]
+                    if not value:
+                        return 0
+                return to_return
+        elif isinstance(node.op, ast.Or):
+            def fvalue(index, row_count, filt):
+                to_return = 0
+                for v in values:
+                    value = v(index, row_count, filt)
+                    if is_missing(value):
+                        to_return = value
+                        continue
+                    if isinstance(value, tuple):
+                        value = value[0]
+                    if value:
+                        return 1
+                return to_return
+        else:
+            raise RuntimeError("Shouldn't get here")
+
+        return fvalue
+
+    def _converted(self, node, ul_type):
+        if isinstance(node, ast.Num):
+            value = convert(node.n, ul_type)
+
+            def fvalue(index, row_count, filt):
+                return value
+        else:
+            node_fvalue = self.visit(node)
+
+            def fvalue(index, row_count, filt):
+                return convert(node_fvalue(index, row_count, filt), ul_type)
+        return fvalue
+
+    def visit_BinOp(self, node):
+
+        dt = node.data_type
+        if dt is DataType.DECIMAL:
+            ul_type = float
+        elif dt is DataType.TEXT:
+            ul_type = str
+        else:
+            ul_type = int
+
+        left = self._converted(node.left, ul_type)
+        right = self._converted(node.right, ul_type)
+        op = node.op
+
+        if isinstance(op, ast.Add):
+            func = operator.add
+        elif isinstance(op, ast.Sub):
+            func = operator.sub
+        elif isinstance(op, ast.Mult):
+            func = operator.mul
+        elif isinstance(op, ast.Div):
+            def func(lv, rv):
+                try:
+                    return float(lv) / float(rv)
+                except ZeroDivisionError:
+                    return get_missing()
+        elif isinstance(op, ast.FloorDiv):
+            def func(lv, rv):
+                try:
+                    return lv // rv
+                except ZeroDivisionError:
+                    return get_missing()
+        elif isinstance(op, ast.Mod):
+            func = operator.mod
+        elif isinstance(op, ast.Pow) or isinstance(op, ast.BitXor):
+            func = operator.pow
+        else:
+            def func(lv, rv):
+                return get_missing()
+
+        if ul_type is str and isinstance(op, ast.Add):
+            def fvalue(index, row_count, filt):
+                return func(
+                    left(index, row_count, filt),
+                    right(index, row_count, filt))
+        else:
+            def fvalue(index, row_count, filt):
+                lv = left(index, row_count, filt)
+                rv = right(index, row_count, filt)
+                if is_missing(lv) or is_missing(rv):
+                    return -2147483648
+                return func(lv, rv)
+
+        return fvalue
+
+    def visit_Compare(self, node):
+        left = self.visit(node.left)
+        comparators = list(zip(node.ops, map(self.visit, node.comparators)))
+        test = Compare._test
+
+        def fvalue(index, row_count, filt):
+            v1 = left(index, row_count, filt)
+            if is_missing(v1):
+                return -2147483648
+            for op, comparator in comparators:
+                v2 = comparator(index, row_count, filt)
+                if is_missing(v2):
+                    return -2147483648
+                if not test(v1, op, v2):
+                    return 0
+                v1 = v2
+            return 1
+
+        return fvalue
+
+    def visit_Call(self, node):
+
+        function = node._function
+
+        if function.__name__ == 'OFFSET':
+            value = self.visit(node.args[0])
+            offset = self.visit(node.args[1])
+
+            def fvalue(index, row_count, filt):
+                o = convert(offset(index, row_count, False), int)
+                if index < o:
+                    return NaN
+                else:
+                    return value(index - o, row_count, False)
+
+        elif function.meta.is_column_wise:
+            def fvalue(index, row_count, filt):
+                split_values = node._get_split_values(row_count, filt)
+                return split_values.fvalue(index, row_count, filt)
+
+        else:
+            args = [ ]
+            for i, arg in enumerate(node.args):
+                arg_type_i = min(i, len(node._arg_types) - 1)
+                arg_type = node._arg_types[arg_type_i]
+                args.append((self.visit(arg), arg_type))
+
+            kwargs = [ ]
+            for i, kwarg in enumerate(node.keywords):
+                kw_type = node._kw_types[i]
+                kwargs.append((kwarg.arg, self.visit(kwarg), kw_type))
+
+            if len(kwargs) == 0:
+                def fvalue(index, row_count, filt):
+                    return function(index, *[
+                        convert(arg(index, row_count, filt), arg_type)
+                        for arg, arg_type in args ])
+            else:
+                def fvalue(index, row_count, filt):
+                    return function(index, *[
+                        convert(arg(index, row_count, filt), arg_type)
+                        for arg, arg_type in args ], **{
+                        kw_name: convert(kwarg(index, row_count, filt), kw_type)
+                        for kw_name, kwarg, kw_type in kwargs })
+
+        return fvalue
@@ -11,6 +11,7 @@ class FuncMeta:
         self._measure_type = MeasureType.CONTINUOUS
         self._returns = [ ]
         self._arg_level_indices = [ ]
+        self._array_func = None
 
     def __str__(self):
         return str({
@@ -42,6 +43,10 @@ class FuncMeta:
     def arg_level_indices(self):
         return self._arg_level_indices
 
+    @property
+    def array_func(self):
+        return self._array_func
+
 
 def _meta(func):
     if not hasattr(func, 'meta'):
@@ -87,3 +92,16 @@ def column_wise(func):
     meta.is_row_wise = False
     meta.is_column_wise = True
     return func
+
+
+# registers the decorated function as the array counterpart of a row
+# function. the counterpart receives each argument as a tuple of
+# (values, missing) numpy arrays, and returns the same. column functions
+# can have array counterparts too, which calculate the value of each
+# group (see arrayfunctions.py)
+def vectorises(row_func):
+    def inner(func):
+        meta = _meta(row_func)
+        meta._array_func = func
+        return func
+    return inner
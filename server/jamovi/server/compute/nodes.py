@@ -7,16 +7,18 @@ from types import FunctionType as function
 import math
 from collections import OrderedDict
 from numbers import Number
-from itertools import compress
+
+import numpy as np
 
 from jamovi.core import DataType
 from jamovi.core import MeasureType
 from . import FValues
 from . import convert
+from . import convert_array
 from . import is_missing
 from . import get_missing
-from . import is_equal
 from . import functions
+from . import arrayfunctions  # noqa: F401, registers the array counterparts
 
 NaN = float('nan')
 
@@ -41,6 +43,31 @@ class FValueConverter:
             return value
 
 
+class FArrayValues:
+    # the values of a node which supports arrays, as floats. these are
+    # read as an array, rather than a row at a time
+
+    def __init__(self, node, row_count, filt):
+        self._node = node
+        self._row_count = row_count
+        self._filt = filt
+
+    def arrays(self):
+        row_count = self._row_count
+        try:
+            values, missing = self._node.fvalues_array(0, row_count, row_count, self._filt)
+            return convert_array(values, missing, float)
+        except Exception:
+            # a row at a time then, where a row which raises is missing
+            values = FValueConverter(self._node.fvalues(row_count, self._filt), float)
+            values = np.fromiter(values, dtype=np.float64, count=row_count)
+            return values, np.isnan(values)
+
+    def __iter__(self):
+        values, missing = self.arrays()
+        return iter(values.tolist())
+
+
 class SplitValues:
     def __init__(self, split_by, func, args, kwargs):
         self._split_by = split_by
@@ -48,34 +75,120 @@ class SplitValues:
         self._cache = None
         self._args = args
         self._kwargs = kwargs
+        # where calculated as arrays, the group of each row, and the key
+        # of each group (see _calculate_arrays())
+        self._codes = None
+        self._keys = None
 
     def _calculate(self, row_count, filt):
 
+        array_func = self._func.meta.array_func
+        if (array_func is not None
+                and len(self._args) == 1
+                and len(self._kwargs) == 0
+                and isinstance(self._args[0], FArrayValues)):
+            if self._calculate_arrays(array_func, row_count, filt):
+                return
+
         if self._split_by is None:
             args = self._args
             kwargs = self._kwargs
             self._cache = self._func(*args, **kwargs)
         else:
-            self._cache = { }
+            # built up in a local, and only then assigned, so a partial
+            # cache is never seen
+            cache = { }
+
+            # assign each row to its group in a single pass, rather than
+            # passing over the data once for each group
+            groups = OrderedDict()
+            for index, value in enumerate(self._split_by.fvalues(row_count, filt)):
+                if is_missing(value, empty_str_is_missing=True):
+                    continue
+                key = convert(value, str)
+                rows = groups.get(key)
+                if rows is None:
+                    groups[key] = rows = [ ]
+                rows.append(index)
+
+            args = [ list(arg) for arg in self._args ]
+            kwargs = { k: list(v) for k, v in self._kwargs.items() }
+
+            for key, rows in groups.items():
+                g_args = map(lambda values: [ values[i] for i in rows ], args)
+                g_kwargs = { k: [ v[i] for i in rows ] for k, v in kwargs.items() }
+                try:
+                    value = self._func(*g_args, **g_kwargs)
+                except Exception:
+                    value = (-2147483648, '')
+                cache[key] = value
 
-            if self._split_by.has_levels:
-                levels = self._split_by.get_levels(row_count)
-            else:
-                levels = set(self._split_by.fvalues(row_count, filt))
+            self._cache = cache
 
-            for level in levels:
+    def _calculate_arrays(self, array_func, row_count, filt):
+        # the rows are assigned their groups in one go, and all the groups
+        # are calculated in one go by the function's array counterpart.
+        # returns False if the groups can't be determined this way
 
-                def keep_only_this_level(values):
-                    return compress(values, map(lambda x: is_equal(x, level), self._split_by.fvalues(row_count, filt)))
+        values, missing = self._args[0].arrays()
 
-                args = map(keep_only_this_level, self._args)
-                kwargs = { k: keep_only_this_level(v) for k, v in self._kwargs }
-                key = convert(level, str)
+        if self._split_by is None:
+            codes = np.zeros(row_count, dtype=np.int64)
+            keys = None
+            n_groups = 1
+        else:
+            groups = self._split_by.fgroups_array(row_count, filt)
+            if groups is None:
+                return False
+            g_values, g_missing = groups
+            present = np.flatnonzero(~g_missing)
+            g_values = g_values[present]
+            if g_values.dtype.kind == 'f' and np.any(np.signbit(g_values) & (g_values == 0)):
+                # -0.0 is a group of its own (its key is '-0.0'), but
+                # np.unique() doesn't see it that way
+                return False
+            uniques, firsts, inverse = np.unique(
+                g_values,
+                return_index=True,
+                return_inverse=True)
+            codes = np.full(row_count, -1, dtype=np.int64)
+            codes[present] = inverse.reshape(-1)
+            n_groups = len(uniques)
+
+            # each group's key is determined from its first row, as the
+            # keys are what fvalue() looks the groups up by
+            keys = [ ]
+            for index in present[firsts].tolist():
+                value = self._split_by.fvalue(index, row_count, filt)
+                keys.append(convert(value, str))
+            if len(set(keys)) != len(keys):
+                return False
+
+        results = array_func(values, missing, codes, n_groups)
+
+        undetermined = [ ]
+        if results.dtype.kind == 'f':
+            undetermined = np.flatnonzero(~np.isfinite(results)).tolist()
+        results = results.tolist()
+
+        for group in undetermined:
+            group_values = values[codes == group].tolist()
+            if self._split_by is None:
+                results[group] = self._func(group_values)
+            else:
                 try:
-                    value = self._func(*args, **kwargs)
+                    results[group] = self._func(group_values)
                 except Exception:
-                    value = (-2147483648, '')
-                self._cache[key] = value
+                    results[group] = (-2147483648, '')
+
+        if self._split_by is None:
+            self._cache = results[0]
+        else:
+            self._codes = codes
+            self._keys = keys
+            self._cache = dict(zip(keys, results))
+
+        return True
 
     def fvalue(self, index, row_count, filt):
         if self._cache is None:
@@ -88,20 +201,54 @@ class SplitValues:
                 return self._cache
         else:
             value = self._split_by.fvalue(index, row_count, filt)
-            if is_missing(value):
+            if is_missing(value, empty_str_is_missing=True):
                 return (-2147483648, '')
             else:
                 return self._cache[convert(value, str)]
 
+    def fvalues_array(self, start, end, row_count, filt, to_type):
+        if self._cache is None:
+            self._calculate(row_count, filt)
+
+        if self._split_by is None and not isinstance(self._cache, list):
+            # a single value, the same for every row
+            value = convert(self._cache, to_type)
+            values = [ value ] * (end - start)
+        elif self._codes is not None:
+            # the value of each group, the last for the rows whose group
+            # is missing (with a code of -1)
+            table = [ convert(self._cache[key], to_type) for key in self._keys ]
+            table.append(convert(NaN, to_type))
+            values = np.array(table)[self._codes[start:end]]
+        else:
+            values = map(lambda index: self.fvalue(index, row_count, filt), range(start, end))
+            values = map(lambda value: convert(value, to_type), values)
+            values = list(values)
+
+        if to_type is float:
+            values = np.array(values, dtype=np.float64)
+            return values, np.isnan(values)
+        else:
+            values = np.array(values, dtype=np.int64)
+            return values, values == -2147483648
+
 
 class Node:
     def __init__(self):
         self._node_parents = [ ]
         self._deleted = False
 
-    def set_needs_recalc(self):
+    def set_needs_recalc(self, start=None, end=None):
+        if start is None:
+            self._set_needs_recalc(None)
+        else:
+            self._set_needs_recalc([ (start, end) ])
+
+    def _set_needs_recalc(self, ranges):
+        # ranges is a list of (start, end) of the rows which have changed,
+        # or None for all rows
         for parent in self._node_parents:
-            parent.set_needs_recalc()
+            parent._set_needs_recalc(ranges)
 
     def set_needs_parse(self):
         for parent in self._node_parents:
@@ -114,6 +261,59 @@ class Node:
     def fvalues(self, row_count, filt):
         return FValues(self, row_count, filt)
 
+    @property
+    def stat_cache(self):
+        # the cache of column-wise statistics shared between formulas.
+        # only columns provide one
+        return None
+
+    @property
+    def supports_arrays(self):
+        # whether fvalues_array() is available for this node (and all
+        # the nodes beneath it)
+        return False
+
+    def fvalues_array(self, start, end, row_count, filt):
+        # evaluates the rows start to end in one go, returning a tuple
+        # of a numpy array of values, and a numpy bool array indicating
+        # which of those values are missing. nodes which support arrays
+        # override this; this fallback evaluates a row at a time (where a
+        # row raises an exception, it's missing)
+        if self.data_type is DataType.DECIMAL:
+            to_type = float
+        else:
+            to_type = int
+
+        def fvalue(index):
+            try:
+                return convert(self.fvalue(index, row_count, filt), to_type)
+            except Exception:
+                return convert(NaN, to_type)
+
+        values = list(map(fvalue, range(start, end)))
+
+        if to_type is float:
+            values = np.array(values, dtype=np.float64)
+            return values, np.isnan(values)
+        else:
+            values = np.array(values, dtype=np.int64)
+            return values, values == -2147483648
+
+    def fgroups_array(self, row_count, filt):
+        # the values the rows are grouped by (see SplitValues), as a
+        # tuple of (values, missing) numpy arrays, rows with the same
+        # value being in the same group. returns None if these aren't
+        # available as arrays
+        if not self.supports_arrays:
+            return None
+        return self.fvalues_array(0, row_count, row_count, filt)
+
+    @property
+    def yields_labels(self):
+        # whether fvalue() can return (value, label) tuples, rather than
+        # plain values
+        return False
+
     @property
     def has_levels(self):
         return False
@@ -152,6 +352,22 @@ class Num(ast.Num, Node):
     def fvalue(self, index, row_count, filt):
         return self.n
 
+    @property
+    def supports_arrays(self):
+        if isinstance(self.n, int):
+            return -2147483648 <= self.n <= 2147483647
+        return isinstance(self.n, float)
+
+    def fvalues_array(self, start, end, row_count, filt):
+        count = end - start
+        if isinstance(self.n, int):
+            values = np.full(count, self.n, dtype=np.int64)
+            missing = np.full(count, self.n == -2147483648)
+        else:
+            values = np.full(count, self.n, dtype=np.float64)
+            missing = np.full(count, math.isnan(self.n))
+        return values, missing
+
     def is_atomic_node(self):
         return True
 
@@ -247,6 +463,25 @@ class UnaryOp(ast.UnaryOp, Node):
         else:
             raise RuntimeError("Shouldn't get here")
 
+    @property
+    def supports_arrays(self):
+        return (self.operand.supports_arrays
+                and self.operand.data_type is not DataType.TEXT)
+
+    def fvalues_array(self, start, end, row_count, filt):
+        op = self.op
+        values, missing = self.operand.fvalues_array(start, end, row_count, filt)
+        if isinstance(op, ast.USub):
+            return -values, missing
+        elif isinstance(op, ast.UAdd):
+            return values, missing
+        elif isinstance(op, ast.Not):
+            return (values == 0).astype(np.int64), missing
+        elif isinstance(op, ast.Invert):
+            return np.where(missing, 0, values), np.zeros(len(missing), dtype=bool)
+        else:
+            raise RuntimeError("Shouldn't get here")
+
     def is_atomic_node(self):
         return self.operand.is_atomic_node()
 
@@ -320,6 +555,39 @@ class BoolOp(ast.BoolOp, Node):
         else:
             raise RuntimeError("Shouldn't get here")
 
+    @property
+    def supports_arrays(self):
+        for v in self.values:
+            if not v.supports_arrays or v.data_type is DataType.TEXT:
+                return False
+        return True
+
+    def fvalues_array(self, start, end, row_count, filt):
+        count = end - start
+        decided = np.zeros(count, dtype=bool)
+        any_missing = np.zeros(count, dtype=bool)
+
+        if isinstance(self.op, ast.And):
+            # 0 if any value is false, otherwise missing if any is missing
+            for v in self.values:
+                values, missing = v.fvalues_array(start, end, row_count, filt)
+                decided |= ~missing & (values == 0)
+                any_missing |= missing
+            values = (~decided).astype(np.int64)
+        elif isinstance(self.op, ast.Or):
+            # 1 if any value is true, otherwise missing if any is missing
+            for v in self.values:
+                values, missing = v.fvalues_array(start, end, row_count, filt)
+                decided |= ~missing & (values != 0)
+                any_missing |= missing
+            values = decided.astype(np.int64)
+        else:
+            raise RuntimeError("Shouldn't get here")
+
+        missing = any_missing & ~decided
+        values[missing] = -2147483648
+        return values, missing
+
     def is_atomic_node(self):
         for value in self.values:
             if not value.is_atomic_node():
@@ -416,34 +684,8 @@ class Call(ast.Call, Node):
             else:
                 value = self.args[0].fvalue(index - offset, row_count, False)
         elif self._function.meta.is_column_wise:
-            if self._cached_value is None:
-                group_by = None
-                args = list(self.args)
-                for i in range(len(args)):
-                    arg = args[i]
-                    if i != 1:
-                        arg_type_i = min(i, len(self._arg_types) - 1)
-                        arg_type = self._arg_types[arg_type_i]
-                        args[i] = FValueConverter(arg.fvalues(row_count, filt), arg_type)
-                    else:
-                        # at this stage, all V functions take a single argument
-                        # so the second is always the group_by ... this could
-                        # change in the future, and this will need updating
-                        group_by = arg.fvalues(row_count, filt)
-                if group_by is not None:
-                    args.pop(1)
-                kwargs = {}
-                for i, kwarg in enumerate(self.keywords):
-                    kw_name = kwarg.arg
-                    if kw_name == 'group_by':
-                        group_by = kwarg.value
-                    else:
-                        kw_values = kwarg.value.fvalues(row_count, filt)
-                        kw_type = self._kw_types[i]
-                        kw_values = FValueConverter(kw_values, kw_type)
-                        kwargs[kw_name] = kw_values
-                self._cached_value = SplitValues(group_by, self._function, args, kwargs)
-            value = self._cached_value.fvalue(index, row_count, filt)
+            split_values = self._get_split_values(row_count, filt)
+            value = split_values.fvalue(index, row_count, filt)
         else:
             args = list(map(lambda arg: arg.fvalue(index, row_count, filt), self.args))
             for i in range(len(args)):
@@ -461,6 +703,143 @@ class Call(ast.Call, Node):
 
         return value
 
+    def _get_split_values(self, row_count, filt):
+        if self._cached_value is None:
+            key = self._stat_key(filt)
+            if key is not None:
+                stat_cache = self.args[0].stat_cache
+                self._cached_value = stat_cache.get(key)
+                if self._cached_value is None:
+                    self._cached_value = self._create_split_values(row_count, filt)
+                    stat_cache.set(key, self._cached_value)
+            else:
+                self._cached_value = self._create_split_values(row_count, filt)
+        return self._cached_value
+
+    def _stat_key(self, filt):
+        # the key for the shared stat cache, or None if the value can't
+        # be shared (i.e. its argument isn't simply a column)
+        if len(self.args) == 0 or len(self.args) > 2:
+            return None
+
+        source = self.args[0]
+        if source.stat_cache is None:
+            return None
+
+        group_by = None
+        if len(self.args) == 2:
+            group_by = self.args[1]
+        for kwarg in self.keywords:
+            if kwarg.arg == 'group_by':
+                group_by = kwarg.value
+            else:
+                return None
+
+        if group_by is None:
+            return (self._function.__name__, source.id, source.changes, filt, 0, 0)
+        elif group_by.stat_cache is None:
+            return None
+        else:
+            return (self._function.__name__, source.id, source.changes, filt, group_by.id, group_by.changes)
+
+    def _create_split_values(self, row_count, filt):
+        group_by = None
+        args = list(self.args)
+        for i in range(len(args)):
+            arg = args[i]
+            if i != 1:
+                arg_type_i = min(i, len(self._arg_types) - 1)
+                arg_type = self._arg_types[arg_type_i]
+                if arg.supports_arrays and arg_type in (float, None):
+                    args[i] = FArrayValues(arg, row_count, filt)
+                else:
+                    args[i] = FValueConverter(arg.fvalues(row_count, filt), arg_type)
+            else:
+                # at this stage, all V functions take a single argument
+                # so the second is always the group_by ... this could
+                # change in the future, and this will need updating
+                group_by = arg
+        if group_by is not None:
+            args.pop(1)
+        kwargs = {}
+        for i, kwarg in enumerate(self.keywords):
+            kw_name = kwarg.arg
+            if kw_name == 'group_by':
+                group_by = kwarg.value
+            else:
+                kw_values = kwarg.value.fvalues(row_count, filt)
+                kw_type = self._kw_types[i]
+                kw_values = FValueConverter(kw_values, kw_type)
+                kwargs[kw_name] = kw_values
+        return SplitValues(group_by, self._function, args, kwargs)
+
+    @property
+    def supports_arrays(self):
+        func_meta = self._function.meta
+        if self.data_type is DataType.TEXT:
+            return False
+        elif func_meta.is_column_wise:
+            return True
+        elif func_meta.array_func is None:
+            return False
+
+        for arg in self.args:
+            if not arg.supports_arrays or arg.data_type is DataType.TEXT:
+                return False
+        for kwarg in self.keywords:
+            if not kwarg.supports_arrays or kwarg.data_type is DataType.TEXT:
+                return False
+        for arg in self._untyped_args():
+            # the row functions see the (value, label) tuples of these
+            # arguments as-is, and behave differently with them (NOT()
+            # treats them as true, INT() can't convert them), which the
+            # array functions don't reproduce
+            if arg.yields_labels:
+                return False
+        return True
+
+    def _untyped_args(self):
+        for i, arg in enumerate(self.args):
+            arg_type_i = min(i, len(self._arg_types) - 1)
+            if self._arg_types[arg_type_i] is None:
+                yield arg
+        for i, kwarg in enumerate(self.keywords):
+            if self._kw_types[i] is None:
+                yield kwarg
+
+    @property
+    def yields_labels(self):
+        # a function only passes tuples on through its untyped arguments
+        if self._function.meta.is_column_wise:
+            return False
+        for arg in self._untyped_args():
+            if arg.yields_labels:
+                return True
+        return False
+
+    def fvalues_array(self, start, end, row_count, filt):
+        if self._function.meta.is_column_wise:
+            if self.data_type is DataType.DECIMAL:
+                to_type = float
+            else:
+                to_type = int
+            split_values = self._get_split_values(row_count, filt)
+            return split_values.fvalues_array(start, end, row_count, filt, to_type)
+        else:
+            args = list(map(lambda arg: arg.fvalues_array(start, end, row_count, filt), self.args))
+            for i in range(len(args)):
+                arg_type_i = min(i, len(self._arg_types) - 1)
+                arg_type = self._arg_types[arg_type_i]
+                args[i] = convert_array(*args[i], arg_type)
+            kwargs = {}
+            for i, kwarg in enumerate(self.keywords):
+                kw_name = kwarg.arg
+                kw_values = kwarg.fvalues_array(start, end, row_count, filt)
+                kw_type = self._kw_types[i]
+                kwargs[kw_name] = convert_array(*kw_values, kw_type)
+            index = np.arange(start, end)
+            return self._function.meta.array_func(index, *args, **kwargs)
+
     def is_atomic_node(self):
         return False
 
@@ -468,9 +847,13 @@ class Call(ast.Call, Node):
     def needs_recalc(self):
         return self._cached_value is None
 
-    def set_needs_recalc(self):
+    def _set_needs_recalc(self, ranges):
         self._cached_value = None
-        Node.set_needs_recalc(self)
+        if self._function.meta.is_column_wise or self._function.__name__ == 'OFFSET':
+            # a change to any row affects every row
+            Node._set_needs_recalc(self, None)
+        else:
+            Node._set_needs_recalc(self, ranges)
 
     def _determine_d_m_types(self):
         # determine the data and measure type from the function meta
@@ -685,6 +1068,67 @@ class BinOp(ast.BinOp, Node):
         else:
             return get_missing()
 
+    @property
+    def supports_arrays(self):
+        if not self.left.supports_arrays or not self.right.supports_arrays:
+            return False
+        dt = self.data_type
+        if dt is DataType.TEXT:
+            return False
+        op = self.op
+        if isinstance(op, ast.BitXor):
+            # integer ** integer can produce python longs and floats
+            return dt is DataType.DECIMAL
+        return isinstance(op, (
+            ast.Add, ast.Sub, ast.Mult, ast.Div,
+            ast.FloorDiv, ast.Mod, ast.Pow))
+
+    def fvalues_array(self, start, end, row_count, filt):
+
+        op = self.op
+
+        if self.data_type is DataType.DECIMAL:
+            ul_type = float
+        else:
+            ul_type = int
+
+        lv, lm = self.left.fvalues_array(start, end, row_count, filt)
+        lv, lm = convert_array(lv, lm, ul_type)
+        rv, rm = self.right.fvalues_array(start, end, row_count, filt)
+        rv, rm = convert_array(rv, rm, ul_type)
+
+        missing = lm | rm
+
+        with np.errstate(all='ignore'):
+            if isinstance(op, ast.Add):
+                values = lv + rv
+            elif isinstance(op, ast.Sub):
+                values = lv - rv
+            elif isinstance(op, ast.Mult):
+                values = lv * rv
+            elif isinstance(op, ast.Div):
+                rv = rv.astype(np.float64)
+                missing |= (rv == 0)
+                values = lv.astype(np.float64) / rv
+            elif isinstance(op, ast.FloorDiv) or isinstance(op, ast.Mod):
+                zero = (rv == 0)
+                missing |= zero
+                rv = np.where(zero, 1, rv)
+                if isinstance(op, ast.FloorDiv):
+                    values = np.floor_divide(lv, rv)
+                else:
+                    values = np.mod(lv, rv)
+            elif isinstance(op, ast.Pow) or isinstance(op, ast.BitXor):
+                values = np.power(lv, rv)
+                # python raises or produces a complex number in these cases
+                missing |= (~np.isfinite(values)
+                            & np.isfinite(lv)
+                            & np.isfinite(rv))
+            else:
+                raise RuntimeError("Shouldn't get here")
+
+        return values, missing
+
     def is_atomic_node(self):
         return self.left.is_atomic_node() and self.right.is_atomic_node()
 
@@ -770,6 +1214,60 @@ class Compare(ast.Compare, Node):
             v1 = v2
         return 1
 
+    @property
+    def supports_arrays(self):
+        for node in [ self.left ] + self.comparators:
+            if not node.supports_arrays or node.data_type is DataType.TEXT:
+                return False
+        return True
+
+    def fvalues_array(self, start, end, row_count, filt):
+        v1, missing = self.left.fvalues_array(start, end, row_count, filt)
+        missing = missing.copy()
+        failed = np.zeros(len(missing), dtype=bool)
+        for i in range(len(self.ops)):
+            op = self.ops[i]
+            v2, m2 = self.comparators[i].fvalues_array(start, end, row_count, filt)
+            # rows which haven't already been resolved to 0 or missing
+            active = ~(missing | failed)
+            missing |= active & m2
+            active &= ~m2
+            with np.errstate(invalid='ignore'):
+                passed = Compare._test_array(v1, op, v2)
+            failed |= active & ~passed
+            v1 = v2
+        values = (~failed).astype(np.int64)
+        values[missing] = -2147483648
+        return values, missing
+
+    @staticmethod
+    def _test_array(v1, op, v2):
+
+        def isclose(a, b):
+            # equivalent to math.isclose() with the default tolerances
+            a = a.astype(np.float64)
+            b = b.astype(np.float64)
+            tol = 1e-09 * np.maximum(np.abs(a), np.abs(b))
+            return (a == b) | (np.abs(a - b) <= tol)
+
+        if isinstance(op, ast.Lt):
+            return v1 < v2
+        elif isinstance(op, ast.Gt):
+            return v1 > v2
+        elif isinstance(op, ast.GtE):
+            return v1 >= v2
+        elif isinstance(op, ast.LtE):
+            return v1 <= v2
+        elif isinstance(op, ast.Eq):
+            if v1.dtype.kind == 'f' or v2.dtype.kind == 'f':
+                return isclose(v1, v2)
+            else:
+                return v1 == v2
+        elif isinstance(op, ast.NotEq):
+            return ~isclose(v1, v2)
+        else:
+            raise RuntimeError("Shouldn't get here")
+
     @staticmethod
     def _test(v1, op, v2):
 
@@ -855,6 +1353,17 @@ class keyword(ast.keyword, Node):
     def fvalue(self, index, row_count, filt):
         return self.value.fvalue(index, row_count, filt)
 
+    @property
+    def supports_arrays(self):
+        return self.value.supports_arrays
+
+    def fvalues_array(self, start, end, row_count, filt):
+        return self.value.fvalues_array(start, end, row_count, filt)
+
+    @property
+    def yields_labels(self):
+        return self.value.yields_labels
+
     def is_atomic_node(self):
         return self.value.is_atomic_node()
 
@@ -889,6 +1398,21 @@ class Tuple(ast.Tuple, Node):
     def fvalue(self, index, row_count, filt):
         return (self.elts[0].n, self.elts[1].s)
 
+    @property
+    def supports_arrays(self):
+        return True
+
+    @property
+    def yields_labels(self):
+        return True
+
+    def fvalues_array(self, start, end, row_count, filt):
+        count = end - start
+        value = self.elts[0].n
+        values = np.full(count, value, dtype=np.int64)
+        missing = np.full(count, value == -2147483648)
+        return values, missing
+
     @property
     def data_type(self):
         return DataType.INTEGER
@@ -0,0 +1,31 @@
+class StatCache:
+    # caches the values of column-wise functions (VMEAN(), VSTDEV(), etc.)
+    # so that formulas requiring the same statistic of the same column
+    # share it, rather than each calculating it themselves. entries are
+    # keyed by (function name, column id, column changes, filt,
+    # group_by id, group_by changes), and are removed when either
+    # column is invalidated (see Column.set_needs_recalc()). the changes
+    # count changes to a column's schema (i.e. its data type), but not to
+    # its values, so it's the invalidation which accounts for these (and
+    # for a change to the filters)
+
+    def __init__(self):
+        self._values = { }
+
+    def get(self, key):
+        return self._values.get(key)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def invalidate(self, column_id):
+        self._values = {
+            k: v for k, v in self._values.items()
+            if k[1] != column_id and k[4] != column_id }
+
+    def invalidate_filtered(self):
+        self._values = {
+            k: v for k, v in self._values.items() if not k[3] }
+
+    def clear(self):
+        self._values.clear()
@@ -3,6 +3,8 @@ import math
 from numbers import Number as num
 from itertools import repeat
 
+import numpy as np
+
 
 class FValues:
     def __init__(self, parent, row_count, filt):
@@ -140,3 +142,37 @@ def convert(value, to_type):
             return ''
         else:
             return str(value)
+
+
+def get_missing_array(count, hint=None):
+    if hint is float:
+        values = np.full(count, float('nan'))
+    else:
+        values = np.full(count, -2147483648, dtype=np.int64)
+    return values, np.ones(count, dtype=bool)
+
+
+def convert_array(values, missing, to_type):
+    # the array counterpart of convert(), for numeric types only.
+    # values is a numpy array, missing is a numpy bool array of
+    # the same length. returns the converted (values, missing)
+    if to_type is float:
+        values = values.astype(np.float64)
+        values[missing] = float('nan')
+        return values, missing
+    elif to_type is int:
+        if values.dtype.kind == 'f':
+            missing = missing | ~np.isfinite(values)
+            values = np.trunc(np.where(missing, 0, values))
+        values = values.astype(np.int64)
+        values[missing] = -2147483648
+        return values, missing
+    elif to_type is num or to_type is None:
+        values = values.copy()
+        if values.dtype.kind == 'f':
+            values[missing] = float('nan')
+        else:
+            values[missing] = -2147483648
+        return values, missing
+    else:
+        raise ValueError()
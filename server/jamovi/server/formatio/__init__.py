@@ -17,6 +17,8 @@ _writers = None
 
 settings = Settings.retrieve('main')
 # settings.specify_default('embedCond', '< 10 Mb')
+settings.specify_default('saveCompression', 'default')
+settings.specify_default('lazyOpen', True)
 
 
 def _init():
@@ -80,12 +82,12 @@ def read(data, path, prog_cb, is_example=False, title=None):
     elif not os.path.exists(path):
         raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
     elif ext == '.omv':
-        omv.read(data, path, prog_cb)
+        omv.read(data, path, prog_cb, lazy=settings.get('lazyOpen'))
         if not is_example:
             data.path = path
             data.save_format = 'jamovi'
     elif ext == '.omt':
-        omv.read(data, path, prog_cb)
+        omv.read(data, path, prog_cb, lazy=settings.get('lazyOpen'))
     else:
         _import(data, path, prog_cb, is_example)
 
@@ -119,14 +121,17 @@ def _import(data, path, prog_cb, is_example=False):
     #         pass
 
 
-def write(data, path, prog_cb, content=None):
+def write(data, path, prog_cb, content=None, compression=None):
     writers = get_writers()
 
+    if not compression:
+        compression = settings.get('saveCompression')
+
     try:
         temp_path = path + '.tmp'
         ext = os.path.splitext(path)[1].lower()[1:]
         if ext == 'omv' or ext == 'omt':
-            omv.write(data, temp_path, prog_cb, content, is_template=(ext == 'omt'))
+            omv.write(data, temp_path, prog_cb, content, is_template=(ext == 'omt'), compression=compression)
         elif ext in writers:
             writers[ext][1](data, temp_path, prog_cb)
         else:
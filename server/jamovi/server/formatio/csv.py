@@ -3,24 +3,64 @@
 #
 
 import os
+import re
 import csv
-import math
+import codecs
+import gzip
 from io import TextIOWrapper
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
+import random
+from itertools import islice
 import chardet
 import logging
 
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from jamovi.server.settings import Settings
+from jamovi.core import DataType
+from jamovi.core import MeasureType
+
 from .reader import Reader
+from .reader import ColumnReader
+from .reader import read_rows_into
+from .reader import CHUNK_ROWS
 
 
 log = logging.getLogger('jamovi')
 
+# files larger than this are split into chunks, and the chunks read in
+# parallel (see CSVReader.read_rows())
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024 * 1024
+SCAN_SIZE = 1048576
+
+# files larger than SAMPLE_THRESHOLD have a sample of their rows examined
+# up front (see CSVReader.read_sample()), in blocks of SAMPLE_BLOCK_SIZE
+SAMPLE_THRESHOLD = 16 * 1024 * 1024
+SAMPLE_BLOCK_SIZE = 65536
+
+# exports are written WRITE_BLOCK_ROWS rows at a time (see write_to())
+WRITE_BLOCK_ROWS = 65536
+
+settings = Settings.retrieve('main')
+settings.specify_default('importSampleSize', 1048576)
+
 
 def get_readers():
     return [ ( 'csv', read ), ( 'tsv', read ), ( 'txt', read ) ]
 
 
 def get_writers():
-    return [ ( 'csv', write ), ( 'txt', write ) ]
+    writers = [ ( 'csv', write ), ( 'txt', write ), ( 'gz', write_gz ) ]
+    if zstandard is not None:
+        writers.append(( 'zst', write_zst ))
+    return writers
 
 
 def read(data, path, prog_cb):
@@ -32,39 +72,89 @@ def read(data, path, prog_cb):
 def write(data, path, prog_cb):
 
     with open(path, 'w', encoding='utf-8') as file:
-        sep = ''
-        for column in data:
-            if column.is_virtual or (column.is_filter and column.active):
-                continue
-            file.write(sep + '"' + column.name + '"')
-            sep = ','
-        file.write('\n')
-
-        for row_no in range(data.row_count):
-            if data.is_row_filtered(row_no):
-                continue
-            sep = ''
-            for column in data:
-                if column.is_virtual or (column.is_filter and column.active):
-                    continue
-                col_no = column.index
-                cell = data[col_no][row_no]
-                if isinstance(cell, int) and cell == -2147483648:
-                    file.write(sep + '')
-                elif isinstance(cell, float) and math.isnan(cell):
-                    file.write(sep + '')
-                elif isinstance(cell, str):
-                    if cell != '':
-                        cell = cell.replace('"', '""')
-                        cell = '"' + cell + '"'
-                    file.write(sep + cell)
-                else:
-                    file.write(sep + str(cell))
-                sep = ','
-            file.write('\n')
-
-            if row_no % 1000 == 0:
-                prog_cb(row_no / data.row_count)
+        write_to(data, file, prog_cb)
+
+
+def write_gz(data, path, prog_cb):
+
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        write_to(data, file, prog_cb)
+
+
+def write_zst(data, path, prog_cb):
+
+    with open(path, 'wb') as raw:
+        compressor = zstandard.ZstdCompressor()
+        with compressor.stream_writer(raw) as stream:
+            file = TextIOWrapper(stream, encoding='utf-8')
+            write_to(data, file, prog_cb)
+            file.flush()
+            file.detach()
+
+
+def write_to(data, file, prog_cb):
+
+    # the rows are written in blocks of WRITE_BLOCK_ROWS; each column's
+    # values for the block are read in a single gather(), and formatted
+    # all at once
+
+    columns = filter(
+        lambda column: not (column.is_virtual or (column.is_filter and column.active)),
+        data)
+    columns = list(columns)
+
+    header = map(lambda column: '"' + column.name + '"', columns)
+    file.write(','.join(header) + '\n')
+
+    row_count = data.row_count
+
+    for row_start in range(0, row_count, WRITE_BLOCK_ROWS):
+        row_end = min(row_start + WRITE_BLOCK_ROWS, row_count)
+        keep = ~data.filtered_rows(row_start, row_end)
+        n_rows = int(np.count_nonzero(keep))
+
+        if n_rows > 0:
+            if len(columns) > 0:
+                cells = map(lambda column: format_cells(column, row_start, row_end, keep), columns)
+                lines = map(','.join, zip(*cells))
+                file.write('\n'.join(lines) + '\n')
+            else:
+                file.write('\n' * n_rows)
+
+        prog_cb(row_end / row_count)
+
+
+def format_cells(column, row_start, row_end, keep):
+    # returns the cells of the column's rows row_start to row_end (where
+    # keep is True) as a list of csv fields
+
+    values = column.gather(row_start, row_end)[keep]
+
+    if column.data_type is DataType.DECIMAL:
+        cells = list(map(repr, values.tolist()))
+        for index in np.flatnonzero(np.isnan(values)).tolist():
+            cells[index] = ''
+    elif column.data_type is DataType.TEXT:
+        if column.measure_type is MeasureType.ID:
+            strings = values.tolist()
+        else:
+            # look each level's label up once
+            labels = np.unique(values).tolist()
+            labels = dict(map(lambda value: (value, column.get_label(value)), labels))
+            strings = map(labels.__getitem__, values.tolist())
+        cells = list(map(_quote, strings))
+    else:
+        cells = list(map(str, values.tolist()))
+        for index in np.flatnonzero(values == -2147483648).tolist():
+            cells[index] = ''
+
+    return cells
+
+
+def _quote(value):
+    if value == '':
+        return ''
+    return '"' + value.replace('"', '""') + '"'
 
 
 class CSVReader(Reader):
@@ -73,10 +163,14 @@ class CSVReader(Reader):
         Reader.__init__(self)
         self._file = None
         self._text_stream = None
+        self._path = None
+        self._encoding = None
+        self._samples = None
 
     def open(self, path):
 
         self.set_total(os.stat(path).st_size)
+        self._path = path
 
         try:
             self._file = open(path, mode='rb')
@@ -89,6 +183,7 @@ class CSVReader(Reader):
             if encoding == 'ascii':
                 encoding = 'utf-8-sig'
 
+            self._encoding = encoding
             self._text_stream = TextIOWrapper(self._file, encoding=encoding, errors='replace')
 
             try:
@@ -120,6 +215,230 @@ class CSVReader(Reader):
         except Exception:
             pass
 
+    def _can_split(self):
+        # the file can be split at newlines, if the newlines and the quote
+        # chars are single bytes, and if a newline ending a row can be told
+        # from one inside a quoted value by counting the quote chars before
+        # it. this isn't the case with escape chars
+        dialect = self._dialect
+        if dialect.escapechar is not None or dialect.quoting == csv.QUOTE_NONE:
+            return False
+        try:
+            encoding = codecs.lookup(self._encoding).name
+            if encoding == 'utf-8-sig':
+                # the BOM (if any) precedes the header, and the rows
+                # following it are plain utf-8
+                encoding = 'utf-8'
+            return ('\n'.encode(encoding) == b'\n'
+                    and dialect.quotechar.encode(encoding) == dialect.quotechar.encode('ascii'))
+        except (UnicodeError, LookupError, TypeError):
+            return False
+
+    def read_sample(self, column_readers):
+
+        # examines blocks from the start, the end, and at random offsets in
+        # between. except for the first, these blocks don't start on a row
+        # boundary, so only those without quote chars are used, from their
+        # first newline, and only rows with the right number of values.
+
+        sample_size = settings.get('importSampleSize')
+
+        if (self._total < SAMPLE_THRESHOLD
+                or sample_size <= 0
+                or not self._can_split()):
+            return
+
+        quote = self._dialect.quotechar.encode('ascii')
+        column_count = len(column_readers)
+        samples = [ ColumnReader(None, i) for i in range(column_count) ]
+
+        start = find_row_ends(self._path, self._total, 1, quote)[0]
+        n_blocks = max(sample_size // SAMPLE_BLOCK_SIZE, 2)
+        offsets = sorted(random.randrange(start, self._total - SAMPLE_BLOCK_SIZE) for _ in range(n_blocks - 2))
+        offsets = [ start ] + offsets + [ self._total - SAMPLE_BLOCK_SIZE ]
+
+        with open(self._path, 'rb') as file:
+            for offset in offsets:
+                file.seek(offset)
+                block = file.read(SAMPLE_BLOCK_SIZE)
+                if offset != start:
+                    if quote in block:
+                        continue
+                    block = block[block.find(b'\n') + 1:]
+                block = block[:block.rfind(b'\n') + 1]
+
+                text = block.decode(self._encoding, errors='replace')
+                rows = csv.reader(StringIO(text, newline=None), **self._dialect_args())
+
+                chunk = [ ]
+                try:
+                    for row in rows:
+                        if len(row) == column_count:
+                            chunk.append(row)
+                except csv.Error:
+                    # a quoted value cut short at the end of the block
+                    pass
+
+                read_rows_into(chunk, samples)
+
+        self._samples = samples
+
+        for column_reader, sample in zip(column_readers, samples):
+            column_reader.assume(sample)
+
+    def _dialect_args(self):
+        return {
+            'delimiter': self._dialect.delimiter,
+            'quotechar': self._dialect.quotechar,
+            'doublequote': self._dialect.doublequote,
+            'skipinitialspace': self._dialect.skipinitialspace,
+            'quoting': self._dialect.quoting,
+        }
+
+    def read_rows(self, rows, column_readers, prog_cb):
+
+        n_chunks = max(2, min(self._total // CHUNK_SIZE, 4 * (os.cpu_count() or 1)))
+
+        if (self._total < PARALLEL_THRESHOLD
+                or (os.cpu_count() or 1) < 2
+                or not self._can_split()):
+            return Reader.read_rows(self, rows, column_readers, prog_cb)
+
+        quote = self._dialect.quotechar.encode('ascii')
+        splits = find_row_ends(self._path, self._total, n_chunks, quote)
+
+        if len(splits) < 3:  # the header, and less than two chunks
+            return Reader.read_rows(self, rows, column_readers, prog_cb)
+
+        dialect = self._dialect_args()
+
+        column_count = len(column_readers)
+        row_count = 0
+
+        with ProcessPoolExecutor() as pool:
+            futures = [ pool.submit(
+                read_chunk,
+                self._path,
+                start,
+                end,
+                self._encoding,
+                dialect,
+                column_count,
+                self._samples) for start, end in zip(splits[:-1], splits[1:]) ]
+
+            results = [ ]
+            for future in futures:
+                result = future.result()
+                if result is None:
+                    # a quote char outside a quoted value threw the
+                    # count in find_row_ends() off
+                    for pending in futures:
+                        pending.cancel()
+                    log.info('quote chars outside quoted values; reading serially')
+                    return Reader.read_rows(self, rows, column_readers, prog_cb)
+                results.append(result)
+                prog_cb(0.45 * len(results) / len(futures))
+
+        for chunk_no, (chunk_row_count, chunk_readers) in enumerate(results):
+            row_count += chunk_row_count
+            for column_reader, chunk_reader in zip(column_readers, chunk_readers):
+                column_reader.merge(chunk_reader)
+            prog_cb(0.45 + 0.45 * (chunk_no + 1) / len(results))
+
+        return row_count
+
+
+def find_row_ends(path, size, n_chunks, quote):
+
+    # finds the offsets of the ends of rows which divide the file into
+    # roughly n_chunks chunks. the first offset is the end of the header
+    # row, and the last is the end of the file. a newline ends a row if
+    # an even number of quote chars precede it. this only holds if every
+    # quote char is part of a quoted value, which read_chunk() checks
+
+    chunk_size = size // n_chunks
+    row_ends = [ ]
+    target = 0
+    pos = 0       # the offset of block in the file
+    i = 0         # the position in block counted up to
+    n_quotes = 0  # the number of quote chars before pos + i
+
+    with open(path, 'rb') as file:
+        block = file.read(SCAN_SIZE)
+        while block and len(row_ends) < n_chunks:
+            if pos + len(block) <= target:
+                n_quotes += block.count(quote, i)
+            else:
+                j = max(i, target - pos)
+                n_quotes += block.count(quote, i, j)
+                newline = block.find(b'\n', j)
+                if newline != -1:
+                    n_quotes += block.count(quote, j, newline)
+                    i = newline + 1
+                    if n_quotes % 2 == 0:
+                        row_ends.append(pos + i)
+                        target = pos + i + chunk_size
+                    continue
+                n_quotes += block.count(quote, j)
+            pos += len(block)
+            i = 0
+            block = file.read(SCAN_SIZE)
+
+    if len(row_ends) == 0 or row_ends[-1] < size:
+        row_ends.append(size)
+
+    return row_ends
+
+
+def read_chunk(path, start, end, encoding, dialect, column_count, samples=None):
+
+    # reads the rows between start and end (in a worker process), and
+    # returns the number of rows, and the column readers. returns None if
+    # the chunk contains a quote char which isn't part of a quoted value
+    # (i.e. a stray quote char, or a quoted value cut by start or end)
+
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding, errors='replace')
+
+    quote = dialect['quotechar']
+    if quote in text and quote in quoted_values(dialect).sub('', text):
+        return None
+
+    column_readers = [ ColumnReader(None, i) for i in range(column_count) ]
+    row_count = 0
+
+    if samples is not None:
+        for column_reader, sample in zip(column_readers, samples):
+            column_reader.assume(sample)
+
+    rows = csv.reader(StringIO(text, newline=None), **dialect)
+
+    while True:
+        chunk = list(islice(rows, CHUNK_ROWS))
+        if len(chunk) == 0:
+            break
+        read_rows_into(chunk, column_readers)
+        row_count += len(chunk)
+
+    return row_count, column_readers
+
+
+def quoted_values(dialect):
+
+    # a pattern matching the quoted values which start at the start of a
+    # field, and end at its end
+
+    delimiter = re.escape(dialect['delimiter'])
+    quote = re.escape(dialect['quotechar'])
+    space = ' *' if dialect['skipinitialspace'] else ''
+    if dialect['doublequote']:
+        value = f'(?:[^{ quote }]|{ quote }{ quote })*'
+    else:
+        value = f'[^{ quote }]*'
+    return re.compile(
+        rf'(?<![^{ delimiter }\r\n]){ space }{ quote }{ value }{ quote }(?=[{ delimiter }\r\n]|\Z)')
+
 
 def trim_after_last_newline(text):
 
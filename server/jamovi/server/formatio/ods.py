@@ -1,9 +1,41 @@
 
-from ezodf import opendoc
+from zipfile import ZipFile
+from zipfile import BadZipFile
+from xml.etree.ElementTree import iterparse
+from xml.etree.ElementTree import ParseError
 
 from .reader import Reader
+from .exceptions import FileCorruptError
 
-from itertools import islice
+
+OFFICE_NS = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+TABLE_NS = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+TEXT_NS = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+
+TABLE = TABLE_NS + 'table'
+ROW = TABLE_NS + 'table-row'
+CELL = TABLE_NS + 'table-cell'
+COVERED_CELL = TABLE_NS + 'covered-table-cell'
+ROWS_REPEATED = TABLE_NS + 'number-rows-repeated'
+COLUMNS_REPEATED = TABLE_NS + 'number-columns-repeated'
+
+VALUE_TYPE = OFFICE_NS + 'value-type'
+VALUE_ATTRS = {
+    'float': OFFICE_NS + 'value',
+    'percentage': OFFICE_NS + 'value',
+    'currency': OFFICE_NS + 'value',
+    'date': OFFICE_NS + 'date-value',
+    'time': OFFICE_NS + 'time-value',
+    'boolean': OFFICE_NS + 'boolean-value',
+}
+
+PARAGRAPHS = ( TEXT_NS + 'p', TEXT_NS + 'h' )
+SPACE = TEXT_NS + 's'
+TAB = TEXT_NS + 'tab'
+LINE_BREAK = TEXT_NS + 'line-break'
+
+# the columns are those of the first LOOKAHEAD_ROWS rows (see _rows())
+LOOKAHEAD_ROWS = 4096
 
 
 def get_readers():
@@ -17,88 +49,189 @@ def read(data, path, prog_cb):
 
 
 def to_string(cell):
-    value = cell.value
+
+    # returns the cell's value as a string, the same as the value ezodf
+    # reads for it
+
+    value_type = cell.get(VALUE_TYPE)
+
+    if value_type is None:
+        return ''
+    elif value_type == 'string':
+        return '\n'.join(map(plaintext, filter(lambda e: e.tag in PARAGRAPHS, cell)))
+
+    value = cell.get(VALUE_ATTRS.get(value_type))
     if value is None:
         return ''
+    elif value_type == 'boolean':
+        return str(value == 'true')
+    elif value_type in ('float', 'percentage', 'currency'):
+        return str(float(value))
     else:
-        return str(value)
+        return value
+
+
+def plaintext(elem):
+    text = [ elem.text ]
+    for child in elem:
+        if child.tag == SPACE:
+            text.append(' ' * int(child.get(TEXT_NS + 'c', 1)))
+        elif child.tag == TAB:
+            text.append('\t')
+        elif child.tag == LINE_BREAK:
+            text.append('\n')
+        else:
+            text.append(plaintext(child))
+        text.append(child.tail)
+    return ''.join(filter(None, text))
 
 
 class ODSReader(Reader):
 
+    # content.xml is parsed incrementally with iterparse(), and each row
+    # of the first sheet is converted to strings as it's read, and then
+    # discarded. repeated rows and cells are only expanded where they
+    # have values, so the empty rows and columns LibreOffice pads sheets
+    # out with cost nothing
+
     def __init__(self):
         Reader.__init__(self)
-        self._sheet = None
-        self._sheet_iter = None
-        self._row_no = 0
-        self._row_count = 0
+        self._zip = None
+        self._stream = None
 
     def open(self, path):
-        doc = opendoc(path)
-        self._sheet = doc.sheets[0]
+        try:
+            self._zip = ZipFile(path)
+            self.set_total(max(1, self._zip.getinfo('content.xml').file_size))
+        except (BadZipFile, KeyError):
+            self.close()
+            raise FileCorruptError
 
-        for row_no in range(0, self._sheet.nrows()):
-            for col_no in range(0, self._sheet.ncols()):
-                if self._sheet[row_no, col_no].value is not None:
-                    break
-            else:
-                continue
-            break
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
 
-        self._first_row = row_no
+    def progress(self):
+        if self._stream is None:
+            return 0
+        return self._stream.tell()
 
-        for row_no in range(self._sheet.nrows() - 1, -1, -1):
-            for col_no in range(0, self._sheet.ncols()):
-                if self._sheet[row_no, col_no].value is not None:
-                    break
-            else:
-                continue
-            break
+    def __iter__(self):
+        return self._rows()
 
-        self._last_row = row_no
+    def _rows(self):
 
-        for col_no in range(0, self._sheet.ncols()):
-            for row_no in range(0, self._sheet.nrows()):
-                if self._sheet[row_no, col_no].value is not None:
-                    break
-            else:
-                continue
-            break
+        # yields the rows from the first with a value to the last with a
+        # value, as lists of strings. the first column is the first with
+        # a value, and the last column the last with a value, in the
+        # first LOOKAHEAD_ROWS rows, which are held back until these are
+        # known
 
-        self._first_col = col_no
+        rows = self._sheet_rows()
 
-        for col_no in range(self._sheet.ncols() - 1, -1, -1):
-            for row_no in range(0, self._sheet.nrows()):
-                if self._sheet[row_no, col_no].value is not None:
+        lookahead = [ ]
+        n_values = 0
+        for row, n_repeats in rows:
+            lookahead.append((row, n_repeats))
+            if row is not None:
+                n_values += n_repeats
+                if n_values >= LOOKAHEAD_ROWS:
                     break
-            else:
-                continue
-            break
 
-        self._last_col = col_no
+        while len(lookahead) > 0 and lookahead[-1][0] is None:
+            lookahead.pop()
 
-        self._row_count = self._last_row - self._first_row + 1
-        self._col_count = self._last_col - self._first_col + 1
+        if len(lookahead) == 0:
+            return
 
-        self.set_total(self._row_count)
+        first_col = min(min(row) for row, _ in lookahead if row is not None)
+        last_col = max(max(row) for row, _ in lookahead if row is not None)
+        width = last_col - first_col + 1
 
-    def close(self):
-        self._sheet = None
+        def to_list(row):
+            values = [ '' ] * width
+            if row is not None:
+                for col_no, value in row.items():
+                    if first_col <= col_no <= last_col:
+                        values[col_no - first_col] = value
+            return values
 
-    def progress(self):
-        return self._row_no
+        for row, n_repeats in lookahead:
+            for _ in range(n_repeats):
+                yield to_list(row)
 
-    def __iter__(self):
-        self._row_no = 0
-        rows = self._sheet.rows()
-        rows = islice(rows, self._first_row, self._last_row + 1)
-        self._sheet_iter = rows.__iter__()
-        return self
-
-    def __next__(self):
-        values = self._sheet_iter.__next__()
-        values = islice(values, self._first_col, self._last_col + 1)
-        values = map(to_string, values)
-        values = list(values)
-        self._row_no += 1
-        return values
+        n_pending = 0  # empty rows not yet yielded
+        for row, n_repeats in rows:
+            if row is None:
+                n_pending += n_repeats
+                continue
+            for _ in range(n_pending):
+                yield [ '' ] * width
+            n_pending = 0
+            for _ in range(n_repeats):
+                yield to_list(row)
+
+    def _sheet_rows(self):
+
+        # yields the rows of the first sheet, from the first with a value,
+        # as dicts of their values by column (or None for empty rows), each
+        # with its number of repeats
+
+        try:
+            self._stream = self._zip.open('content.xml')
+            events = iterparse(self._stream, events=('start', 'end'))
+
+            parents = [ ]
+            table_depth = 0
+            found_first = False
+
+            for event, elem in events:
+
+                if event == 'start':
+                    parents.append(elem)
+                    if elem.tag == TABLE:
+                        table_depth += 1
+                    continue
+
+                parents.pop()
+
+                if elem.tag == TABLE:
+                    table_depth -= 1
+                    if table_depth == 0:
+                        # only the first sheet is read
+                        break
+                    continue
+
+                if elem.tag != ROW or table_depth != 1:
+                    continue
+
+                n_repeats = int(elem.get(ROWS_REPEATED, 1))
+                row = { }
+                col_no = 0
+
+                for cell in elem:
+                    if cell.tag != CELL and cell.tag != COVERED_CELL:
+                        continue
+                    n_cols = int(cell.get(COLUMNS_REPEATED, 1))
+                    value = to_string(cell)
+                    if value != '':
+                        for i in range(col_no, col_no + n_cols):
+                            row[i] = value
+                    col_no += n_cols
+
+                parents[-1].remove(elem)
+
+                if len(row) == 0:
+                    if found_first:
+                        yield None, n_repeats
+                    continue
+
+                found_first = True
+                yield row, n_repeats
+
+        except ParseError:
+            raise FileCorruptError
@@ -3,12 +3,18 @@ import zipfile
 from zipfile import ZipFile
 import io
 import json
-from tempfile import NamedTemporaryFile
-from tempfile import TemporaryDirectory
 import struct
 import os
 import os.path
 import re
+import mmap
+import functools
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from jamovi.core import ColumnType
 from jamovi.core import DataType
@@ -16,19 +22,21 @@ from jamovi.core import MeasureType
 from jamovi.server.appinfo import app_info
 
 
-def write(data, path, prog_cb, html=None, is_template=False):
+def write(data, path, prog_cb, html=None, is_template=False, compression=None):
+
+    compression = parse_compression(compression)
 
     with ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip:
 
         content = io.StringIO()
         content.write('Manifest-Version: 1.0\n')
         content.write('Data-Archive-Version: 1.0.2\n')
-        content.write('jamovi-Archive-Version: 9.0\n')
+        content.write('jamovi-Archive-Version: 9.1\n')
         content.write('Created-By: ' + str(app_info) + '\n')
-        zip.writestr('META-INF/MANIFEST.MF', bytes(content.getvalue(), 'utf-8'), zipfile.ZIP_DEFLATED)
+        zip.writestr('META-INF/MANIFEST.MF', bytes(content.getvalue(), 'utf-8'), *compression['meta'])
 
         if html is not None:
-            zip.writestr('index.html', html)
+            zip.writestr('index.html', html, *compression['meta'])
 
         content = None
         string_table_required = False
@@ -65,6 +73,7 @@ def write(data, path, prog_cb, html=None, is_template=False):
             field['width'] = column.width
             if column.data_type == DataType.DECIMAL:
                 field['type'] = 'number'
+                field['dps'] = column.dps
             elif column.data_type == DataType.TEXT and column.measure_type == MeasureType.ID:
                 field['type'] = 'string'
                 string_table_required = True
@@ -111,78 +120,103 @@ def write(data, path, prog_cb, html=None, is_template=False):
 
         metadata['dataSet'] = metadataset
 
-        zip.writestr('metadata.json', json.dumps(metadata), zipfile.ZIP_DEFLATED)
-
-        metadata = None
-
         xdata = { }
         for column in data:
             if column.is_virtual is True:
                 continue
             if column.has_levels:
-                xdata[column.name] = { 'labels': column.levels }
-        zip.writestr('xdata.json', json.dumps(xdata), zipfile.ZIP_DEFLATED)
+                levels = column.levels
+                xdata[column.name] = {
+                    'labels': levels,
+                    'counts': _level_counts(data, column, levels, row_count) }
+        zip.writestr('xdata.json', json.dumps(xdata), *compression['meta'])
         xdata = None
 
-        required_bytes = 0
-        for column in data:
-            if column.is_virtual is True:
-                continue
-            if column.data_type == DataType.DECIMAL:
-                required_bytes += (8 * row_count)
-            else:
-                required_bytes += (4 * row_count)
+        columns = [ column for column in data if column.is_virtual is False ]
+        ncols = len(columns)
 
-        if string_table_required:
-            cursor = 0
-            string_file = NamedTemporaryFile(delete=False)
+        # the strings are written first, so their offsets are known when
+        # data.bin is written. the offsets are then calculated a second
+        # time (rather than held onto) as data.bin is written, from the
+        # position of each slab's strings recorded here
 
-        temp_file = NamedTemporaryFile(delete=False)
-        temp_file.truncate(required_bytes)
+        def is_id(column):
+            return (column.data_type == DataType.TEXT
+                    and column.measure_type == MeasureType.ID)
 
-        for col_no in range(data.column_count):
-            column = data[col_no]
-            if column.is_virtual is True:
-                continue
-            if column.data_type == DataType.DECIMAL:
-                for i in range(0, row_count):
-                    value = column.raw(i)
-                    byts = struct.pack('<d', value)
-                    temp_file.write(byts)
-                    if i % 100000 == 0:
-                        prog_cb((col_no + i / row_count) / data.column_count)
-            elif column.data_type == DataType.TEXT and column.measure_type == MeasureType.ID:
-                for i in range(0, row_count):
-                    value = column[i]
-                    if value != '':
-                        byts = value.encode('utf-8')
-                        string_file.write(byts)
-                        string_file.write(bytes(1))
-                        n = len(byts) + 1
-                        byts = struct.pack('<i', cursor)
-                        temp_file.write(byts)
-                        cursor += n
-                    else:
-                        byts = struct.pack('<i', -2147483648)
-                        temp_file.write(byts)
-                    if i % 100000 == 0:
-                        prog_cb((col_no + i / row_count) / data.column_count)
-            else:
-                for i in range(0, row_count):
-                    value = column.raw(i)
-                    byts = struct.pack('<i', value)
-                    temp_file.write(byts)
-                    if i % 100000 == 0:
-                        prog_cb((col_no + i / row_count) / data.column_count)
-
-        temp_file.close()
-        zip.write(temp_file.name, 'data.bin')
-        os.remove(temp_file.name)
+        string_bases = { }
 
         if string_table_required:
-            string_file.close()
-            zip.write(string_file.name, 'strings.bin')
-            os.remove(string_file.name)
+            strings_info = _member_info('strings.bin', compression['data'])
+            with zip.open(strings_info, 'w', force_zip64=True) as string_file:
+                cursor = 0
+                for column in filter(is_id, columns):
+                    for row_offset in range(0, row_count, CHUNK_ROWS):
+                        n = min(CHUNK_ROWS, row_count - row_offset)
+                        offsets, table = column.get_values(row_offset, n)
+                        string_file.write(table)
+                        string_bases[(column.id, row_offset)] = cursor
+                        cursor += len(table)
+
+        # the slabs are encoded (and deflated) concurrently, a window of
+        # them at a time, and written in order as they complete
+
+        slabs = iter([
+            (col_no, row_offset)
+            for col_no in range(ncols)
+            for row_offset in range(0, row_count, CHUNK_ROWS) ])
+
+        data_info = _member_info('data.bin', compression['data'])
+
+        with ThreadPoolExecutor(WORKERS, thread_name_prefix='omv') as pool, \
+                zip.open(data_info, 'w', force_zip64=True) as data_file:
+
+            deflated = None
+            level = None
+            position = 0
+            if data_info.compress_type == zipfile.ZIP_DEFLATED and hasattr(data_file, '_compressor'):
+                # zipfile deflates on this thread, so instead the slabs are
+                # deflated as they're encoded, and zipfile's compressor is
+                # replaced with one handing back the results (see _Deflated)
+                deflated = _Deflated(data_info._compresslevel)
+                data_file._compressor = deflated
+                level = deflated.level
+
+            pending = deque()
+
+            def submit():
+                slab = next(slabs, None)
+                if slab is None:
+                    return
+                col_no, row_offset = slab
+                column = columns[col_no]
+                n = min(CHUNK_ROWS, row_count - row_offset)
+                string_base = string_bases.get((column.id, row_offset))
+                future = pool.submit(_encode, column, row_offset, n, string_base, level)
+                pending.append((col_no, row_offset, future))
+
+            for i in range(ENCODE_WINDOW):
+                submit()
+
+            while pending:
+                col_no, row_offset, future = pending.popleft()
+                values, chunk = future.result()
+                if deflated is not None:
+                    deflated.chunks.append(chunk)
+                    if row_offset == 0:
+                        fields[col_no]['deflated'] = [ position, position ]
+                    position += len(chunk)
+                    fields[col_no]['deflated'][1] = position
+                data_file.write(values)
+                submit()
+                prog_cb((col_no + row_offset / row_count) / ncols)
+
+        # the metadata is written after data.bin, so as to include where
+        # each column's (deflated) values are within it. these let the
+        # columns be read in one at a time (see read())
+
+        zip.writestr('metadata.json', json.dumps(metadata), *compression['meta'])
+        metadata = None
 
         resources = [ ]
 
@@ -190,12 +224,16 @@ def write(data, path, prog_cb, html=None, is_template=False):
             if analysis.has_results is False:
                 continue
             analysis_dir = '{:02} {}/analysis'.format(analysis.id, analysis.name)
-            zip.writestr(analysis_dir, analysis.serialize(strip_content=is_template), zipfile.ZIP_DEFLATED)
+            zip.writestr(analysis_dir, analysis.serialize(strip_content=is_template), *compression['analyses'])
             resources += analysis.resources
 
         for rel_path in resources:
             abs_path = os.path.join(data.instance_path, rel_path)
-            zip.write(abs_path, rel_path)
+            ext = os.path.splitext(rel_path)[1].lower()
+            if ext in ALREADY_COMPRESSED:
+                zip.write(abs_path, rel_path, zipfile.ZIP_STORED)
+            else:
+                zip.write(abs_path, rel_path, *compression['resources'])
 
         # if data.embedded_path is not '':
         #     try:
@@ -205,19 +243,282 @@ def write(data, path, prog_cb, html=None, is_template=False):
         #         pass
 
 
-_buffer = bytearray(512)
+BUFF_SIZE = 1048576
+CHUNK_ROWS = 131072
+
+# the members of an archive fall into these categories, and each can
+# be compressed differently
+COMPRESSION_CATEGORIES = ('meta', 'data', 'analyses', 'resources')
+
+COMPRESSION_MODES = {
+    'default': (zipfile.ZIP_DEFLATED, None),
+    'stored': (zipfile.ZIP_STORED, None),
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'max': (zipfile.ZIP_DEFLATED, 9),
+}
+
+# resources with these extensions are always stored; deflating them
+# again gains nothing
+ALREADY_COMPRESSED = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svgz',
+    '.pdf', '.zip', '.gz', '.bz2', '.xz', '.zst' }
+
+
+# the number of threads encoding slabs, and the number of slabs being
+# encoded at any one time
+WORKERS = os.cpu_count() or 1
+ENCODE_WINDOW = 2 * WORKERS
+
+
+def _encode(column, row_offset, count, string_base=None, level=None):
+    # encodes a slab of a column's values as they're laid out in data.bin.
+    # for ID columns, string_base is the position of the slab's strings
+    # in strings.bin. returns the values, and if a level is given, the
+    # values deflated (see _Deflated)
+    if string_base is not None:
+        offsets, table = column.get_values(row_offset, count)
+        offsets[offsets != -2147483648] += string_base
+        values = offsets.astype('<i4', copy=False)
+    elif column.data_type == DataType.DECIMAL:
+        values = column.get_values(row_offset, count)
+        values = values.astype('<f8', copy=False)
+    else:
+        values = column.get_values(row_offset, count)
+        values = values.astype('<i4', copy=False)
+
+    if level is None:
+        return values, None
+
+    # zlib releases the GIL as it deflates, so this is where the slabs
+    # are compressed in parallel. each is deflated on its own (raw, with
+    # no header) and ends on a byte boundary (a sync flush), so they can
+    # be concatenated into a single deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    chunk = compressor.compress(values) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return values, chunk
+
+
+class _Deflated:
+    # stands in for zipfile's compressor of a member whose data has
+    # been deflated already, a chunk at a time (see _encode()). zipfile
+    # still calculates the CRC and size of the member from the values
+    # written to it, but the compressor hands back the deflated chunk
+    # for each write, rather than deflating the values itself
+
+    def __init__(self, level):
+        if level is None:
+            level = zlib.Z_DEFAULT_COMPRESSION
+        self.level = level
+        self.chunks = deque()
+
+    def compress(self, data):
+        return self.chunks.popleft()
+
+    def flush(self):
+        # ends the stream with an empty final block
+        return zlib.compressobj(self.level, zlib.DEFLATED, -15).flush()
+
+
+def _member_info(name, compression):
+    # the ZipInfo of a member, compressed with the (compress_type,
+    # compress_level) given
+    info = zipfile.ZipInfo(name, time.localtime(time.time())[:6])
+    info.compress_type, info._compresslevel = compression
+    return info
+
+
+def parse_compression(spec):
+    # a spec is either a mode, applied to every category, or a comma
+    # separated list of category:mode pairs, i.e. 'data:stored,meta:max'.
+    # categories not listed use the default mode. returns a dict of
+    # category -> (compress_type, compress_level)
+
+    compression = dict.fromkeys(COMPRESSION_CATEGORIES, COMPRESSION_MODES['default'])
+
+    if not spec:
+        return compression
+
+    if ':' not in spec:
+        mode = spec.strip()
+        if mode not in COMPRESSION_MODES:
+            raise ValueError('Unrecognised compression mode: {}'.format(mode))
+        return dict.fromkeys(COMPRESSION_CATEGORIES, COMPRESSION_MODES[mode])
+
+    for part in spec.split(','):
+        category, _, mode = part.partition(':')
+        category = category.strip()
+        mode = mode.strip()
+        if category not in COMPRESSION_CATEGORIES:
+            raise ValueError('Unrecognised compression category: {}'.format(category))
+        if mode not in COMPRESSION_MODES:
+            raise ValueError('Unrecognised compression mode: {}'.format(mode))
+        compression[category] = COMPRESSION_MODES[mode]
+
+    return compression
+
+
+def _level_counts(data, column, levels, row_count):
+    # the number of rows using each level, as [ count, count ex filtered ].
+    # these stand in for the counts of a column until it's read in (see
+    # read())
+    values = column.gather(0, row_count)
+    filtered = data.filtered_rows(0, row_count)
+
+    counts = [ ]
+    for values in (values, values[~filtered]):
+        uniques, n = np.unique(values, return_counts=True)
+        counts.append(dict(zip(uniques.tolist(), n.tolist())))
+
+    return list(map(lambda level: [
+        counts[0].get(level[0], 0),
+        counts[1].get(level[0], 0) ], levels))
+
+
+def _set_level_counts(column, counts):
+    for value, count, count_ex_filtered in counts:
+        column.set_level_count(value, count, count_ex_filtered)
+
+
+def _read_deferred(column, view, row_count, string_table):
+    try:
+        _read_column(column, _slab_reader(view), row_count, string_table)
+    finally:
+        view.release()
+    if column.has_levels:
+        # the counts from the file are replaced with the real ones
+        column.update_level_counts()
 
 
-def _read_string_from_table(stream, pos):
-    final_pos = stream.seek(pos)
-    if pos != final_pos:
-        return ''
-    stream.readinto(_buffer)
+def _read_inflated(column, row_count, string_table, values):
+    # reads in a column's values, as inflated by _inflate()
+    view = memoryview(values)
     try:
-        end = _buffer.index(bytes(1))  # find string terminator
-        return _buffer[0:end].decode('utf-8', errors='ignore')
-    except ValueError:
-        return _buffer.decode('utf-8', errors='ignore')
+        _read_column(column, _slab_reader(view), row_count, string_table)
+    finally:
+        view.release()
+    if column.has_levels:
+        column.update_level_counts()
+
+
+def _inflate(path, offset, size, n_bytes):
+    # inflates a column's values, deflated as size bytes at offset in the
+    # archive. this doesn't touch the data set, so (unlike the rest of a
+    # deferred read) can be called from another thread
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        deflated = file.read(size)
+    if len(deflated) != size:
+        raise Exception('File is corrupt (truncated)')
+
+    inflater = zlib.decompressobj(-15)
+    values = inflater.decompress(deflated)
+    if len(values) != n_bytes:
+        raise Exception('File is corrupt (data.bin is truncated)')
+
+    return values
+
+
+def _release_map(data_map, views):
+    for view in views:
+        view.release()
+    data_map.close()
+
+
+def _elem_width(column):
+    if column.data_type == DataType.DECIMAL:
+        return 8
+    else:
+        return 4
+
+
+def _slab_reader(view):
+    # returns a function which returns the next n bytes of view
+    pos = 0
+
+    def read(n):
+        nonlocal pos
+        slab = view[pos:pos + n]
+        pos += n
+        return slab
+
+    return read
+
+
+def _stream_reader(stream, buff):
+    # returns a function which returns the next n bytes of stream, read
+    # into buff
+    def read(n):
+        slab = buff[0:n]
+        stream.readinto(slab)
+        return slab
+
+    return read
+
+
+def _read_column(column, read, row_count, string_table, repair_levels=False, progress=None):
+    # reads a column's values from data.bin, where read(n) returns the
+    # next n bytes of the column's data
+
+    is_id = (column.data_type == DataType.TEXT
+             and column.measure_type == MeasureType.ID)
+    elem_width = _elem_width(column)
+
+    for row_offset in range(0, row_count, int(BUFF_SIZE / elem_width)):
+        n_bytes_to_read = min(elem_width * (row_count - row_offset), BUFF_SIZE)
+        buff_view = read(n_bytes_to_read)
+
+        if repair_levels:
+            i = 0
+            for values in struct.iter_unpack('<i', buff_view):
+                v = values[0]
+                if v != -2147483648:  # missing value
+                    column.append_level(v, str(v))
+                column.set_value(row_offset + i, v)
+                i += 1
+        elif is_id and string_table is None:
+            i = 0
+            for values in struct.iter_unpack('<i', buff_view):
+                v = values[0]
+                column.set_value(row_offset + i, '' if v == -2147483648 else str(v))
+                i += 1
+        elif is_id:
+            column.set_values(row_offset, buff_view, string_table)
+        else:
+            column.set_values(row_offset, buff_view)
+
+        buff_view.release()
+
+        if progress is not None:
+            progress(row_offset / row_count)
+
+    column.determine_dps()
+
+
+def _member_offset(path, info):
+    # the offset of the member's data within the archive. this comes from
+    # the member's local header, as its 'extra' field can differ from the
+    # one in the central directory
+    with open(path, 'rb') as file:
+        file.seek(info.header_offset)
+        header = file.read(30)
+    if len(header) != 30 or header[0:4] != b'PK\x03\x04':
+        raise Exception('File is corrupt (bad local header)')
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    return info.header_offset + 30 + name_len + extra_len
+
+
+def _map_member(path, info):
+    # maps the archive into memory, and returns the map along with the
+    # offset of the (stored) member's data within it
+    offset = _member_offset(path, info)
+    with open(path, 'rb') as file:
+        data_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if offset + info.file_size > len(data_map):
+        data_map.close()
+        raise Exception('File is corrupt (truncated)')
+
+    return data_map, offset
 
 
 def replace_single_equals(formula):
@@ -260,7 +561,7 @@ def replace_single_equals(formula):
     return formula
 
 
-def read(data, path, prog_cb):
+def read(data, path, prog_cb, lazy=False):
 
     with ZipFile(path, 'r') as zip:
         manifest = zip.read('META-INF/MANIFEST.MF').decode('utf-8')
@@ -313,6 +614,14 @@ def read(data, path, prog_cb):
                 transform.description = meta_transform.get('description', '')
                 transform.suffix = meta_transform.get('suffix', '')
 
+        # the dps, the level counts, and where each column's values are
+        # within a deflated data.bin, were added in 9.1. with these, the
+        # columns can be read in as they're needed (see lazy below)
+        has_extras = jav >= (9, 1)
+
+        dps_known = set()
+        deflated_ranges = { }
+
         for meta_column in meta_dataset['fields']:
             name = meta_column['name']
             id = meta_column.get('id', 0)
@@ -352,6 +661,13 @@ def read(data, path, prog_cb):
             column.parent_id = meta_column.get('parentId', 0)
             column.cell_tracker.edited_cell_ranges = meta_column.get('edits', [])
 
+            if has_extras and 'dps' in meta_column:
+                column.dps = meta_column['dps']
+                dps_known.add(column.id)
+
+            if has_extras and 'deflated' in meta_column:
+                deflated_ranges[column.id] = meta_column['deflated']
+
             missing_values = meta_column.get('missingValues', [])
             if missing_values:
                 column.set_missing_values(missing_values)
@@ -371,6 +687,7 @@ def read(data, path, prog_cb):
         data.set_row_count(row_count)
 
         columns_w_bad_levels = [ ]  # do some repair work
+        level_counts = { }
 
         try:
             xdata_content = zip.read('xdata.json').decode('utf-8')
@@ -386,6 +703,13 @@ def read(data, path, prog_cb):
                                 if len(meta_label) > 2:
                                     import_value = meta_label[2]
                                 column.append_level(meta_label[0], meta_label[1],  import_value)
+                            meta_counts = xdata[column.name].get('counts')
+                            if (has_extras
+                                    and meta_counts is not None
+                                    and len(meta_counts) == len(meta_labels)):
+                                level_counts[column.id] = list(map(
+                                    lambda label, counts: (label[0], counts[0], counts[1]),
+                                    meta_labels, meta_counts))
                         else:
                             columns_w_bad_levels.append(column.id)
                     except Exception:
@@ -396,91 +720,110 @@ def read(data, path, prog_cb):
 
         prog_cb(0.03)
 
-        with TemporaryDirectory() as dir:
-            zip.extract('data.bin', dir)
-            data_path = os.path.join(dir, 'data.bin')
-            data_file = open(data_path, 'rb')
-
-            try:
-                zip.extract('strings.bin', dir)
-                string_table_present = True
-                string_table_path = os.path.join(dir, 'strings.bin')
-                string_table = open(string_table_path, 'rb')
-            except Exception:
-                string_table_present = False
-
-            BUFF_SIZE = 65536
-            buff = memoryview(bytearray(BUFF_SIZE))
+        try:
+            string_table = zip.read('strings.bin')
+        except KeyError:
+            string_table = None
+
+        data_info = zip.getinfo('data.bin')
+
+        columns = list(data.dataset)
+        ncols = len(columns)
+        widths = [ _elem_width(column) for column in columns ]
+
+        if sum(widths) * row_count > data_info.file_size:
+            raise Exception('File is corrupt (data.bin is truncated)')
+
+        data_map = None
+        data_file = None
+        member_pos = None
+
+        if data_info.compress_type == zipfile.ZIP_STORED:
+            # stored uncompressed, so can be read in place
+            data_map, pos = _map_member(path, data_info)
+            data_view = memoryview(data_map)
+        elif (data_info.compress_type == zipfile.ZIP_DEFLATED
+                and all(map(lambda column: column.id in deflated_ranges, columns))):
+            # each column deflated on its own, so can be inflated on its own
+            member_pos = _member_offset(path, data_info)
+        else:
+            data_file = zip.open(data_info)
+            read = _stream_reader(data_file, memoryview(bytearray(BUFF_SIZE)))
 
-            ncols = data.dataset.column_count
-            col_no = 0
+        deferred_views = [ ]
 
-            for column in data.dataset:
+        try:
+            for col_no, column in enumerate(columns):
 
                 if column.data_type == DataType.DECIMAL:
-                    elem_fmt = '<d'
-                    elem_width = 8
                     repair_levels = False
-                    transform = None
                 elif column.data_type == DataType.TEXT and column.measure_type == MeasureType.ID:
-                    elem_fmt = '<i'
-                    elem_width = 4
                     repair_levels = False
-                    if string_table_present:
-                        def transform(x):
-                            if x == -2147483648:
-                                return ''
-                            else:
-                                return _read_string_from_table(string_table, x)
-                    else:
-                        def transform(x):
-                            if x == -2147483648:
-                                return ''
-                            else:
-                                return str(x)
                 else:
-                    elem_fmt = '<i'
-                    elem_width = 4
                     repair_levels = column.id in columns_w_bad_levels
-                    transform = None
-
-                for row_offset in range(0, row_count, int(BUFF_SIZE / elem_width)):
-                    n_bytes_to_read = min(elem_width * (row_count - row_offset), BUFF_SIZE)
-                    buff_view = buff[0:n_bytes_to_read]
-                    data_file.readinto(buff_view)
-
-                    # 'if' surrounding loops, rather than an 'if' inside one loop
-                    # gives a performance improvement (i expect)
-                    if repair_levels:
-                        i = 0
-                        for values in struct.iter_unpack(elem_fmt, buff_view):
-                            v = values[0]
-                            if v != -2147483648:  # missing value
-                                column.append_level(v, str(v))
-                            column.set_value(row_offset + i, v)
-                            i += 1
-                    elif transform:
-                        i = 0
-                        for values in struct.iter_unpack(elem_fmt, buff_view):
-                            value = transform(values[0])
-                            column.set_value(row_offset + i, value)
-                            i += 1
-                    else:
-                        i = 0
-                        for values in struct.iter_unpack(elem_fmt, buff_view):
-                            column.set_value(row_offset + i, values[0])
-                            i += 1
-
-                    prog_cb(0.1 + 0.85 * (col_no + row_offset / row_count) / ncols)
-
-                col_no += 1
-
-            data_file.close()
-            if string_table_present:
-                string_table.close()
 
-        for column in data:
-            column.determine_dps()
+                # filters are needed up front, to filter the rows, and
+                # the dps and level counts are needed up front, for the
+                # column schemas
+                deferrable = (lazy
+                              and column.column_type is not ColumnType.FILTER
+                              and not repair_levels
+                              and (column.data_type is not DataType.DECIMAL
+                                   or column.id in dps_known)
+                              and (not column.has_levels
+                                   or column.id in level_counts))
+
+                set_level_counts = None
+                if deferrable and column.has_levels:
+                    set_level_counts = functools.partial(
+                        _set_level_counts, column, level_counts[column.id])
+
+                n_bytes = widths[col_no] * row_count
+
+                if data_map is not None:
+                    column_view = data_view[pos:pos + n_bytes]
+                    read = _slab_reader(column_view)
+                    pos += n_bytes
+
+                    if deferrable:
+                        data.defer_read(column.id, functools.partial(
+                            _read_deferred, column, column_view, row_count, string_table),
+                            set_level_counts)
+                        deferred_views.append(column_view)
+                        continue
+
+                elif member_pos is not None:
+                    start, end = deflated_ranges[column.id]
+                    inflate = functools.partial(
+                        _inflate, path, member_pos + start, end - start, n_bytes)
+
+                    if deferrable:
+                        data.defer_read(column.id, functools.partial(
+                            _read_inflated, column, row_count, string_table),
+                            set_level_counts,
+                            inflate)
+                        continue
+
+                    column_view = memoryview(inflate())
+                    read = _slab_reader(column_view)
+
+                def progress(p):
+                    prog_cb(0.1 + 0.85 * (col_no + p) / ncols)
+
+                _read_column(column, read, row_count, string_table, repair_levels, progress)
+
+                if data_file is None:
+                    column_view.release()
+
+        finally:
+            if data_map is not None:
+                data_view.release()
+                # the map is closed once the deferred reads are done with
+                # it (or straight away, if there aren't any)
+                data.release_when_read(functools.partial(
+                    _release_map, data_map, deferred_views))
+            elif data_file is not None:
+                data_file.close()
 
         is_analysis = re.compile('^[0-9][0-9]+ .+/analysis$')
         is_resource = re.compile('^[0-9][0-9]+ .+/resources/.+')
@@ -8,6 +8,9 @@ from jamovi.librdata import DataType as RDataType
 from jamovi.librdata import Writer
 
 
+WRITE_BLOCK_ROWS = 65536
+
+
 def get_readers():
     return [ ( 'rds', read ), ( 'rdata', read )  ]
 
@@ -62,24 +65,36 @@ def write(data, path, prog_cb, format):
             labels = map(lambda x: x[1], column.levels)
             rcol.add_level_labels(labels)
 
-    for col_no in range(data.column_count):
+    row_count = data.row_count
+    column_count = data.column_count
+
+    # the values are read a column and WRITE_BLOCK_ROWS rows at a time.
+    # factor codes are looked up in a map from each level's value to its
+    # (1 based) index, rather than by searching the levels for every row
+    for col_no in range(column_count):
         column = data[col_no]
-        if treat_as_factor(column):
-            if column.data_type == DataType.TEXT:
-                values = list(map(lambda x: x[1], column.levels))
+        factor = treat_as_factor(column)
+        if factor:
+            if column.data_type is DataType.TEXT:
+                levels = map(lambda x: x[1], column.levels)
             else:
-                values = list(map(lambda x: x[0], column.levels))
-            for row_no in range(data.row_count):
-                value = column[row_no]
-                if value != '' and value != -2147483648:
-                    writer.insert_value(row_no, col_no, values.index(value) + 1)
-                else:
-                    writer.insert_value(row_no, col_no, -2147483648)
-        else:
-            for row_no in range(data.row_count):
-                value = column[row_no]
+                levels = map(lambda x: x[0], column.levels)
+            codes = { }
+            for index, level in enumerate(levels):
+                codes.setdefault(level, index + 1)
+            codes[''] = -2147483648
+            codes[-2147483648] = -2147483648
+
+        for row_start in range(0, row_count, WRITE_BLOCK_ROWS):
+            row_end = min(row_start + WRITE_BLOCK_ROWS, row_count)
+            values = column.cells(row_start, row_end)
+            if factor:
+                values = map(codes.__getitem__, values)
+            for row_no, value in enumerate(values, row_start):
                 writer.insert_value(row_no, col_no, value)
 
+        prog_cb((col_no + 1) / column_count)
+
     writer.close()
 
 
@@ -7,11 +7,18 @@ from jamovi.server.settings import Settings
 
 import re
 import math
+from array import array
+from itertools import islice
+from itertools import zip_longest
+
+import numpy as np
 
 
 settings = Settings.retrieve('main')
 settings.specify_default('missings', 'NA')
 
+NaN = float('nan')
+
 
 def calc_dps(value, max_dp=3):
     if math.isnan(value):
@@ -33,6 +40,34 @@ def calc_dps(value, max_dp=3):
     return max_dp_required
 
 
+def calc_max_dps(values, max_dp=3):
+
+    # the arithmetic equivalent of max(map(calc_dps, values)) for an array
+    # of doubles. values too close to a rounding boundary to be sure of
+    # are passed to calc_dps()
+
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return 0
+
+    scale = 10 ** max_dp
+    scaled = (values % 1) * scale
+    digits = np.rint(scaled).astype(np.int64) % scale
+
+    max_dp_required = 0
+    for dp in range(max_dp, 0, -1):
+        if np.any(digits % (10 ** (max_dp - dp + 1)) != 0):
+            max_dp_required = dp
+            break
+
+    unsure = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if max_dp_required < max_dp and np.any(unsure):
+        for value in values[unsure].tolist():
+            max_dp_required = max(max_dp_required, calc_dps(value, max_dp))
+
+    return max_dp_required
+
+
 class Reader:
 
     def __init__(self):
@@ -55,9 +90,14 @@ class Reader:
 
     def read_into(self, data, path, prog_cb):
 
+        # the file is read in a single pass. each column's values are
+        # buffered (see ColumnReader), and written to the data set once
+        # the column's type is known, at the end
+
         self.open(path)
 
-        column_names = self.__iter__().__next__()
+        rows = self.__iter__()
+        column_names = rows.__next__()
 
         column_count = 0
         column_readers = [ ]
@@ -75,43 +115,94 @@ class Reader:
             column_readers.append(ColumnReader(column, i))
             column_count += 1
 
-        row_count = 0
-
-        first = True
-
-        for row in self:
-            if first:
-                first = False
-            else:
-                for i in range(column_count):
-                    column_readers[i].examine_row(row)
+        self.read_sample(column_readers)
 
-                row_count += 1
+        row_count = self.read_rows(rows, column_readers, prog_cb)
 
-            if row_count % 1000 == 0:
-                prog_cb(0.33333 * self.progress() / self._total)
+        self.close()
 
         for column_reader in column_readers:
             column_reader.ruminate()
 
         data.set_row_count(row_count)
 
-        first = True
+        for i in range(column_count):
+            column_readers[i].populate()
+            prog_cb(0.9 + 0.1 * (i + 1) / column_count)
 
-        row_no = 0
+    def read_sample(self, column_readers):
 
-        for row in self:
-            if first:
-                first = False
-            else:
-                for i in range(column_count):
-                    column_readers[i].parse_row(row, row_no)
-                row_no += 1
+        # readers can override this to examine a sample of the rows up
+        # front, and let the column readers know what's in it (see
+        # ColumnReader.assume()). this doesn't change the outcome, but it
+        # lets the column readers take faster paths from the first row
 
-            if row_no % 1000 == 0:
-                prog_cb(.33333 + .66666 * self.progress() / self._total)
+        pass
+
+    def read_rows(self, rows, column_readers, prog_cb):
+
+        # reads the rows (following the header) into the column readers,
+        # and returns the number of rows. readers can override this to
+        # read the rows some other way
+
+        row_count = 0
+        rows = iter(rows)
+
+        while True:
+            chunk = list(islice(rows, CHUNK_ROWS))
+            if len(chunk) == 0:
+                break
+
+            read_rows_into(chunk, column_readers)
+            row_count += len(chunk)
+
+            prog_cb(0.9 * self.progress() / self._total)
+
+        return row_count
 
-        self.close()
+
+CHUNK_ROWS = 4096
+
+# buffered text values are flushed to a string table (see
+# ColumnReader._flush_strings()) in blocks of this many rows
+STRING_BLOCK_ROWS = 65536
+
+
+def read_rows_into(rows, column_readers):
+
+    # reads a chunk of rows into the column readers, a column at a time.
+    # missing values at the ends of short rows are filled with ''
+
+    columns = zip_longest(*rows, fillvalue='')
+    for column_reader in column_readers:
+        values = next(columns, None)
+        if values is None:
+            values = ('',) * len(rows)
+        column_reader.read_values(values)
+
+
+def to_string_table(values):
+
+    # ID values are written as offsets into a table of strings (see
+    # Column.set_values()). returns the offsets and the table for a
+    # sequence of strings, where None (or '') is missing. repeated strings
+    # are only stored once
+
+    table = bytearray()
+    offsets = array('i')
+    seen = { }
+    for value in values:
+        if value is None or value == '':
+            offsets.append(-2147483648)
+        else:
+            offset = seen.get(value)
+            if offset is None:
+                offset = len(table)
+                seen[value] = offset
+                table += value.encode('utf-8')
+                table.append(0)
+            offsets.append(offset)
+    return offsets, table
 
 
 euro_float_pattern = re.compile(r'^(-)?([0-9]*),([0-9]+)$')
@@ -120,16 +211,23 @@ euro_float_repl = r'\1\2.\3'
 
 class ColumnReader:
 
+    # the values are buffered as ints, in an array('i'), until a value
+    # which isn't an int comes along. then they're promoted to doubles, in
+    # an array('d'), and when a value which isn't a number comes along,
+    # to strings. the strings are collected in a list, and every
+    # STRING_BLOCK_ROWS of them flushed to a block of offsets into a
+    # string table (see to_string_table()), in _blocks. the strings of
+    # numbers which don't survive the round trip through int() or float()
+    # (i.e. '007' or '2.50') are kept (in _raws), so that promoting to
+    # strings doesn't change them
+
     def _is_euro_float(self, v):
         if euro_float_pattern.match(v):
             return True
         return False
 
     def _parse_euro_float(self, v):
-        v = re.sub(
-            euro_float_pattern,
-            euro_float_repl,
-            v)
+        v = euro_float_pattern.sub(euro_float_repl, v)
         return float(v)
 
     def __init__(self, column, column_index):
@@ -149,14 +247,119 @@ class ColumnReader:
         self._ruminated = False
         self._dps = 0
 
-    def examine_row(self, row):
+        self._values = array('i')
+        self._values_type = int
+        self._blocks = [ ]
+        self._raws = { }
+        self._int_spans = [ ]  # the ranges of values buffered as ints, before promotion
+
+    def read_row(self, row):
 
         if self._column_index >= len(row):
-            return
+            value = None
+        else:
+            value = row[self._column_index]
+
+        self.read_value(value)
+
+    def read_values(self, values):
+
+        # reads a chunk of values. chunks of numbers are parsed, checked and
+        # appended with numpy in one go, and anything else (i.e. text, euro
+        # floats, numbers which don't fit) a value at a time
+
+        if (self._values_type is not str
+                and (self._only_integers or self._only_floats)
+                and None not in values):
+            if self._read_numbers(values):
+                return
+
+        for value in values:
+            self.read_value(value)
+
+        if len(self._values) >= STRING_BLOCK_ROWS and self._values_type is str:
+            self._flush_strings()
+
+    def _read_numbers(self, values):
 
-        value = row[self._column_index]
+        # returns False, having changed nothing, if the values can't be
+        # read as a chunk
+
+        values = np.array(values, dtype=np.str_)
+        missing = (values == '') | (values == ' ') | (values == self._missings)
+        present = values[~missing]
+
+        ints = None
+        floats = None
+        all_ints = False
+
+        try:
+            if self._only_integers or self._only_euro_floats:
+                ints = present.astype(np.int64)
+                all_ints = True
+        except ValueError:
+            pass
+        except OverflowError:
+            return False
+
+        if all_ints and self._only_integers and self._values_type is int:
+            if len(ints) > 0 and (ints.min() < -2147483648 or ints.max() > 2147483647):
+                return False
+            canonical = (ints.astype(np.str_) == present) & (ints != -2147483648)
+        elif self._only_floats:
+            try:
+                floats = present.astype(np.float64)
+            except ValueError:
+                return False
+            canonical = (np.array(list(map(repr, floats.tolist())), dtype=np.str_) == present)
+            canonical &= ~np.isnan(floats)
+        else:
+            return False
+
+        # committed now, nothing below fails
+
+        if len(present) > 0:
+            self._is_empty = False
+
+        if not self._many_uniques:
+            self._unique_values.update(present.tolist())
+            self._n_uniques = len(self._unique_values)
+            if self._n_uniques > 49:
+                self._many_uniques = True
+
+        offset = len(self._values)
+        indices = np.flatnonzero(~missing)
+
+        if floats is None:
+            chunk = np.full(len(values), -2147483648, dtype=np.int32)
+            chunk[indices] = ints
+        else:
+            if not all_ints:
+                # some values failed int(), but not float()
+                self._only_integers = False
+                self._only_euro_floats = False
+            self._dps = max(self._dps, calc_max_dps(floats))
+            if self._values_type is int:
+                self._promote(float)
+            chunk = np.full(len(values), NaN, dtype=np.float64)
+            chunk[indices] = floats
+
+        for index in indices[~canonical].tolist():
+            self._raws[offset + index] = str(values[index])
+
+        self._values.frombytes(chunk.tobytes())
+
+        return True
+
+    def read_value(self, value):
 
         if value == self._missings or value == '' or value == ' ' or value is None:
+            if self._values_type is int:
+                self._values.append(-2147483648)
+            elif self._values_type is float:
+                self._values.append(NaN)
+            else:
+                self._values.append(None)
             return
         else:
             self._is_empty = False
@@ -168,10 +371,60 @@ class ColumnReader:
                 if self._n_uniques > 49:
                     self._many_uniques = True
 
+        # we always parse, even if we know the column is text, for the dps
+        number = self._parse(value)
+
+        if self._values_type is not str:
+            if self._only_integers:
+                if str(number) != value or number == -2147483648:
+                    self._raws[len(self._values)] = value
+                self._values.append(number)
+                return
+            elif self._only_floats or self._only_euro_floats:
+                if self._values_type is int:
+                    self._promote(float)
+                number = float(number)
+                if repr(number) != value or math.isnan(number):
+                    self._raws[len(self._values)] = value
+                self._values.append(number)
+                return
+            else:
+                self._promote(str)
+
+        self._values.append(value)
+
+    def _flush_strings(self, final=False):
+
+        # moves the buffered strings to blocks of STRING_BLOCK_ROWS. if
+        # final, the strings left over (less than a block) are flushed too
+
+        values = self._values
+        end = len(values) if final else len(values) - len(values) % STRING_BLOCK_ROWS
+        for start in range(0, end, STRING_BLOCK_ROWS):
+            self._blocks.append(to_string_table(values[start:min(start + STRING_BLOCK_ROWS, end)]))
+        del values[:end]
+
+    def _parse(self, value):
+
+        # determines whether the value is an int, a float or a euro float,
+        # and returns it parsed, or None if it's none of these
+
+        if not self._only_integers and not self._only_euro_floats:
+            # float() gives the same outcome as int() then float(), and
+            # saves raising a ValueError from int() for every float
+            try:
+                f = float(value)
+                self._dps = max(self._dps, calc_dps(f))
+                return f
+            except ValueError:
+                self._only_floats = False
+                return None
+
         try:
             i = int(value)
             if i > 2147483647 or i < -2147483648:
                 self._only_integers = False
+            return i
         except ValueError:
             self._only_integers = False
 
@@ -182,14 +435,116 @@ class ColumnReader:
                 # continuous. the user might change it *to* continuous later.
                 self._dps = max(self._dps, calc_dps(f))
                 self._only_euro_floats = False
+                return f
             except ValueError:
                 self._only_floats = False
 
                 if self._only_euro_floats and self._is_euro_float(value):
                     f = self._parse_euro_float(value)
                     self._dps = max(self._dps, calc_dps(f))
+                    return f
                 else:
                     self._only_euro_floats = False
+                    return None
+
+    def _promote(self, to_type):
+
+        values = self._values
+        raws = self._raws
+
+        if to_type is float:
+            self._values = array('d', (
+                NaN if v == -2147483648 and i not in raws else v
+                for i, v in enumerate(values)))
+            self._int_spans = [ (0, len(values)) ]
+        elif self._values_type is int:
+            self._values = [
+                raws[i] if i in raws else None if v == -2147483648 else str(v)
+                for i, v in enumerate(values) ]
+            self._raws = { }
+        else:
+            was_int = bytearray(len(values))
+            for start, end in self._int_spans:
+                was_int[start:end] = b'\x01' * (end - start)
+            self._values = [
+                raws[i] if i in raws else None if math.isnan(v) else str(int(v)) if was_int[i] else repr(v)
+                for i, v in enumerate(values) ]
+            self._raws = { }
+            self._int_spans = [ ]
+
+        self._values_type = to_type
+
+        if to_type is str:
+            self._flush_strings()
+
+    def assume(self, sample):
+
+        # takes on what a column reader which has read a sample of the
+        # values knows about the values. this is only ever what they're not
+        # (i.e. not all integers), and what the sample rules out the whole
+        # column rules out as well, so the outcome is unchanged. the values
+        # are then buffered as the type they'll end up as from the start
+
+        self._only_integers = self._only_integers and sample._only_integers
+        self._only_floats = self._only_floats and sample._only_floats
+        self._only_euro_floats = self._only_euro_floats and sample._only_euro_floats
+        self._dps = max(self._dps, sample._dps)
+
+        if sample._many_uniques:
+            self._many_uniques = True
+
+        if not (self._only_integers or self._only_floats or self._only_euro_floats):
+            values_type = str
+        elif not self._only_integers:
+            values_type = float
+        else:
+            values_type = int
+
+        if self._values_type is not values_type:
+            self._promote(values_type)
+
+    def merge(self, other):
+
+        # appends the values read by another column reader, which has read
+        # the rows following this one's (see csv.CSVReader.read_rows())
+
+        self._only_integers = self._only_integers and other._only_integers
+        self._only_floats = self._only_floats and other._only_floats
+        self._only_euro_floats = self._only_euro_floats and other._only_euro_floats
+        self._is_empty = self._is_empty and other._is_empty
+        self._dps = max(self._dps, other._dps)
+
+        if not self._many_uniques:
+            if other._many_uniques:
+                self._many_uniques = True
+            else:
+                self._unique_values |= other._unique_values
+                self._n_uniques = len(self._unique_values)
+                if self._n_uniques > 49:
+                    self._many_uniques = True
+
+        if self._values_type is str or other._values_type is str:
+            values_type = str
+        elif self._values_type is float or other._values_type is float:
+            values_type = float
+        else:
+            values_type = int
+
+        if self._values_type is not values_type:
+            self._promote(values_type)
+        if other._values_type is not values_type:
+            other._promote(values_type)
+
+        if values_type is str:
+            # the blocks are kept in order, so this one's strings are
+            # flushed (including a short last block) ahead of the other's
+            self._flush_strings(final=True)
+            self._blocks.extend(other._blocks)
+
+        offset = len(self._values)
+        self._values.extend(other._values)
+        self._raws.update((i + offset, raw) for i, raw in other._raws.items())
+        self._int_spans.extend((start + offset, end + offset) for start, end in other._int_spans)
 
     def ruminate(self):
 
@@ -246,50 +601,48 @@ class ColumnReader:
         self._column.dps = self._dps
         self._ruminated = True
 
-    def parse_row(self, row, row_no):
+    def populate(self):
 
         if self._ruminated is False:
             self.ruminate()
 
-        if self._column_index >= len(row):
-            value = None
-        else:
-            value = row[self._column_index]
-
-            if value == self._missings or value == '' or value == ' ':
-                value = None
+        values = self._values
 
-        if self._data_type == DataType.INTEGER:
-            if value is None:
-                self._column.clear_at(row_no)
-            else:
-                self._column.set_value(row_no, int(value))
+        if self._data_type == DataType.INTEGER or self._data_type == DataType.DECIMAL:
+            self._column.set_values(0, values)
 
-        elif self._data_type == DataType.DECIMAL:
+        elif self._data_type == DataType.TEXT:
 
-            if value is None:
-                self._column.set_value(row_no, float('nan'))
-            else:
-                if self._only_euro_floats:
-                    value = re.sub(
-                        euro_float_pattern,
-                        euro_float_repl,
-                        value)
-                self._column.set_value(row_no, float(value))
+            self._flush_strings(final=True)
+            blocks = self._blocks
+            self._blocks = None
 
-        elif self._data_type == DataType.TEXT:
+            row_no = 0
+            while blocks:
+                offsets, table = blocks.pop(0)
 
-            if self._measure_type != MeasureType.ID:
-                if value is None:
-                    self._column.set_value(row_no, -2147483648)
+                if self._measure_type != MeasureType.ID:
+                    offsets = self._encode_labels(offsets, table)
+                    self._column.set_values(row_no, offsets)
                 else:
-                    index = self._unique_values.index(value)
-                    self._column.set_value(row_no, index)
-            elif self._measure_type is MeasureType.ID:
-                if value is None:
-                    self._column.set_value(row_no, '')
-                else:
-                    self._column.set_value(row_no, str(value))
+                    self._column.set_values(row_no, offsets, table)
 
-        else:
-            self._column.clear_at(row_no)
+                row_no += len(offsets)
+
+        self._values = None
+        self._raws = None
+
+    def _encode_labels(self, offsets, table):
+
+        # converts a block of offsets into its string table to the values
+        # of the column's levels
+
+        labels = table.split(b'\0')[:-1]
+        starts = np.cumsum([ 0 ] + [ len(label) + 1 for label in labels[:-1] ])
+        codes = self._column.encode_labels([ label.decode('utf-8') for label in labels ])
+
+        offsets = np.frombuffer(offsets, dtype=np.int32)
+        present = offsets != -2147483648
+        values = np.full(len(offsets), -2147483648, dtype=np.int32)
+        values[present] = np.asarray(codes, dtype=np.int32)[np.searchsorted(starts, offsets[present])]
+        return values
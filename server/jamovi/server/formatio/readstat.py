@@ -2,7 +2,8 @@
 from collections import OrderedDict
 from numbers import Number
 from datetime import date
-import math
+
+import numpy as np
 
 from jamovi.core import ColumnType
 from jamovi.core import DataType
@@ -13,6 +14,8 @@ from jamovi.readstat import Error as ReadStatError
 from jamovi.readstat import Writer
 from jamovi.readstat import Measure
 
+from .reader import to_string_table
+
 
 def get_readers():
     return [
@@ -42,6 +45,14 @@ def read(data, path, prog_cb, format):
 
 TIME_START = date(1970, 1, 1)
 
+# values are buffered, and written to the columns BATCH_CELLS (or so) at
+# a time (see Parser.handle_value())
+BATCH_CELLS = 1048576
+
+NaN = float('nan')
+
+WRITE_BLOCK_ROWS = 65536
+
 
 class Parser(ReadStatParser):
 
@@ -57,11 +68,17 @@ class Parser(ReadStatParser):
         self._metadata = None
         self._labels = [ ]
 
+        self._buffers = [ ]
+        self._batch_start = 0
+        self._batch_rows = 0
+
     def parse(self, path, format):
         try:
             super().parse(path, format)
+            self._flush()
         except ReadStatError as e:
             if e.errno == 9:  # not expected no. of rows
+                self._flush()
                 self._data.set_row_count(self._max_row_index + 1)
             else:
                 raise e
@@ -99,6 +116,7 @@ class Parser(ReadStatParser):
         label = variable.label
 
         column = self._data.append_column(name, name)
+        self._buffers.append([ ])
         if label is not None:
             column.description = label
 
@@ -252,68 +270,123 @@ class Parser(ReadStatParser):
 
     def handle_value(self, var_index, row_index, value):
 
-        if row_index >= self._data.row_count:
-            self._data.set_row_count(row_index + 1)
-        else:
-            if var_index == 0 and row_index % 100 == 0:
+        # this is called for every cell, so it only buffers the value. the
+        # buffered rows are written to the columns a batch at a time (see
+        # _flush())
+
+        if var_index == 0:
+            if row_index < self._data.row_count and row_index % 100 == 0:
                 self._prog_cb(row_index / self._data.row_count)
+            if self._batch_rows == 0:
+                self._batch_rows = max(1, BATCH_CELLS // len(self._buffers))
+            if row_index - self._batch_start >= self._batch_rows:
+                self._flush()
 
         self._max_row_index = max(self._max_row_index, row_index)
 
-        vt = type(value)
+        buffer = self._buffers[var_index]
+        offset = row_index - self._batch_start
+
+        if offset == len(buffer):
+            buffer.append(value)
+        elif offset > len(buffer):
+            buffer.extend([ None ] * (offset - len(buffer)))
+            buffer.append(value)
+        else:
+            buffer[offset] = value
+
+    def _flush(self):
+
+        n_rows = max(map(len, self._buffers), default=0)
+        if n_rows == 0:
+            return
+
+        row_start = self._batch_start
+        row_end = row_start + n_rows
 
-        column = self._data[var_index]
+        if row_end > self._data.row_count:
+            self._data.set_row_count(row_end)
+
+        for var_index, values in enumerate(self._buffers):
+            if len(values) < n_rows:
+                values.extend([ None ] * (n_rows - len(values)))
+            self._set_values(self._data[var_index], row_start, values)
+            self._buffers[var_index] = [ ]
+
+        self._batch_start = row_end
+
+    def _set_values(self, column, row_start, values):
+
+        # writes a batch of values to a column, converting them as
+        # appropriate. values which don't fit the column change its type
+        # (as they would one at a time), and the batch is written again
 
         if column.data_type is DataType.TEXT:
-            if value is not None:
-                if vt is not str:
-                    value = str(value)
-                if column.has_levels:
-                    if not column.has_level(value):
-                        column.append_level(
-                            column.level_count,
-                            value,
-                            value)
+            values = list(map(
+                lambda v: '' if v is None else v if type(v) is str else str(v),
+                values))
+            if column.has_levels:
+                for value in dict.fromkeys(values):
+                    if value == '' or column.has_level(value):
+                        continue
+                    column.append_level(column.level_count, value, value)
                     if column.level_count > 50:
                         column.change(measure_type=MeasureType.ID)
-                column.set_value(row_index, value)
+                        break
+            if column.measure_type is MeasureType.ID:
+                offsets, table = to_string_table(values)
+                column.set_values(row_start, offsets, table)
             else:
-                column.set_value(row_index, '')
+                column.set_values(row_start, column.encode_labels(values))
+
         elif (column.measure_type is MeasureType.NOMINAL
                 or column.measure_type is MeasureType.ORDINAL):
-            if isinstance(value, Number):
-                if not math.isclose(float(value) % 1.0, 0.0):
-                    column.change(data_type=DataType.DECIMAL)
-                    self.handle_value(var_index, row_index, value)
-                    return
-
-                try:
-                    value = int(value)
-                    if value.bit_length() > 32:
-                        raise Exception()
-                except Exception:
-                    column.change(
-                        data_type=DataType.DECIMAL,
-                        measure_type=MeasureType.CONTINUOUS)
-                column.set_value(row_index, value)
-            elif vt is date:
-                delta = value - TIME_START
-                ul_value = delta.days
-                if not column.has_level(ul_value):
-                    column.insert_level(ul_value, value.isoformat(), str(ul_value))
-                column.set_value(row_index, ul_value)
-            else:
-                column.set_value(row_index, -2147483648)
+            is_number = np.fromiter(
+                map(lambda v: isinstance(v, Number), values),
+                dtype=bool,
+                count=len(values))
+            numbers = np.fromiter(
+                map(lambda v: float(v) if isinstance(v, Number) else NaN, values),
+                dtype=np.float64,
+                count=len(values))
+
+            if np.any(is_number & ~(np.mod(numbers, 1.0) == 0)):
+                column.change(data_type=DataType.DECIMAL)
+                self._set_values(column, row_start, values)
+                return
+
+            if np.any(is_number & (np.abs(numbers) >= 2 ** 32)):
+                column.change(
+                    data_type=DataType.DECIMAL,
+                    measure_type=MeasureType.CONTINUOUS)
+                self._set_values(column, row_start, values)
+                return
+
+            ints = np.full(len(values), -2147483648, dtype=np.int32)
+            ints[is_number] = numbers[is_number].astype(np.int64)
+
+            for index, value in enumerate(values):
+                if type(value) is date:
+                    ul_value = (value - TIME_START).days
+                    if not column.has_level(ul_value):
+                        column.insert_level(ul_value, value.isoformat(), str(ul_value))
+                    ints[index] = ul_value
+
+            column.set_values(row_start, ints)
+
         elif column.data_type is DataType.DECIMAL:
-            if isinstance(value, Number):
-                column.set_value(row_index, float(value))
-            else:
-                column.set_value(row_index, float('nan'))
+            numbers = np.fromiter(
+                map(lambda v: float(v) if isinstance(v, Number) else NaN, values),
+                dtype=np.float64,
+                count=len(values))
+            column.set_values(row_start, numbers)
+
         elif column.data_type is DataType.INTEGER:
-            if isinstance(value, Number):
-                column.set_value(row_index, int(value))
-            else:
-                column.set_value(row_index, -2147483648)
+            ints = np.fromiter(
+                map(lambda v: int(v) if isinstance(v, Number) else -2147483648, values),
+                dtype=np.int32,
+                count=len(values))
+            column.set_values(row_start, ints)
 
 
 def write(data, path, prog_cb, format):
@@ -341,7 +414,7 @@ def write(data, path, prog_cb, format):
                 for level in column.levels:
                     storage_width = max(storage_width, len(level[1].encode('utf-8')))
             else:
-                for value in column:
+                for value in column.cells(0, data.row_count):
                     storage_width = max(storage_width, len(value.encode('utf-8')))
         elif column.data_type is DataType.DECIMAL:
             data_type = float
@@ -375,11 +448,20 @@ def write(data, path, prog_cb, format):
                 levels = map(lambda x: (x[2], x[1]), column.levels)
             writer.add_value_labels(var, data_type, levels)
 
-    writer.set_row_count(data.row_count)
-
-    for row_no in range(data.row_count):
-        for col_no in range(data.column_count):
-            value = data[col_no][row_no]
-            writer.insert_value(row_no, col_no, value)
+    row_count = data.row_count
+    column_count = data.column_count
+
+    writer.set_row_count(row_count)
+
+    # the values are read WRITE_BLOCK_ROWS rows of each column at a time,
+    # rather than a cell at a time, and then written a row at a time, as
+    # readstat writes its rows in order
+    for row_start in range(0, row_count, WRITE_BLOCK_ROWS):
+        row_end = min(row_start + WRITE_BLOCK_ROWS, row_count)
+        blocks = [ data[col_no].cells(row_start, row_end) for col_no in range(column_count) ]
+        for offset, row_no in enumerate(range(row_start, row_end)):
+            for col_no in range(column_count):
+                writer.insert_value(row_no, col_no, blocks[col_no][offset])
+        prog_cb(row_end / row_count)
 
     writer.close()
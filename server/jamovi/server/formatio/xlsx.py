@@ -1,5 +1,18 @@
 
-from openpyxl import load_workbook
+from zipfile import ZipFile
+from zipfile import BadZipFile
+from xml.etree.ElementTree import iterparse
+from xml.etree.ElementTree import ParseError
+import posixpath
+import re
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS
+from openpyxl.styles.numbers import is_date_format
+from openpyxl.styles.numbers import is_timedelta_format
+from openpyxl.utils.datetime import from_excel
+from openpyxl.utils.datetime import from_ISO8601
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+from openpyxl.utils.datetime import WINDOWS_EPOCH
 
 from .reader import Reader
 from .exceptions import FileCorruptError
@@ -7,6 +20,11 @@ from .exceptions import FileCorruptError
 from datetime import datetime
 
 
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+cell_ref_pattern = re.compile(r'^\$?([A-Za-z]+)\$?([0-9]+)$')
+
+
 def get_readers():
     return [ ( 'xlsx', read ) ]
 
@@ -29,76 +47,337 @@ def to_string(value):
         return str(value)
 
 
+def parse_ref(ref):
+    # returns the (zero based) row and column of a cell reference like 'B3'
+    match = cell_ref_pattern.match(ref)
+    if match is None:
+        raise FileCorruptError
+    letters, digits = match.groups()
+    col_no = 0
+    for letter in letters.upper():
+        col_no = col_no * 26 + ord(letter) - 64
+    return int(digits) - 1, col_no - 1
+
+
+def local_name(tag):
+    return tag[tag.rfind('}') + 1:]
+
+
 class XLSXReader(Reader):
 
+    # the sheet's XML is streamed once, with iterparse(), rather than
+    # through openpyxl. the shared strings and the date formats are read
+    # up front, and each row is converted to strings as it's read, in the
+    # same way openpyxl would read them (see to_string()). as with
+    # openpyxl, the active sheet is the one read
+
     def __init__(self):
         Reader.__init__(self)
-        self._ws = None
-        self._ws_iter = None
-        self._row_no = 0
+        self._zip = None
+        self._sheet_path = None
+        self._stream = None
+        self._strings = [ ]
+        self._date_styles = [ ]
+        self._epoch = WINDOWS_EPOCH
 
     def open(self, path):
-        wb = load_workbook(filename=path, read_only=True, data_only=True)
-        self._ws = wb.active
+        try:
+            self._zip = ZipFile(path)
+            workbook_path = self._find_workbook()
+            rels = self._read_rels(workbook_path)
+            self._read_workbook(workbook_path, rels)
+            if 'sharedStrings' in rels:
+                self._read_strings(rels['sharedStrings'])
+            if 'styles' in rels:
+                self._read_styles(rels['styles'])
+            self.set_total(max(1, self._zip.getinfo(self._sheet_path).file_size))
+        except (BadZipFile, KeyError, ParseError, ValueError):
+            self.close()
+            raise FileCorruptError
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def progress(self):
+        if self._stream is None:
+            return 0
+        return self._stream.tell()
+
+    def _find_workbook(self):
+        for rel in self._iter_rels('_rels/.rels'):
+            if rel.get('Type', '').endswith('/officeDocument'):
+                return rel.get('Target').lstrip('/')
+        raise FileCorruptError
+
+    def _iter_rels(self, rels_path):
+        with self._zip.open(rels_path) as stream:
+            for _, elem in iterparse(stream):
+                if local_name(elem.tag) == 'Relationship':
+                    yield elem
 
-        if self._ws is None:
+    def _read_rels(self, part_path):
+        # returns the targets of a part's relationships, by Id, and by the
+        # last part of their type (i.e. 'sharedStrings')
+
+        base = posixpath.dirname(part_path)
+        rels_path = posixpath.join(base, '_rels', posixpath.basename(part_path) + '.rels')
+
+        rels = { }
+        if rels_path not in self._zip.namelist():
+            return rels
+
+        for rel in self._iter_rels(rels_path):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(base, target))
+            rels[rel.get('Id')] = target
+            rels[rel.get('Type', '').rsplit('/', 1)[-1]] = target
+        return rels
+
+    def _read_workbook(self, workbook_path, rels):
+
+        sheets = [ ]
+        active = 0
+
+        with self._zip.open(workbook_path) as stream:
+            for _, elem in iterparse(stream):
+                name = local_name(elem.tag)
+                if name == 'sheet':
+                    sheets.append((elem.get('name'), elem.get(REL_NS + 'id')))
+                elif name == 'workbookView':
+                    active = int(elem.get('activeTab', 0))
+                elif name == 'workbookPr':
+                    if elem.get('date1904') in ('1', 'true'):
+                        self._epoch = CALENDAR_MAC_1904
+
+        if len(sheets) == 0:
             raise FileCorruptError
 
-        self.set_total(self._ws.max_row - self._ws.min_row + 1)
+        index = active if active < len(sheets) else 0
+        self._sheet_path = rels[sheets[index][1]]
 
-        if 1 == self._ws.min_row == self._ws.min_column == self._ws.max_row == self._ws.max_column:
+    def _read_strings(self, strings_path):
 
-            # qualtrics doesn't set these values correctly,
-            # so we have to determine them.
+        # resolves the shared strings table into a list once. the text of
+        # a rich string is the text of its runs (less any phonetic runs)
 
-            self._first_col = 0
-            self._last_col = 0
-            self._first_row = 0
-            self._last_row = 0
+        strings = [ ]
 
-            values = self._ws.iter_rows(
-                min_row=1,
-                min_col=1,
-                max_row=1048576,  # apparently openpyxl only reads as many rows as there are
-                max_col=1000,
-                values_only=True)
+        with self._zip.open(strings_path) as stream:
+            for _, elem in iterparse(stream):
+                if local_name(elem.tag) != 'si':
+                    continue
+                parts = [ ]
+                for child in elem:
+                    name = local_name(child.tag)
+                    if name == 't':
+                        parts.append(child.text or '')
+                    elif name == 'r':
+                        for t in child:
+                            if local_name(t.tag) == 't':
+                                parts.append(t.text or '')
+                strings.append(''.join(parts))
+                elem.clear()
 
-            for row_no, row in enumerate(values):
-                for col_no, value in enumerate(row):
-                    if value is not None:
-                        self._first_col = min(col_no, self._first_col)
-                        self._last_col = max(col_no, self._last_col)
-                        self._first_row = min(row_no, self._first_row)
-                        self._last_row = row_no
+        self._strings = strings
 
-        else:
-            self._first_row = self._ws.min_row - 1
-            self._first_col = self._ws.min_column - 1
-            self._last_row = self._ws.max_row - 1
-            self._last_col = self._ws.max_column - 1
+    def _read_styles(self, styles_path):
 
-        self._row_count = self._last_row - self._first_row + 1
-        self._col_count = self._last_col - self._first_col + 1
+        # determines for each cell style whether its values are dates
+        # ('date'), durations ('timedelta') or neither (None)
 
-    def close(self):
-        self._ws = None
-        self._ws_iter = None
+        formats = dict(BUILTIN_FORMATS)
+        xf_formats = [ ]
+        in_cell_xfs = False
 
-    def progress(self):
-        return self._row_no
+        with self._zip.open(styles_path) as stream:
+            for event, elem in iterparse(stream, events=('start', 'end')):
+                name = local_name(elem.tag)
+                if name == 'cellXfs':
+                    in_cell_xfs = (event == 'start')
+                elif event == 'end' and name == 'numFmt':
+                    formats[int(elem.get('numFmtId'))] = elem.get('formatCode')
+                elif event == 'end' and name == 'xf' and in_cell_xfs:
+                    xf_formats.append(int(elem.get('numFmtId', 0)))
+
+        date_styles = [ ]
+        for format_id in xf_formats:
+            format_code = formats.get(format_id)
+            if format_code is None or not is_date_format(format_code):
+                date_styles.append(None)
+            elif is_timedelta_format(format_code):
+                date_styles.append('timedelta')
+            else:
+                date_styles.append('date')
+
+        self._date_styles = date_styles
+
+    def _bounds(self):
+
+        # reads the sheet's dimension, which precedes its data. returns
+        # the first row and column, and the last row and column (or None
+        # for these, where the dimension can't be relied on)
+
+        with self._zip.open(self._sheet_path) as stream:
+            for _, elem in iterparse(stream, events=('start',)):
+                name = local_name(elem.tag)
+                if name == 'dimension':
+                    ref = elem.get('ref', 'A1').split(':')
+                    first_row, first_col = parse_ref(ref[0])
+                    last_row, last_col = parse_ref(ref[-1])
+                    if first_row == first_col == last_row == last_col == 0:
+                        # qualtrics doesn't set these values correctly,
+                        # so we have to determine them as we go.
+                        break
+                    return first_row, first_col, last_row, last_col
+                elif name == 'sheetData':
+                    break
+
+        return 0, 0, None, None
 
     def __iter__(self):
-        self._row_no = 0
-        self._ws_iter = self._ws.iter_rows(
-            min_row=self._first_row + 1,
-            min_col=self._first_col + 1,
-            max_row=self._last_row + 1,
-            max_col=self._last_col + 1,
-            values_only=True).__iter__()
-        return self
-
-    def __next__(self):
-        self._row_no += 1
-        values = self._ws_iter.__next__()
-        values = list(map(to_string, values))
-        return values
+        return self._rows()
+
+    def _rows(self):
+
+        # yields the rows (from the first row to the last, including any
+        # empty rows in between) as lists of strings. where the dimension
+        # isn't known, the rows are as long as their last value, and
+        # trailing empty rows are dropped
+
+        first_row, first_col, last_row, last_col = self._bounds()
+
+        if last_col is not None:
+            width = last_col - first_col + 1
+        else:
+            width = None
+
+        strings = self._strings
+        date_styles = self._date_styles
+        n_date_styles = len(date_styles)
+
+        next_row_no = first_row
+        n_pending = 0  # empty rows not yet yielded
+
+        self._stream = self._zip.open(self._sheet_path)
+        sheet_data = None
+        row_no = first_row - 1
+
+        for event, elem in iterparse(self._stream, events=('start', 'end')):
+
+            name = local_name(elem.tag)
+
+            if event == 'start':
+                if name == 'sheetData':
+                    sheet_data = elem
+                continue
+
+            if name != 'row':
+                continue
+
+            ref = elem.get('r')
+            row_no = int(ref) - 1 if ref is not None else row_no + 1
+
+            if row_no < first_row or (last_row is not None and row_no > last_row):
+                elem.clear()
+                continue
+
+            if width is not None:
+                values = [ '' ] * width
+            else:
+                values = [ ]
+
+            col_no = first_col - 1
+            for cell in elem:
+                ref = cell.get('r')
+                if ref is not None:
+                    col_no = parse_ref(ref)[1]
+                else:
+                    col_no += 1
+
+                index = col_no - first_col
+                if index < 0 or (width is not None and index >= width):
+                    continue
+
+                value = self._cell_value(cell, strings, date_styles, n_date_styles)
+                if value == '':
+                    continue
+
+                if width is None and index >= len(values):
+                    values.extend([ '' ] * (index - len(values) + 1))
+                values[index] = value
+
+            if sheet_data is not None:
+                sheet_data.clear()
+            else:
+                elem.clear()
+
+            if width is None and len(values) == 0:
+                n_pending += row_no - next_row_no + 1
+                next_row_no = row_no + 1
+                continue
+
+            n_pending += row_no - next_row_no
+            next_row_no = row_no + 1
+
+            for _ in range(n_pending):
+                yield [ '' ] * width if width is not None else [ ]
+            n_pending = 0
+
+            yield values
+
+        if last_row is not None:
+            n_pending += last_row - next_row_no + 1
+            for _ in range(n_pending):
+                yield [ '' ] * width
+
+    def _cell_value(self, cell, strings, date_styles, n_date_styles):
+
+        # returns the cell's value as a string, as to_string() would for
+        # the value openpyxl reads
+
+        cell_type = cell.get('t', 'n')
+        text = None
+
+        for child in cell:
+            name = local_name(child.tag)
+            if name == 'v':
+                text = child.text
+            elif name == 'is' and cell_type == 'inlineStr':
+                parts = [ ]
+                for node in child.iter():
+                    if local_name(node.tag) == 't':
+                        parts.append(node.text or '')
+                return ''.join(parts)
+
+        if text is None:
+            return ''
+
+        if cell_type == 'n':
+            if '.' in text or 'E' in text or 'e' in text:
+                value = float(text)
+            else:
+                value = int(text)
+            style = int(cell.get('s', 0))
+            if style < n_date_styles and date_styles[style] is not None:
+                value = from_excel(
+                    value,
+                    self._epoch,
+                    timedelta=(date_styles[style] == 'timedelta'))
+            return to_string(value)
+        elif cell_type == 's':
+            return strings[int(text)]
+        elif cell_type == 'b':
+            return str(bool(int(text)))
+        elif cell_type == 'd':
+            return to_string(from_ISO8601(text))
+        else:
+            # 'str' (formula results) and 'e' (errors)
+            return text
@@ -21,6 +21,7 @@ from .utils import ssl_context
 from .utils.stream import ProgressStream
 from .modules import Modules
 from .instancemodel import InstanceModel
+from .column import Column
 from . import formatio
 from .modtracker import ModTracker
 from .permissions import Permissions
@@ -640,7 +641,8 @@ class Instance:
                     coms.send, None, self._instance_id, request,
                     complete=False, progress=(1000 * p, 1000)))
 
-        await ioloop.run_in_executor(None, formatio.write, self._data, path, prog_cb, content)
+        self._data.read_deferred()
+        await ioloop.run_in_executor(None, formatio.write, self._data, path, prog_cb, content, request.compression)
 
         if not is_export:
             title = os.path.basename(path)
@@ -787,6 +789,9 @@ class Instance:
 
                 stream.set_result(result)
 
+                if self._data.has_deferred_reads:
+                    create_task(self._read_deferred())
+
                 if self._data.analyses.count() == 0 or self._data.analyses._analyses[0].name != 'empty':
                     annotation = self._data.analyses.create_annotation(0)
                     annotation.results.index = 1
@@ -952,6 +957,9 @@ class Instance:
 
             self._coms.send(response, self._instance_id, request)
 
+            if self._data.has_deferred_reads:
+                create_task(self._read_deferred())
+
             if path != '' and not is_example:
                 self._add_to_recents(path, self._data.title)
 
@@ -989,6 +997,26 @@ class Instance:
                 except Exception:
                     pass
 
+    async def _read_deferred(self):
+        # reads in the columns not yet read in, a column at a time, so that
+        # the requests which come in meanwhile aren't held up. the columns
+        # those requests need are read in as they need them. the decoding
+        # (i.e. decompressing) of each column happens off the event loop
+        ioloop = asyncio.get_event_loop()
+        while self._data.has_deferred_reads:
+            column_id, decode = self._data.next_deferred()
+            if decode is None:
+                self._data.read_next_deferred()
+            else:
+                try:
+                    decoded = await ioloop.run_in_executor(None, decode)
+                except Exception:
+                    # i.e. the file has changed since. if the column is
+                    # still needed, it's decoded again on this thread
+                    decoded = None
+                self._data.read_decoded(column_id, decoded)
+            await asyncio.sleep(0)
+
     async def _on_import(self, request):
 
         if request.filePath != '':
@@ -1616,8 +1644,7 @@ class Instance:
             column.parse_formula()
         for column in to_calc:
             column.set_needs_recalc()
-        for column in to_calc:
-            column.recalc()
+        self._data.recalc(to_calc)
 
         if filter_inserted:
             # we could do this, but a newly inserted filter is all 'true'
@@ -1740,8 +1767,7 @@ class Instance:
 
         for column in to_recalc:
             column.set_needs_recalc()
-        for column in to_recalc:
-            column.recalc()
+        self._data.recalc(to_recalc)
 
         for column in to_delete:
             changes['deleted_columns'].add(column)
@@ -2159,8 +2185,7 @@ class Instance:
 
         for column in recalc:
             column.set_needs_recalc()
-        for column in recalc:
-            column.recalc()
+        self._data.recalc(recalc)
 
         cols_changed.update(recalc)
 
@@ -2432,7 +2457,8 @@ class Instance:
                 indices_map = list(range(row_start, row_start + row_count))
 
             column.column_type = ColumnType.DATA
-            column.set_needs_recalc()  # invalidate dependent nodes
+            # invalidate dependent nodes (only the rows which have changed)
+            column.set_rows_need_recalc(indices_map)
 
             was_virtual = column.is_virtual
             column_changes = column.changes
@@ -2478,15 +2504,13 @@ class Instance:
                         raise TypeError("Cannot assign non-numeric value to column '{}'", column.name)
 
             elif column.data_type == DataType.TEXT:
+                labels = [ ]
                 for j in range(row_count):
                     value = values[j]
-                    row_no = indices_map[j]
 
                     if value is None or value == '':
-                        column.clear_at(row_no)
-                        continue
-
-                    if isinstance(value, float):
+                        value = None
+                    elif isinstance(value, float):
                         if math.isnan(value):
                             value = ''
                         else:
@@ -2494,18 +2518,28 @@ class Instance:
                     else:
                         value = str(value)
 
-                    if column.measure_type == MeasureType.ID:
-                        column.set_value(row_no, value)
-                    else:
-                        column.clear_at(row_no)  # necessary to clear first with TEXT
-                        if value == '':
-                            index = -2147483648
-                        elif not column.has_level(value):
-                            index = column.level_count
-                            column.insert_level(index, value)
+                    labels.append(value)
+
+                if column.measure_type == MeasureType.ID:
+                    for j in range(row_count):
+                        value = labels[j]
+                        row_no = indices_map[j]
+                        if value is None:
+                            column.clear_at(row_no)
                         else:
-                            index = column.get_value_for_label(value)
-                        column.set_value(row_no, index)
+                            column.set_value(row_no, value)
+                else:
+                    # the rows are cleared before the labels are encoded;
+                    # clearing a row can trim a level, which would leave
+                    # a code computed beforehand pointing at nothing
+                    for j in range(row_count):
+                        column.clear_at(indices_map[j])
+
+                    indices = column.encode_labels(labels)
+
+                    for j in range(row_count):
+                        if labels[j] is not None:
+                            column.set_value(indices_map[j], int(indices[j]))
 
             else:  # elif column.data_type == DataType.INTEGER:
                 for j in range(row_count):
@@ -2582,9 +2616,11 @@ class Instance:
         for column in reparse:
             column.parse_formula()
         for column in recalc:
-            column.set_needs_recalc()
-        for column in recalc:
-            column.recalc()
+            # the dependents have had their changed rows marked above, so
+            # only those rows are recalculated (if possible)
+            if n_rows_changed or column in reparse or not column.needs_recalc:
+                column.set_needs_recalc()
+        self._data.recalc(recalc)
 
         if filter_changed or n_rows_changed:
             changes['filters_changed'] = True
@@ -2674,14 +2710,15 @@ class Instance:
                 base_index = column.index + 1
                 search_index = 0
 
+                cells = self._get_cells(column, indices_map)
+
                 if column.data_type == DataType.DECIMAL:
                     for j in range(row_count):
                         cell = block_pb.values.add()
-                        row_no = indices_map[j]
-                        if row_no >= self._data.row_count:
+                        v = cells[j]
+                        if v is None:
                             cell.o = jcoms.SpecialValues.Value('MISSING')
                         else:
-                            v = column.get_value(row_no, True)
                             if math.isnan(v.value):
                                 cell.o = jcoms.SpecialValues.Value('MISSING')
                             else:
@@ -2691,11 +2728,10 @@ class Instance:
                 elif column.data_type == DataType.TEXT:
                     for j in range(row_count):
                         cell = block_pb.values.add()
-                        row_no = indices_map[j]
-                        if row_no >= self._data.row_count:
+                        v = cells[j]
+                        if v is None:
                             cell.o = jcoms.SpecialValues.Value('MISSING')
                         else:
-                            v = column.get_value(row_no, True)
                             if v.value == '':
                                 cell.o = jcoms.SpecialValues.Value('MISSING')
                             else:
@@ -2705,11 +2741,10 @@ class Instance:
                 else:
                     for j in range(row_count):
                         cell = block_pb.values.add()
-                        row_no = indices_map[j]
-                        if row_no >= self._data.row_count:
+                        v = cells[j]
+                        if v is None:
                             cell.o = jcoms.SpecialValues.Value('MISSING')
                         else:
-                            v = column.get_value(row_no, True)
                             if v.value == -2147483648:
                                 cell.o = jcoms.SpecialValues.Value('MISSING')
                             else:
@@ -2717,6 +2752,27 @@ class Instance:
                             if v.missing:
                                 cell.missing = True
 
+    def _get_cells(self, column, indices_map):
+        # where the rows are contiguous, the values are read from the
+        # data set a block at a time, rather than a cell at a time.
+        # rows beyond the end of the data set are None
+        row_count = self._data.row_count
+
+        if (self._data.ex_filtered
+                or column.data_type is DataType.TEXT
+                or column.missing_values
+                or len(indices_map) == 0):
+            return [
+                column.get_value(row_no, True) if row_no < row_count else None
+                for row_no in indices_map ]
+
+        row_start = indices_map[0]
+        row_end = max(row_start, min(row_start + len(indices_map), row_count))
+        values = column.gather(row_start, row_end).tolist()
+        cells = [ Column.Cell(value, False) for value in values ]
+        cells.extend([ None ] * (len(indices_map) - len(cells)))
+        return cells
+
     def _populate_schema(self, request, response):
         self._populate_schema_info(request, response)
         for column in self._data:
@@ -5,6 +5,7 @@ from .column import Column
 from .analyses import Analyses
 from .utils import NullLog
 from .permissions import Permissions
+from .compute import StatCache
 
 from jamovi.core import ColumnType
 from jamovi.core import DataType
@@ -12,6 +13,8 @@ from jamovi.core import MeasureType
 
 import collections
 
+import numpy as np
+
 
 class InstanceModel:
     N_VIRTUAL_COLS = 5
@@ -38,6 +41,13 @@ class InstanceModel:
 
         self._log = NullLog()
         self._row_tracker = RowTracker()
+        self._stat_cache = StatCache()
+
+        # columns whose values haven't been read in yet
+        # (column id -> (read, set_level_counts, decode)), and what's released once
+        # they have been (see release_when_read())
+        self._deferred_reads = collections.OrderedDict()
+        self._deferred_releases = [ ]
 
         self.integration = None
 
@@ -53,6 +63,10 @@ class InstanceModel:
     def row_tracker(self):
         return self._row_tracker
 
+    @property
+    def stat_cache(self):
+        return self._stat_cache
+
     @property
     def total_edited_cell_count(self):
         count = 0
@@ -267,16 +281,100 @@ class InstanceModel:
             raise PermissionError('This session is limited to {} columns'.format(
                 self._perms.dataset.maxColumns))
 
+    def defer_read(self, column_id, read, set_level_counts=None, decode=None):
+        # read() fills in the column's values, and is called the first time
+        # the column's values are needed (or sooner, by read_next_deferred()).
+        # set_level_counts() sets the column's level counts (i.e. from the
+        # file) until then. decode(), where given, is the part of the read
+        # which doesn't touch the data set (i.e. decompressing the values),
+        # and can be called from another thread (see next_deferred()). its
+        # result is passed to read()
+        self._deferred_reads[column_id] = (read, set_level_counts, decode)
+        if set_level_counts is not None:
+            set_level_counts()
+
+    def release_when_read(self, release):
+        # release() is called once the deferred reads are all done with
+        # (read in, or discarded), i.e. to close the file they read from
+        self._deferred_releases.append(release)
+        self._release_deferred()
+
+    @property
+    def has_deferred_reads(self):
+        return len(self._deferred_reads) > 0
+
+    def read_deferred(self, column=None):
+        if column is None:
+            while self._deferred_reads:
+                self.read_next_deferred()
+        else:
+            deferred = self._deferred_reads.pop(column.id, None)
+            if deferred is not None:
+                self._read(deferred)
+
+    def read_next_deferred(self):
+        if self._deferred_reads:
+            column_id, deferred = self._deferred_reads.popitem(last=False)
+            self._read(deferred)
+
+    def next_deferred(self):
+        # returns the id of the next column to be read in, and its decode()
+        # (or None). decode() can be called from another thread, and its
+        # result passed to read_decoded() back on this one
+        column_id, deferred = next(iter(self._deferred_reads.items()))
+        return column_id, deferred[2]
+
+    def read_decoded(self, column_id, decoded):
+        # reads in the column with the result of its decode(), if it hasn't
+        # been read in (or discarded) in the meantime
+        deferred = self._deferred_reads.pop(column_id, None)
+        if deferred is not None:
+            self._read(deferred, decoded)
+
+    def _read(self, deferred, decoded=None):
+        read, set_level_counts, decode = deferred
+        try:
+            if decode is None:
+                read()
+            else:
+                if decoded is None:
+                    decoded = decode()
+                read(decoded)
+        finally:
+            self._release_deferred()
+
+    def _set_deferred_level_counts(self):
+        for read, set_level_counts, decode in self._deferred_reads.values():
+            if set_level_counts is not None:
+                set_level_counts()
+
+    def _discard_deferred(self, column_id=None):
+        if column_id is None:
+            self._deferred_reads.clear()
+        else:
+            self._deferred_reads.pop(column_id, None)
+        self._release_deferred()
+
+    def _release_deferred(self):
+        if len(self._deferred_reads) == 0:
+            releases = self._deferred_releases
+            self._deferred_releases = [ ]
+            for release in releases:
+                release()
+
     def set_row_count(self, count):
         self._check_perms(row_count=count)
+        self.read_deferred()
         self._dataset.set_row_count(count)
 
     def delete_rows(self, start, end):
+        self.read_deferred()
         self._dataset.delete_rows(start, end)
         self._recalc_all()
 
     def insert_rows(self, start, count):
         self._check_perms(row_count=self.row_count + count)
+        self.read_deferred()
         self._dataset.insert_rows(start, start + count - 1)
         self._recalc_all()
 
@@ -350,9 +448,17 @@ class InstanceModel:
                 subfilter_index = 1
 
     def refresh_filter_state(self):
+        # this recounts the levels from the values, so the level counts of
+        # the columns not yet read in are set again after. their counts ex
+        # filtered are then out of date, but aren't used until they're
+        # read in, and counted again
         self._dataset.refresh_filter_state()
+        self._set_deferred_level_counts()
 
     def delete_columns(self, start, end):
+        for column in self._columns[start:end + 1]:
+            self._stat_cache.invalidate(column.id)
+            self._discard_deferred(column.id)
         self._dataset.delete_columns(start, end)
         del self._columns[start:end + 1]
 
@@ -515,6 +621,18 @@ class InstanceModel:
         else:
             return False
 
+    def filtered_rows(self, start, end):
+        # returns a numpy bool array of the filtered state of rows start to end
+        filtered = np.zeros(end - start, dtype=bool)
+        if self.has_filters:
+            end_in_data = max(start, min(end, self._dataset.row_count))
+            rows = range(start, end_in_data)
+            filtered[:end_in_data - start] = np.fromiter(
+                map(self._dataset.is_row_filtered, rows),
+                dtype=bool,
+                count=len(rows))
+        return filtered
+
     @property
     def has_edited_cells(self):
         for column in self._columns:
@@ -549,6 +667,7 @@ class InstanceModel:
     @dataset.setter
     def dataset(self, dataset):
         self._dataset = dataset
+        self._discard_deferred()
 
     def setup(self):
 
@@ -575,7 +694,11 @@ class InstanceModel:
             if column.column_type is not ColumnType.DATA:
                 column.parse_formula()
 
-        self.refresh_filter_state()
+        # the filters are as they were read in, so the level counts of the
+        # columns not yet read in still stand, and are set again after
+        self._dataset.refresh_filter_state()
+        self._set_deferred_level_counts()
+
         self._add_virtual_columns()
 
     def _add_virtual_columns(self):
@@ -788,10 +911,50 @@ class InstanceModel:
     def _recalc_all(self):
         for column in self:
             column.set_needs_recalc()
-        for column in self:
-            column.recalc()
+        self.recalc(self)
         self.refresh_filter_state()
 
+    def recalc(self, columns):
+        # recalculates the columns (and any of their dependencies which
+        # need it), each only once the columns it depends on are up to
+        # date
+
+        pending = set(filter(lambda c: c.needs_recalc, columns))
+
+        dependencies = { }
+        to_resolve = list(pending)
+        while len(to_resolve) > 0:
+            column = to_resolve.pop()
+            deps = set(filter(lambda d: d.needs_recalc, column.dependencies))
+            dependencies[column] = deps
+            for dep in deps:
+                if dep not in pending:
+                    pending.add(dep)
+                    to_resolve.append(dep)
+
+        # filters are recalculated first (and in order) as any column
+        # using a column formula depends on them implicitly
+        filters = filter(lambda c: c.is_filter, pending)
+        for column in sorted(filters, key=lambda c: c.index):
+            column.recalc()
+
+        while True:
+            pending = set(filter(lambda c: c.needs_recalc, pending))
+            if len(pending) == 0:
+                break
+
+            ready = filter(lambda c: len(dependencies[c] & pending) == 0, pending)
+            ready = sorted(ready, key=lambda c: c.index)
+
+            if len(ready) == 0:
+                # shouldn't get here (circular dependencies aren't allowed)
+                for column in sorted(pending, key=lambda c: c.index):
+                    column.recalc()
+                break
+
+            for column in ready:
+                column.recalc()
+
     def _print_column_info(self):
         for column in self:
             if column.has_deps:
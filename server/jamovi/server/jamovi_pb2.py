@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: jamovi.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cjamovi.proto\x12\x0bjamovi.coms\"\'\n\x05\x45rror\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\r\n\x05\x63\x61use\x18\x02 \x01(\t\"\xc4\x01\n\x0b\x43omsMessage\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x12\n\ninstanceId\x18\x02 \x01(\t\x12\x0f\n\x07payload\x18\x03 \x01(\x0c\x12\x13\n\x0bpayloadType\x18\x04 \x01(\t\x12#\n\x06status\x18\x05 \x01(\x0e\x32\x13.jamovi.coms.Status\x12!\n\x05\x65rror\x18\x06 \x01(\x0b\x32\x12.jamovi.coms.Error\x12\x10\n\x08progress\x18\x07 \x01(\x05\x12\x15\n\rprogressTotal\x18\x08 \x01(\x05\"\xe4\x03\n\x0f\x41nalysisRequest\x12\x11\n\tsessionId\x18\x07 \x01(\t\x12\x12\n\ninstanceId\x18\x01 \x01(\t\x12\x12\n\nanalysisId\x18\x02 \x01(\x05\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\n\n\x02ns\x18\x04 \x01(\t\x12\x35\n\x07perform\x18\x05 \x01(\x0e\x32$.jamovi.coms.AnalysisRequest.Perform\x12-\n\x07options\x18\x06 \x01(\x0b\x32\x1c.jamovi.coms.AnalysisOptions\x12\x0f\n\x07\x63hanged\x18\x08 \x03(\t\x12\x10\n\x08revision\x18\t \x01(\x05\x12\x16\n\x0erestartEngines\x18\n \x01(\x08\x12\x12\n\nclearState\x18\x0b \x01(\x08\x12,\n\x06\x61\x64\x64ons\x18\x0c \x03(\x0b\x32\x1c.jamovi.coms.AnalysisRequest\x12\r\n\x05index\x18\x0f \x01(\x05\x12\x0c\n\x04path\x18\x10 \x01(\t\x12\x0c\n\x04part\x18\x11 \x01(\t\x12\x0e\n\x06\x66ormat\x18\x12 \x01(\t\x12\x0f\n\x07\x65nabled\x18\x13 \x01(\x08\"M\n\x07Perform\x12\x08\n\x04INIT\x10\x00\x12\x07\n\x03RUN\x10\x01\x12\n\n\x06RENDER\x10\x04\x12\x08\n\x04SAVE\x10\x05\x12\n\n\x06\x44\x45LETE\x10\x06\x12\r\n\tDUPLICATE\x10\x07\"\xd2\x03\n\x10\x41nalysisResponse\x12\x12\n\ninstanceId\x18\x01 \x01(\t\x12\x12\n\nanalysisId\x18\x02 \x01(\x05\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\n\n\x02ns\x18\x04 \x01(\t\x12-\n\x07options\x18\x06 \x01(\x0b\x32\x1c.jamovi.coms.AnalysisOptions\x12,\n\x07results\x18\x07 \x01(\x0b\x32\x1b.jamovi.coms.ResultsElement\x12+\n\x06status\x18\x08 \x01(\x0e\x32\x1b.jamovi.coms.AnalysisStatus\x12!\n\x05\x65rror\x18\t \x01(\x0b\x32\x12.jamovi.coms.Error\x12\x11\n\tincAsText\x18\n \x01(\x08\x12\x10\n\x08revision\x18\x0b \x01(\x05\x12\x16\n\x0erestartEngines\x18\x0c \x01(\x08\x12\x12\n\nstacktrace\x18\r \x01(\t\x12\x0f\n\x07version\x18\x0e \x01(\r\x12\r\n\x05index\x18\x0f \x01(\x05\x12*\n\nreferences\x18\x10 \x03(\x0b\x32\x16.jamovi.coms.Reference\x12\x11\n\tdependsOn\x18\x11 \x01(\x05\x12\r\n\x05title\x18\x12 \x01(\t\x12\x10\n\x08hasTitle\x18\x13 \x01(\x08\"\xc8\x01\n\tReference\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12%\n\x07\x61uthors\x18\x03 \x01(\x0b\x32\x14.jamovi.coms.Authors\x12\x0c\n\x04year\x18\x04 \x01(\r\x12\r\n\x05title\x18\x05 \x01(\t\x12\x11\n\tpublisher\x18\x06 \x01(\t\x12\x0b\n\x03url\x18\x07 \x01(\t\x12\x0e\n\x06volume\x18\x08 \x01(\t\x12\r\n\x05issue\x18\n \x01(\t\x12\r\n\x05pages\x18\t \x01(\t\x12\r\n\x05year2\x18\x0b \x01(\t\"\x1b\n\x07\x41uthors\x12\x10\n\x08\x63omplete\x18\x08 \x01(\t\"\xc2\x01\n\x0e\x41nalysisOption\x12\x0b\n\x01i\x18\x01 \x01(\x05H\x00\x12\x0b\n\x01\x64\x18\x02 \x01(\x01H\x00\x12\x0b\n\x01s\x18\x03 \x01(\tH\x00\x12.\n\x01o\x18\x04 \x01(\x0e\x32!.jamovi.coms.AnalysisOption.OtherH\x00\x12)\n\x01\x63\x18\x05 \x01(\x0b\x32\x1c.jamovi.coms.AnalysisOptionsH\x00\"&\n\x05Other\x12\t\n\x05\x46\x41LSE\x10\x00\x12\x08\n\x04TRUE\x10\x01\x12\x08\n\x04NONE\x10\x02\x42\x06\n\x04type\"`\n\x0f\x41nalysisOptions\x12,\n\x07options\x18\x01 \x03(\x0b\x32\x1b.jamovi.coms.AnalysisOption\x12\x10\n\x08hasNames\x18\x02 \x01(\x08\x12\r\n\x05names\x18\x03 \x03(\t\"\xda\x01\n\x0bResultsCell\x12\x0b\n\x01i\x18\x01 \x01(\x05H\x00\x12\x0b\n\x01\x64\x18\x02 \x01(\x01H\x00\x12\x0b\n\x01s\x18\x03 \x01(\tH\x00\x12+\n\x01o\x18\x04 \x01(\x0e\x32\x1e.jamovi.coms.ResultsCell.OtherH\x00\x12\x0e\n\x06\x66ormat\x18\x05 \x01(\x05\x12\x11\n\tfootnotes\x18\x06 \x03(\t\x12\x0f\n\x07symbols\x18\x07 \x03(\t\x12\x0f\n\x07sortKey\x18\x08 \x01(\x05\"&\n\x05Other\x12\x0b\n\x07MISSING\x10\x00\x12\x10\n\x0cNOT_A_NUMBER\x10\x01\x42\n\n\x08\x63\x65llType\"\xeb\x01\n\rResultsColumn\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0c\n\x04type\x18\x03 \x01(\t\x12\x0e\n\x06\x66ormat\x18\x04 \x01(\t\x12\x12\n\nsuperTitle\x18\x05 \x01(\t\x12\x14\n\x0c\x63ombineBelow\x18\x06 \x01(\x08\x12\'\n\x05\x63\x65lls\x18\x07 \x03(\x0b\x32\x18.jamovi.coms.ResultsCell\x12\x10\n\x08sortable\x18\r \x01(\x08\x12\x13\n\x0bhasSortKeys\x18\x0e \x01(\x08\x12%\n\x07visible\x18\x0f \x01(\x0e\x32\x14.jamovi.coms.Visible\";\n\x10ResultsTableNote\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x0c\n\x04note\x18\x02 \x01(\t\x12\x0c\n\x04init\x18\x03 \x01(\x08\"(\n\x04Sort\x12\x0e\n\x06sortBy\x18\x01 \x01(\t\x12\x10\n\x08sortDesc\x18\x02 \x01(\x08\"\x89\x02\n\x0cResultsTable\x12+\n\x07\x63olumns\x18\x01 \x03(\x0b\x32\x1a.jamovi.coms.ResultsColumn\x12\x10\n\x08rowNames\x18\x02 \x03(\t\x12\x17\n\x0fswapRowsColumns\x18\x03 \x01(\x08\x12,\n\x05notes\x18\x04 \x03(\x0b\x32\x1d.jamovi.coms.ResultsTableNote\x12\x0e\n\x06\x61sText\x18\x05 \x01(\t\x12\x11\n\trowSelect\x18\x06 \x01(\t\x12\x13\n\x0browSelected\x18\x07 \x01(\x05\x12\x12\n\nsortSelect\x18\x08 \x01(\t\x12\'\n\x0csortSelected\x18\t \x01(\x0b\x32\x11.jamovi.coms.Sort\";\n\x0cResultsImage\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\r\n\x05width\x18\x02 \x01(\x05\x12\x0e\n\x06height\x18\x03 \x01(\x05\"\xfa\x01\n\x0cResultsArray\x12-\n\x08\x65lements\x18\x01 \x03(\x0b\x32\x1b.jamovi.coms.ResultsElement\x12\x34\n\x06layout\x18\x02 \x01(\x0e\x32$.jamovi.coms.ResultsArray.LayoutType\x12\x1c\n\x14hideHeadingOnlyChild\x18\x04 \x01(\x08\x12\x11\n\thasHeader\x18\x08 \x01(\x08\x12+\n\x06header\x18\t \x01(\x0b\x32\x1b.jamovi.coms.ResultsElement\"\'\n\nLayoutType\x12\x08\n\x04\x46LAT\x10\x00\x12\x0f\n\x0bLIST_SELECT\x10\x01\"=\n\x0cResultsGroup\x12-\n\x08\x65lements\x18\x01 \x03(\x0b\x32\x1b.jamovi.coms.ResultsElement\"D\n\x0bResultsHtml\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t\x12\x0f\n\x07scripts\x18\x02 \x03(\t\x12\x13\n\x0bstylesheets\x18\x03 \x03(\t\"\xd2\x01\n\rResultsOutput\x12\x42\n\x08\x64\x61taType\x18\x01 \x01(\x0e\x32\x30.jamovi.coms.DataSetSchema.ColumnSchema.DataType\x12;\n\x0bmeasureType\x18\x02 \x01(\x0e\x32&.jamovi.coms.DataSetSchema.MeasureType\x12*\n\x06levels\x18\x03 \x03(\x0b\x32\x1a.jamovi.coms.VariableLevel\x12\t\n\x01i\x18\x04 \x03(\x05\x12\t\n\x01\x64\x18\x05 \x03(\x01\"M\n\x0eResultsOutputs\x12+\n\x07outputs\x18\x01 \x03(\x0b\x32\x1a.jamovi.coms.ResultsOutput\x12\x0e\n\x06rowNos\x18\x02 \x03(\r\"\x8c\x04\n\x0eResultsElement\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12+\n\x06status\x18\x03 \x01(\x0e\x32\x1b.jamovi.coms.AnalysisStatus\x12!\n\x05\x65rror\x18\x04 \x01(\x0b\x32\x12.jamovi.coms.Error\x12\r\n\x05stale\x18\x05 \x01(\x08\x12*\n\x05table\x18\x06 \x01(\x0b\x32\x19.jamovi.coms.ResultsTableH\x00\x12*\n\x05image\x18\x07 \x01(\x0b\x32\x19.jamovi.coms.ResultsImageH\x00\x12*\n\x05group\x18\x08 \x01(\x0b\x32\x19.jamovi.coms.ResultsGroupH\x00\x12*\n\x05\x61rray\x18\t \x01(\x0b\x32\x19.jamovi.coms.ResultsArrayH\x00\x12\x16\n\x0cpreformatted\x18\n \x01(\tH\x00\x12\x10\n\x06syntax\x18\x0b \x01(\tH\x00\x12(\n\x04html\x18\x0c \x01(\x0b\x32\x18.jamovi.coms.ResultsHtmlH\x00\x12.\n\x07outputs\x18\r \x01(\x0b\x32\x1b.jamovi.coms.ResultsOutputsH\x00\x12\r\n\x05state\x18\x0e \x01(\x0c\x12%\n\x07visible\x18\x0f \x01(\x0e\x32\x14.jamovi.coms.Visible\x12\x0c\n\x04refs\x18\x10 \x03(\tB\x06\n\x04type\"\x11\n\x0fInstanceRequest\"&\n\x10InstanceResponse\x12\x12\n\ninstanceId\x18\x01 \x01(\t\"\x7f\n\x0bOpenRequest\x12\x10\n\x08\x66ilePath\x18\x01 \x01(\t\x12\x11\n\tfilePaths\x18\x02 \x03(\t\x12\'\n\x02op\x18\x03 \x01(\x0e\x32\x1b.jamovi.coms.OpenRequest.Op\"\"\n\x02Op\x12\x08\n\x04OPEN\x10\x00\x12\x12\n\x0eIMPORT_REPLACE\x10\x01\"\x1c\n\x0cOpenProgress\x12\x0c\n\x04path\x18\x03 \x01(\t\"\x9a\x01\n\x0bSaveRequest\x12\x10\n\x08\x66ilePath\x18\x01 \x01(\t\x12\x11\n\toverwrite\x18\x02 \x01(\x08\x12\x0e\n\x06\x65xport\x18\x03 \x01(\x08\x12\x0c\n\x04part\x18\x04 \x01(\t\x12\x0e\n\x06\x66ormat\x18\x05 \x01(\t\x12\x12\n\nincContent\x18\x06 \x01(\x08\x12\x0f\n\x07\x63ontent\x18\x07 \x01(\x0c\x12\x13\n\x0b\x63ompression\x18\x08 \x01(\t\"d\n\x0cSaveProgress\x12\x12\n\nfileExists\x18\x01 \x01(\x08\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0c\n\x04path\x18\x03 \x01(\t\x12\r\n\x05title\x18\x04 \x01(\t\x12\x12\n\nsaveFormat\x18\x05 \x01(\t\"\xe6\x01\n\x07\x46SEntry\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\'\n\x04type\x18\x02 \x01(\x0e\x32\x19.jamovi.coms.FSEntry.Type\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x04 \x01(\t\x12\x11\n\tisExample\x18\x08 \x01(\x08\x12\x0c\n\x04tags\x18\t \x03(\t\x12\x0f\n\x07license\x18\n \x01(\t\x12\x12\n\nlicenseUrl\x18\x0b \x01(\t\";\n\x04Type\x12\x08\n\x04\x46ILE\x10\x00\x12\n\n\x06\x46OLDER\x10\x01\x12\t\n\x05\x44RIVE\x10\x02\x12\x12\n\x0eSPECIAL_FOLDER\x10\x03\"-\n\tFSRequest\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x12\n\nextensions\x18\x02 \x03(\t\"h\n\nFSResponse\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x0e\n\x06osPath\x18\x02 \x01(\t\x12&\n\x08\x63ontents\x18\x03 \x03(\x0b\x32\x14.jamovi.coms.FSEntry\x12\x14\n\x0c\x65rrorMessage\x18\x04 \x01(\t\"Q\n\x0c\x44\x61taSetEntry\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\x10\n\x08location\x18\x03 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x04 \x01(\t\"\x89\x01\n\x0c\x41nalysisMeta\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\n\n\x02ns\x18\x02 \x01(\t\x12\r\n\x05title\x18\x03 \x01(\t\x12\x11\n\tmenuGroup\x18\x04 \x01(\t\x12\x14\n\x0cmenuSubgroup\x18\x05 \x01(\t\x12\x11\n\tmenuTitle\x18\x06 \x01(\t\x12\x14\n\x0cmenuSubtitle\x18\x07 \x01(\t\"\xf8\x01\n\nModuleMeta\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0f\n\x07version\x18\x03 \x01(\r\x12\x13\n\x0b\x64\x65scription\x18\x04 \x01(\t\x12\x0f\n\x07\x61uthors\x18\x05 \x03(\t\x12+\n\x08\x61nalyses\x18\x06 \x03(\x0b\x32\x19.jamovi.coms.AnalysisMeta\x12\x0c\n\x04path\x18\n \x01(\t\x12\x10\n\x08isSystem\x18\x0b \x01(\x08\x12\x0b\n\x03new\x18\x0c \x01(\x08\x12\x15\n\rminAppVersion\x18\r \x01(\r\x12\x0f\n\x07visible\x18\x0e \x01(\x08\x12\x14\n\x0cincompatible\x18\x0f \x01(\x08\"\x84\x01\n\x0cSettingValue\x12\x0c\n\x04name\x18\x01 \x01(\t\x12)\n\tvalueType\x18\x02 \x01(\x0e\x32\x16.jamovi.coms.ValueType\x12\x0b\n\x01i\x18\x03 \x01(\x05H\x00\x12\x0b\n\x01\x64\x18\x04 \x01(\x01H\x00\x12\x0b\n\x01s\x18\x05 \x01(\tH\x00\x12\x0b\n\x01\x62\x18\x06 \x01(\x08H\x00\x42\x07\n\x05value\">\n\x0fSettingsRequest\x12+\n\x08settings\x18\x04 \x03(\x0b\x32\x19.jamovi.coms.SettingValue\"J\n\x0cNotification\x12\n\n\x02id\x18\x01 \x01(\r\x12\x0e\n\x06status\x18\x02 \x01(\r\x12\r\n\x05title\x18\x03 \x01(\t\x12\x0f\n\x07message\x18\x04 \x01(\t\"\xed\x01\n\x10SettingsResponse\x12*\n\x07recents\x18\x01 \x03(\x0b\x32\x19.jamovi.coms.DataSetEntry\x12+\n\x08\x65xamples\x18\x02 \x03(\x0b\x32\x19.jamovi.coms.DataSetEntry\x12(\n\x07modules\x18\x03 \x03(\x0b\x32\x17.jamovi.coms.ModuleMeta\x12+\n\x08settings\x18\x04 \x03(\x0b\x32\x19.jamovi.coms.SettingValue\x12)\n\x06\x63onfig\x18\x05 \x03(\x0b\x32\x19.jamovi.coms.SettingValue\"\x0e\n\x0cStoreRequest\"J\n\rStoreResponse\x12(\n\x07modules\x18\x01 \x03(\x0b\x32\x17.jamovi.coms.ModuleMeta\x12\x0f\n\x07message\x18\x02 \x01(\t\"B\n\rVariableLevel\x12\r\n\x05label\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05\x12\x13\n\x0bimportValue\x18\x03 \x01(\t\"-\n\x0f\x43olumnCellRange\x12\r\n\x05start\x18\x01 \x01(\x05\x12\x0b\n\x03\x65nd\x18\x02 \x01(\x05\"(\n\x08RowRange\x12\r\n\x05index\x18\x01 \x01(\x05\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\"\x90\x01\n\x10\x41nnotationSchema\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x34\n\x06\x61\x63tion\x18\x02 \x01(\x0e\x32$.jamovi.coms.AnnotationSchema.Action\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\t\",\n\x06\x41\x63tion\x12\n\n\x06\x43REATE\x10\x00\x12\n\n\x06UPDATE\x10\x01\x12\n\n\x06REMOVE\x10\x02\"\xc8\x0c\n\rDataSetSchema\x12\x38\n\x07\x63olumns\x18\x01 \x03(\x0b\x32\'.jamovi.coms.DataSetSchema.ColumnSchema\x12\x10\n\x08rowCount\x18\x05 \x01(\r\x12\x13\n\x0b\x63olumnCount\x18\x06 \x01(\r\x12\x11\n\tvRowCount\x18\x07 \x01(\r\x12\x14\n\x0cvColumnCount\x18\x08 \x01(\r\x12\x14\n\x0ctColumnCount\x18\t \x01(\r\x12\x17\n\x0f\x64\x65letedRowCount\x18\x0c \x01(\r\x12\x15\n\raddedRowCount\x18\r \x01(\r\x12\x17\n\x0f\x65\x64itedCellCount\x18\x0e \x01(\r\x12\x1a\n\x12rowCountExFiltered\x18\x0f \x01(\r\x12\x16\n\x0e\x66iltersVisible\x18\x10 \x01(\x08\x12>\n\ntransforms\x18\n \x03(\x0b\x32*.jamovi.coms.DataSetSchema.TransformSchema\x12/\n\x10removedRowRanges\x18\x0b \x03(\x0b\x32\x15.jamovi.coms.RowRange\x1a\xa6\x06\n\x0c\x43olumnSchema\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\r\n\x05index\x18\x03 \x01(\x05\x12>\n\x06\x61\x63tion\x18\x17 \x01(\x0e\x32..jamovi.coms.DataSetSchema.ColumnSchema.Action\x12+\n\ncolumnType\x18\x04 \x01(\x0e\x32\x17.jamovi.coms.ColumnType\x12\x42\n\x08\x64\x61taType\x18\x05 \x01(\x0e\x32\x30.jamovi.coms.DataSetSchema.ColumnSchema.DataType\x12;\n\x0bmeasureType\x18\x06 \x01(\x0e\x32&.jamovi.coms.DataSetSchema.MeasureType\x12\x13\n\x0b\x61utoMeasure\x18\x07 \x01(\x08\x12\r\n\x05width\x18\x08 \x01(\x05\x12\x11\n\thasLevels\x18\t \x01(\x08\x12*\n\x06levels\x18\n \x03(\x0b\x32\x1a.jamovi.coms.VariableLevel\x12\x0b\n\x03\x64ps\x18\x0b \x01(\x05\x12\x12\n\nimportName\x18\x0c \x01(\t\x12\x0f\n\x07\x66ormula\x18\r \x01(\t\x12\x16\n\x0e\x66ormulaMessage\x18\x0e \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x0f \x01(\t\x12\x0e\n\x06hidden\x18\x10 \x01(\x08\x12\x0e\n\x06\x61\x63tive\x18\x11 \x01(\x08\x12\x10\n\x08\x66ilterNo\x18\x12 \x01(\x05\x12\x12\n\ntrimLevels\x18\x13 \x01(\x08\x12\x11\n\ttransform\x18\x14 \x01(\x05\x12\x10\n\x08parentId\x18\x15 \x01(\x05\x12\x36\n\x10\x65\x64itedCellRanges\x18\x16 \x03(\x0b\x32\x1c.jamovi.coms.ColumnCellRange\x12\x13\n\x0b\x64\x61taChanged\x18\x18 \x01(\x08\x12\x15\n\rmissingValues\x18\x19 \x03(\t\",\n\x06\x41\x63tion\x12\n\n\x06MODIFY\x10\x00\x12\n\n\x06REMOVE\x10\x01\x12\n\n\x06INSERT\x10\x02\"@\n\x08\x44\x61taType\x12\x10\n\x0cNO_DATA_TYPE\x10\x00\x12\x0b\n\x07INTEGER\x10\x01\x12\x0b\n\x07\x44\x45\x43IMAL\x10\x02\x12\x08\n\x04TEXT\x10\x03\x1a\xbc\x02\n\x0fTransformSchema\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\x0f\n\x07\x66ormula\x18\x04 \x03(\t\x12\x16\n\x0e\x66ormulaMessage\x18\x05 \x03(\t\x12\x41\n\x06\x61\x63tion\x18\x06 \x01(\x0e\x32\x31.jamovi.coms.DataSetSchema.TransformSchema.Action\x12\x13\n\x0b\x63olourIndex\x18\x07 \x01(\x05\x12;\n\x0bmeasureType\x18\x08 \x01(\x0e\x32&.jamovi.coms.DataSetSchema.MeasureType\x12\x0e\n\x06suffix\x18\t \x01(\t\",\n\x06\x41\x63tion\x12\n\n\x06\x43REATE\x10\x00\x12\n\n\x06UPDATE\x10\x01\x12\n\n\x06REMOVE\x10\x02\"A\n\x0bMeasureType\x12\x08\n\x04NONE\x10\x00\x12\x0b\n\x07NOMINAL\x10\x02\x12\x0b\n\x07ORDINAL\x10\x03\x12\x0e\n\nCONTINUOUS\x10\x04\"\r\n\x0bInfoRequest\"\xfe\x01\n\x0cInfoResponse\x12\x12\n\nhasDataSet\x18\x01 \x01(\x08\x12\r\n\x05title\x18\x02 \x01(\t\x12\x0c\n\x04path\x18\x03 \x01(\t\x12\x12\n\nsaveFormat\x18\x04 \x01(\t\x12\x0e\n\x06\x65\x64ited\x18\x05 \x01(\x08\x12\r\n\x05\x62lank\x18\x06 \x01(\x08\x12*\n\x06schema\x18\x07 \x01(\x0b\x32\x1a.jamovi.coms.DataSetSchema\x12/\n\x08\x61nalyses\x18\t \x03(\x0b\x32\x1d.jamovi.coms.AnalysisResponse\x12\x14\n\x0c\x63hangesCount\x18\n \x01(\r\x12\x17\n\x0f\x63hangesPosition\x18\x0b \x01(\x05\"\xcd\x06\n\tDataSetRR\x12\x1f\n\x02op\x18\x01 \x01(\x0e\x32\x13.jamovi.coms.GetSet\x12\x0f\n\x07incData\x18\x02 \x01(\x08\x12\x11\n\tincSchema\x18\x03 \x01(\x08\x12.\n\x04\x64\x61ta\x18\x04 \x03(\x0b\x32 .jamovi.coms.DataSetRR.DataBlock\x12,\n\x04rows\x18\x05 \x03(\x0b\x32\x1e.jamovi.coms.DataSetRR.RowData\x12*\n\x06schema\x18\x06 \x01(\x0b\x32\x1a.jamovi.coms.DataSetSchema\x12\x14\n\x0c\x63hangesCount\x18\x07 \x01(\r\x12\x17\n\x0f\x63hangesPosition\x18\x08 \x01(\x05\x12\x0e\n\x06noUndo\x18\t \x01(\x08\x12\x16\n\x0e\x66iltersChanged\x18\n \x01(\x08\x1a\xcd\x02\n\tDataBlock\x12\x10\n\x08rowStart\x18\x01 \x01(\r\x12\x10\n\x08rowCount\x18\x02 \x01(\r\x12\x13\n\x0b\x63olumnStart\x18\x03 \x01(\r\x12\x13\n\x0b\x63olumnCount\x18\x04 \x01(\r\x12:\n\x06values\x18\x05 \x03(\x0b\x32*.jamovi.coms.DataSetRR.DataBlock.CellValue\x12\x11\n\tincCBData\x18\x06 \x01(\x08\x12\x0e\n\x06\x63\x62Text\x18\x07 \x01(\t\x12\x0e\n\x06\x63\x62Html\x18\x08 \x01(\t\x12\r\n\x05\x63lear\x18\t \x01(\x08\x1at\n\tCellValue\x12\x0b\n\x01i\x18\x01 \x01(\x05H\x00\x12\x0b\n\x01\x64\x18\x02 \x01(\x01H\x00\x12\x0b\n\x01s\x18\x03 \x01(\tH\x00\x12\'\n\x01o\x18\x04 \x01(\x0e\x32\x1a.jamovi.coms.SpecialValuesH\x00\x12\x0f\n\x07missing\x18\x07 \x01(\x08\x42\x06\n\x04type\x1a\xc9\x01\n\x07RowData\x12\x10\n\x08rowStart\x18\x01 \x01(\r\x12\x10\n\x08rowCount\x18\x02 \x01(\r\x12\x12\n\nfilterData\x18\x03 \x01(\x0c\x12<\n\x06\x61\x63tion\x18\x04 \x01(\x0e\x32,.jamovi.coms.DataSetRR.RowData.RowDataAction\x12\x13\n\x07rowNums\x18\x05 \x03(\x05\x42\x02\x10\x01\"3\n\rRowDataAction\x12\n\n\x06REMOVE\x10\x00\x12\n\n\x06INSERT\x10\x01\x12\n\n\x06MODIFY\x10\x02\"\x9d\x01\n\x08ModuleRR\x12\x34\n\x07\x63ommand\x18\x01 \x01(\x0e\x32#.jamovi.coms.ModuleRR.ModuleCommand\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0c\n\x04path\x18\x03 \x01(\t\"?\n\rModuleCommand\x12\x0b\n\x07INSTALL\x10\x00\x12\r\n\tUNINSTALL\x10\x01\x12\x08\n\x04HIDE\x10\x02\x12\x08\n\x04SHOW\x10\x03\"\x18\n\x05LogRR\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t*2\n\x06Status\x12\x0c\n\x08\x43OMPLETE\x10\x00\x12\x0f\n\x0bIN_PROGRESS\x10\x01\x12\t\n\x05\x45RROR\x10\x02*\x91\x01\n\x0e\x41nalysisStatus\x12\x11\n\rANALYSIS_NONE\x10\x00\x12\x13\n\x0f\x41NALYSIS_INITED\x10\x01\x12\x14\n\x10\x41NALYSIS_RUNNING\x10\x02\x12\x15\n\x11\x41NALYSIS_COMPLETE\x10\x03\x12\x12\n\x0e\x41NALYSIS_ERROR\x10\x04\x12\x16\n\x12\x41NALYSIS_RENDERING\x10\x05*;\n\x07Visible\x12\x0f\n\x0b\x44\x45\x46\x41ULT_YES\x10\x00\x12\x0e\n\nDEFAULT_NO\x10\x01\x12\x07\n\x03YES\x10\x02\x12\x06\n\x02NO\x10\x03*6\n\tValueType\x12\x07\n\x03INT\x10\x00\x12\n\n\x06\x44OUBLE\x10\x01\x12\n\n\x06STRING\x10\x02\x12\x08\n\x04\x42OOL\x10\x03*S\n\nColumnType\x12\x08\n\x04NONE\x10\x00\x12\x08\n\x04\x44\x41TA\x10\x01\x12\x0c\n\x08\x43OMPUTED\x10\x02\x12\x0b\n\x07RECODED\x10\x03\x12\n\n\x06\x46ILTER\x10\x04\x12\n\n\x06OUTPUT\x10\x05*.\n\x06GetSet\x12\x07\n\x03GET\x10\x00\x12\x07\n\x03SET\x10\x01\x12\x08\n\x04UNDO\x10\x02\x12\x08\n\x04REDO\x10\x03*.\n\rSpecialValues\x12\x0b\n\x07MISSING\x10\x00\x12\x10\n\x0cNOT_A_NUMBER\x10\x01\x62\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'jamovi_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _DATASETRR_ROWDATA.fields_by_name['rowNums']._options = None
+  _DATASETRR_ROWDATA.fields_by_name['rowNums']._serialized_options = b'\020\001'
+  _STATUS._serialized_start=9013
+  _STATUS._serialized_end=9063
+  _ANALYSISSTATUS._serialized_start=9066
+  _ANALYSISSTATUS._serialized_end=9211
+  _VISIBLE._serialized_start=9213
+  _VISIBLE._serialized_end=9272
+  _VALUETYPE._serialized_start=9274
+  _VALUETYPE._serialized_end=9328
+  _COLUMNTYPE._serialized_start=9330
+  _COLUMNTYPE._serialized_end=9413
+  _GETSET._serialized_start=9415
+  _GETSET._serialized_end=9461
+  _SPECIALVALUES._serialized_start=9463
+  _SPECIALVALUES._serialized_end=9509
+  _ERROR._serialized_start=29
+  _ERROR._serialized_end=68
+  _COMSMESSAGE._serialized_start=71
+  _COMSMESSAGE._serialized_end=267
+  _ANALYSISREQUEST._serialized_start=270
+  _ANALYSISREQUEST._serialized_end=754
+  _ANALYSISREQUEST_PERFORM._serialized_start=677
+  _ANALYSISREQUEST_PERFORM._serialized_end=754
+  _ANALYSISRESPONSE._serialized_start=757
+  _ANALYSISRESPONSE._serialized_end=1223
+  _REFERENCE._serialized_start=1226
+  _REFERENCE._serialized_end=1426
+  _AUTHORS._serialized_start=1428
+  _AUTHORS._serialized_end=1455
+  _ANALYSISOPTION._serialized_start=1458
+  _ANALYSISOPTION._serialized_end=1652
+  _ANALYSISOPTION_OTHER._serialized_start=1606
+  _ANALYSISOPTION_OTHER._serialized_end=1644
+  _ANALYSISOPTIONS._serialized_start=1654
+  _ANALYSISOPTIONS._serialized_end=1750
+  _RESULTSCELL._serialized_start=1753
+  _RESULTSCELL._serialized_end=1971
+  _RESULTSCELL_OTHER._serialized_start=1921
+  _RESULTSCELL_OTHER._serialized_end=1959
+  _RESULTSCOLUMN._serialized_start=1974
+  _RESULTSCOLUMN._serialized_end=2209
+  _RESULTSTABLENOTE._serialized_start=2211
+  _RESULTSTABLENOTE._serialized_end=2270
+  _SORT._serialized_start=2272
+  _SORT._serialized_end=2312
+  _RESULTSTABLE._serialized_start=2315
+  _RESULTSTABLE._serialized_end=2580
+  _RESULTSIMAGE._serialized_start=2582
+  _RESULTSIMAGE._serialized_end=2641
+  _RESULTSARRAY._serialized_start=2644
+  _RESULTSARRAY._serialized_end=2894
+  _RESULTSARRAY_LAYOUTTYPE._serialized_start=2855
+  _RESULTSARRAY_LAYOUTTYPE._serialized_end=2894
+  _RESULTSGROUP._serialized_start=2896
+  _RESULTSGROUP._serialized_end=2957
+  _RESULTSHTML._serialized_start=2959
+  _RESULTSHTML._serialized_end=3027
+  _RESULTSOUTPUT._serialized_start=3030
+  _RESULTSOUTPUT._serialized_end=3240
+  _RESULTSOUTPUTS._serialized_start=3242
+  _RESULTSOUTPUTS._serialized_end=3319
+  _RESULTSELEMENT._serialized_start=3322
+  _RESULTSELEMENT._serialized_end=3846
+  _INSTANCEREQUEST._serialized_start=3848
+  _INSTANCEREQUEST._serialized_end=3865
+  _INSTANCERESPONSE._serialized_start=3867
+  _INSTANCERESPONSE._serialized_end=3905
+  _OPENREQUEST._serialized_start=3907
+  _OPENREQUEST._serialized_end=4034
+  _OPENREQUEST_OP._serialized_start=4000
+  _OPENREQUEST_OP._serialized_end=4034
+  _OPENPROGRESS._serialized_start=4036
+  _OPENPROGRESS._serialized_end=4064
+  _SAVEREQUEST._serialized_start=4067
+  _SAVEREQUEST._serialized_end=4221
+  _SAVEPROGRESS._serialized_start=4223
+  _SAVEPROGRESS._serialized_end=4323
+  _FSENTRY._serialized_start=4326
+  _FSENTRY._serialized_end=4556
+  _FSENTRY_TYPE._serialized_start=4497
+  _FSENTRY_TYPE._serialized_end=4556
+  _FSREQUEST._serialized_start=4558
+  _FSREQUEST._serialized_end=4603
+  _FSRESPONSE._serialized_start=4605
+  _FSRESPONSE._serialized_end=4709
+  _DATASETENTRY._serialized_start=4711
+  _DATASETENTRY._serialized_end=4792
+  _ANALYSISMETA._serialized_start=4795
+  _ANALYSISMETA._serialized_end=4932
+  _MODULEMETA._serialized_start=4935
+  _MODULEMETA._serialized_end=5183
+  _SETTINGVALUE._serialized_start=5186
+  _SETTINGVALUE._serialized_end=5318
+  _SETTINGSREQUEST._serialized_start=5320
+  _SETTINGSREQUEST._serialized_end=5382
+  _NOTIFICATION._serialized_start=5384
+  _NOTIFICATION._serialized_end=5458
+  _SETTINGSRESPONSE._serialized_start=5461
+  _SETTINGSRESPONSE._serialized_end=5698
+  _STOREREQUEST._serialized_start=5700
+  _STOREREQUEST._serialized_end=5714
+  _STORERESPONSE._serialized_start=5716
+  _STORERESPONSE._serialized_end=5790
+  _VARIABLELEVEL._serialized_start=5792
+  _VARIABLELEVEL._serialized_end=5858
+  _COLUMNCELLRANGE._serialized_start=5860
+  _COLUMNCELLRANGE._serialized_end=5905
+  _ROWRANGE._serialized_start=5907
+  _ROWRANGE._serialized_end=5947
+  _ANNOTATIONSCHEMA._serialized_start=5950
+  _ANNOTATIONSCHEMA._serialized_end=6094
+  _ANNOTATIONSCHEMA_ACTION._serialized_start=6050
+  _ANNOTATIONSCHEMA_ACTION._serialized_end=6094
+  _DATASETSCHEMA._serialized_start=6097
+  _DATASETSCHEMA._serialized_end=7705
+  _DATASETSCHEMA_COLUMNSCHEMA._serialized_start=6513
+  _DATASETSCHEMA_COLUMNSCHEMA._serialized_end=7319
+  _DATASETSCHEMA_COLUMNSCHEMA_ACTION._serialized_start=7209
+  _DATASETSCHEMA_COLUMNSCHEMA_ACTION._serialized_end=7253
+  _DATASETSCHEMA_COLUMNSCHEMA_DATATYPE._serialized_start=7255
+  _DATASETSCHEMA_COLUMNSCHEMA_DATATYPE._serialized_end=7319
+  _DATASETSCHEMA_TRANSFORMSCHEMA._serialized_start=7322
+  _DATASETSCHEMA_TRANSFORMSCHEMA._serialized_end=7638
+  _DATASETSCHEMA_TRANSFORMSCHEMA_ACTION._serialized_start=6050
+  _DATASETSCHEMA_TRANSFORMSCHEMA_ACTION._serialized_end=6094
+  _DATASETSCHEMA_MEASURETYPE._serialized_start=7640
+  _DATASETSCHEMA_MEASURETYPE._serialized_end=7705
+  _INFOREQUEST._serialized_start=7707
+  _INFOREQUEST._serialized_end=7720
+  _INFORESPONSE._serialized_start=7723
+  _INFORESPONSE._serialized_end=7977
+  _DATASETRR._serialized_start=7980
+  _DATASETRR._serialized_end=8825
+  _DATASETRR_DATABLOCK._serialized_start=8288
+  _DATASETRR_DATABLOCK._serialized_end=8621
+  _DATASETRR_DATABLOCK_CELLVALUE._serialized_start=8505
+  _DATASETRR_DATABLOCK_CELLVALUE._serialized_end=8621
+  _DATASETRR_ROWDATA._serialized_start=8624
+  _DATASETRR_ROWDATA._serialized_end=8825
+  _DATASETRR_ROWDATA_ROWDATAACTION._serialized_start=8774
+  _DATASETRR_ROWDATA_ROWDATAACTION._serialized_end=8825
+  _MODULERR._serialized_start=8828
+  _MODULERR._serialized_end=8985
+  _MODULERR_MODULECOMMAND._serialized_start=8922
+  _MODULERR_MODULECOMMAND._serialized_end=8985
+  _LOGRR._serialized_start=8987
+  _LOGRR._serialized_end=9011
+# @@protoc_insertion_point(module_scope)
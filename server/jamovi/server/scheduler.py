@@ -167,6 +167,9 @@ class Scheduler:
     def _to_message(self, analysis, perform, request_pb=None):
 
         if request_pb is None:
+            # the engines read the data straight from the memory map, so
+            # it all needs to be read in
+            analysis.dataset.read_deferred()
             request_pb = AnalysisRequest()
 
         request_pb.sessionId = analysis.instance.session.id
@@ -0,0 +1,154 @@
+
+import unittest
+
+import os
+import os.path
+import tempfile
+from array import array
+
+import numpy as np
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import DataType
+from jamovi.core import MeasureType
+
+
+class TestBlocks(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._mm = MemoryMap.create(os.path.join(self._temp_dir.name, 'buffer'))
+        self._dataset = DataSet.create(self._mm)
+
+    def tearDown(self):
+        self._mm.close()
+        self._temp_dir.cleanup()
+
+    def _append(self, name, data_type, measure_type):
+        column = self._dataset.append_column(name, name)
+        column.change(data_type=data_type, measure_type=measure_type)
+        return column
+
+    def test_block_count(self):
+        integer = self._append('integer', DataType.INTEGER, MeasureType.CONTINUOUS)
+        decimal = self._append('decimal', DataType.DECIMAL, MeasureType.CONTINUOUS)
+        id = self._append('id', DataType.TEXT, MeasureType.ID)
+        self._dataset.set_row_count(5000)
+
+        # a block holds some 8000 ints, but only half as many doubles or
+        # pointers (the cells of ID columns)
+        self.assertEqual(integer.block_count, 1)
+        self.assertEqual(decimal.block_count, 2)
+        self.assertEqual(id.block_count, 2)
+
+
+
+class TestBulkValues(unittest.TestCase):
+
+    # set_values() and get_values() should agree with each other, and
+    # with the values set a cell at a time
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._mm = MemoryMap.create(os.path.join(self._temp_dir.name, 'buffer'))
+        self._dataset = DataSet.create(self._mm)
+
+    def tearDown(self):
+        self._mm.close()
+        self._temp_dir.cleanup()
+
+    def _append(self, name, data_type, measure_type):
+        column = self._dataset.append_column(name, name)
+        column.change(data_type=data_type, measure_type=measure_type)
+        return column
+
+    def test_decimals(self):
+        column = self._append('decimal', DataType.DECIMAL, MeasureType.CONTINUOUS)
+        self._dataset.set_row_count(10000)
+
+        # across the blocks (some 4000 doubles each)
+        values = np.linspace(-1, 1, 9000)
+        values[::7] = np.nan
+        column.set_values(500, values)
+
+        self.assertEqual(column.get_values(500, 9000).tobytes(), values.tobytes())
+        self.assertEqual(column[500 + 15], values[15])
+        self.assertTrue(np.isnan(column[500 + 7]))
+
+        # raw bytes are read as doubles
+        column.set_values(0, np.array([ 1.5, 2.5 ]).tobytes())
+        self.assertEqual(list(column.get_values(0, 2)), [ 1.5, 2.5 ])
+
+    def test_integers(self):
+        column = self._append('integer', DataType.INTEGER, MeasureType.CONTINUOUS)
+        self._dataset.set_row_count(20000)
+
+        values = array('i', range(-9000, 9000))
+        values[3] = -2147483648
+        column.set_values(1000, values)
+
+        self.assertEqual(column.get_values(1000, 18000).tobytes(), values.tobytes())
+        self.assertEqual(column[1003], -2147483648)
+
+        # raw bytes are read as int32s
+        column.set_values(0, array('i', [ 7, 8 ]).tobytes())
+        self.assertEqual(list(column.get_values(0, 2)), [ 7, 8 ])
+
+    def test_integers_with_levels(self):
+        column = self._append('nominal', DataType.INTEGER, MeasureType.NOMINAL)
+        self._dataset.set_row_count(6)
+
+        column.set_values(0, [ 1, 2, 2, 3, -2147483648, 1 ], initing=True)
+        self.assertEqual(list(column.get_values(0, 6)), [ 1, 2, 2, 3, -2147483648, 1 ])
+        self.assertEqual([ level[:2] for level in column.levels ], [ (1, '1'), (2, '2'), (3, '3') ])
+
+        # the counts are kept, so 2 is no longer used
+        column.set_values(1, [ 1, 3 ])
+        column.trim_unused_levels()
+        self.assertEqual([ level[:2] for level in column.levels ], [ (1, '1'), (3, '3') ])
+
+    def test_text_with_levels(self):
+        column = self._append('text', DataType.TEXT, MeasureType.NOMINAL)
+        self._dataset.set_row_count(4)
+        column.append_level(0, 'a')
+        column.append_level(1, 'b')
+        column.append_level(2, 'c')
+
+        column.set_values(0, [ 1, 0, -2147483648, 1 ], initing=True)
+        self.assertEqual(list(column.get_values(0, 4)), [ 1, 0, -2147483648, 1 ])
+        self.assertEqual([ column[i] for i in range(4) ], [ 'b', 'a', '', 'b' ])
+
+        column.set_values(0, [ 0, 0 ])
+        column.trim_unused_levels()
+        self.assertEqual([ level[1] for level in column.levels ], [ 'a', 'b' ])
+
+    def test_ids(self):
+        column = self._append('id', DataType.TEXT, MeasureType.ID)
+        self._dataset.set_row_count(5)
+
+        table = b'first\0second\0\xc3\xa9t\xc3\xa9\0'
+        offsets = [ 0, 6, -2147483648, 6, 13 ]
+        column.set_values(0, offsets, table)
+
+        self.assertEqual([ column[i] for i in range(5) ], [ 'first', 'second', '', 'second', 'été' ])
+
+        offsets, table = column.get_values(1, 4)
+        other = self._append('other', DataType.TEXT, MeasureType.ID)
+        other.set_values(0, offsets, table)
+        self.assertEqual([ other[i] for i in range(4) ], [ 'second', '', 'second', 'été' ])
+
+        with self.assertRaises(ValueError):
+            column.set_values(0, [ 0 ])
+
+    def test_out_of_range(self):
+        column = self._append('integer', DataType.INTEGER, MeasureType.CONTINUOUS)
+        self._dataset.set_row_count(4)
+        with self.assertRaises(IndexError):
+            column.set_values(2, [ 1, 2, 3 ])
+        with self.assertRaises(IndexError):
+            column.set_values(-1, [ 1 ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,464 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import tempfile
+import logging
+import math
+
+import numpy as np
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import ColumnType
+from jamovi.server.instancemodel import InstanceModel
+from jamovi.server.column import Column
+from jamovi.server.formatio import csv
+from jamovi.server.compute import convert
+from jamovi.server.compute import Compiler
+from jamovi.server.compute import functions
+from jamovi.server.compute import arrayfunctions
+from jamovi.server.compute.nodes import Node
+from jamovi.server.compute.nodes import SplitValues
+
+
+CONTENT = '''x,z,d,e,g
+-5,0,0.1,3,a
+7,1,0.2,,b
+,0,,0.7,a
+12,1,1e-17,1,b
+3,,0.3,-0.3,
+-2147483,0,2.5,0.1,a
+'''
+
+
+class ComputeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._mms = [ ]
+
+    def tearDown(self):
+        for mm in self._mms:
+            mm.close()
+        self._temp_dir.cleanup()
+
+    def _compute(self, formula):
+        data = self._create(formula)
+        column = data['computed']
+        values = [ column[i] for i in range(data.row_count) ]
+        levels = [ level[:2] for level in column.levels ] if column.has_levels else [ ]
+        return column.data_type, column.measure_type, values, levels
+
+    def _create(self, formula):
+        data_path = os.path.join(self._temp_path, 'data.csv')
+        with open(data_path, 'w') as file:
+            file.write(CONTENT)
+
+        mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer{}'.format(len(self._mms))))
+        self._mms.append(mm)
+        data = InstanceModel(None)
+        data._log = logging.getLogger(__name__)
+        data.dataset = DataSet.create(mm)
+        csv.read(data, data_path, lambda p: None)
+        data.setup()
+
+        column = data.append_column('computed', 'computed')
+        column.column_type = ColumnType.COMPUTED
+        column.formula = formula
+        data.setup()
+        data._recalc_all()
+        return data
+
+
+class TestArrayEvaluation(ComputeTestCase):
+
+    # the formulas are evaluated as arrays (where possible), and then
+    # again a row at a time, and the results should be the same
+
+    def assertEquivalent(self, formula, uses_arrays=True, rel_tol=None):
+
+        evaluate_array = Column._evaluate_array
+        n_arrays = 0
+
+        def counted(*args, **kwargs):
+            nonlocal n_arrays
+            result = evaluate_array(*args, **kwargs)
+            if result is not None:
+                n_arrays += 1
+            return result
+
+        with mock.patch.object(Column, '_evaluate_array', autospec=True, side_effect=counted):
+            array_result = self._compute(formula)
+
+        with mock.patch.object(Column, '_evaluate_array', return_value=None):
+            row_result = self._compute(formula)
+
+        self.assertEqual(n_arrays > 0, uses_arrays, formula)
+
+        if rel_tol is not None:
+            # the values are compared separately, to the tolerance
+            array_values = array_result[2]
+            row_values = row_result[2]
+            array_result = array_result[:2] + array_result[3:]
+            row_result = row_result[:2] + row_result[3:]
+            self.assertEqual(len(array_values), len(row_values), formula)
+            for array_value, row_value in zip(array_values, row_values):
+                if math.isnan(row_value):
+                    self.assertTrue(math.isnan(array_value), formula)
+                else:
+                    self.assertTrue(math.isclose(array_value, row_value, rel_tol=rel_tol), formula)
+
+        self.assertEqual(str(array_result), str(row_result), formula)
+
+    def test_arithmetic(self):
+        self.assertEquivalent('x + 2')
+        self.assertEquivalent('x * d - e')
+        self.assertEquivalent('-x / 3')
+        self.assertEquivalent('x > 3 and d < 1')
+
+    def test_functions(self):
+        self.assertEquivalent('ABS(x)')
+        self.assertEquivalent('MAX(d, e)')
+        self.assertEquivalent('IF(x > 3, d, e)')
+        self.assertEquivalent('IFMISS(d, 1, 2)')
+        self.assertEquivalent('SQRT(d)')
+        self.assertEquivalent('INT(d * 10)')
+        self.assertEquivalent('NOT(d)')
+        self.assertEquivalent('NOT(x > 3)')
+
+    def test_sums(self):
+        # these don't sum exactly (see TestSums)
+        self.assertEquivalent('MEAN(d, e, 0.1)', rel_tol=1e-12)
+        self.assertEquivalent('MEAN(d, e, min_valid=1)', rel_tol=1e-12)
+        self.assertEquivalent('SUM(d, e, 0.1, min_valid=1)', rel_tol=1e-12)
+        self.assertEquivalent('SUM(d, e, 0.1)', rel_tol=1e-12)
+        self.assertEquivalent('VAR(d, e, 0.1, ignore_missing=1)', rel_tol=1e-12)
+        self.assertEquivalent('STDEV(d, e, 0.1, ignore_missing=1)', rel_tol=1e-12)
+
+    def test_columns_with_levels(self):
+        # the row functions receive the (value, label) of z as-is, so
+        # these are evaluated a row at a time
+        self.assertEquivalent('NOT(z)', uses_arrays=False)
+        self.assertEquivalent('INT(z)', uses_arrays=False)
+        self.assertEquivalent('IF(x > 3, z, 2)', uses_arrays=False)
+        self.assertEquivalent('ABS(z)')
+        self.assertEquivalent('z + 1')
+
+    def test_column_wise(self):
+        self.assertEquivalent('x - VMEAN(d)')
+        self.assertEquivalent('(d - VMEAN(d)) / VSTDEV(d)')
+        self.assertEquivalent('VSUM(d, group_by=z) + e')
+
+    def assertGroupsEquivalent(self, formula):
+        # the groups are calculated as arrays, and then again with the
+        # column function, which the sums agree with to a tolerance
+        calculate_arrays = SplitValues._calculate_arrays
+        n_arrays = 0
+
+        def counted(*args, **kwargs):
+            nonlocal n_arrays
+            result = calculate_arrays(*args, **kwargs)
+            if result:
+                n_arrays += 1
+            return result
+
+        with mock.patch.object(SplitValues, '_calculate_arrays', autospec=True, side_effect=counted):
+            array_result = self._compute(formula)
+        self.assertGreater(n_arrays, 0, formula)
+
+        with mock.patch.object(SplitValues, '_calculate_arrays', return_value=False):
+            function_result = self._compute(formula)
+
+        self.assertEqual(array_result[:2], function_result[:2], formula)
+        for array_value, function_value in zip(array_result[2], function_result[2]):
+            if math.isnan(function_value):
+                self.assertTrue(math.isnan(array_value), formula)
+            else:
+                self.assertTrue(math.isclose(array_value, function_value, rel_tol=1e-12), formula)
+
+    def test_group_by(self):
+        for name in ('VMEAN', 'VSUM', 'VN', 'VROWS', 'VSTDEV', 'VVAR', 'VSE', 'VMIN', 'VMAX', 'VMED', 'Q1', 'Q3'):
+            self.assertGroupsEquivalent('{}(d)'.format(name))
+            self.assertGroupsEquivalent('{}(e, group_by=z)'.format(name))
+            self.assertGroupsEquivalent('{}(d, group_by=g)'.format(name))
+            self.assertGroupsEquivalent('{}(x, group_by=x > 3)'.format(name))
+
+    def test_group_by_values(self):
+        # the row with the missing group value is missing
+        data_type, measure_type, values, levels = self._compute('VMEAN(d, group_by=g)')
+        self.assertEqual(str(values), str([ 1.3, 0.1, 1.3, 0.1, NaN, 1.3 ]))
+
+        data_type, measure_type, values, levels = self._compute('VN(d, group_by=g)')
+        self.assertEqual(values, [ 2, 2, 2, 2, -2147483648, 2 ])
+
+        data_type, measure_type, values, levels = self._compute('VMED(d, group_by=g)')
+        self.assertEqual(str(values), str([ 1.3, 0.1, 1.3, 0.1, NaN, 1.3 ]))
+
+        # z is missing in row 4, where e is -0.3
+        data_type, measure_type, values, levels = self._compute('VMED(e, group_by=z)')
+        self.assertEqual(str(values), str([ 0.7, 1.0, 0.7, 1.0, NaN, 0.7 ]))
+
+        data_type, measure_type, values, levels = self._compute('VN(e, group_by=z)')
+        self.assertEqual(values, [ 3, 1, 3, 1, -2147483648, 3 ])
+
+    def test_overflow(self):
+        # the data set's ints are 32-bit
+        for formula in ('x + 2147483647', 'x * 1000000000'):
+            with self.assertRaises(OverflowError):
+                self._create(formula)
+            with mock.patch.object(Column, '_evaluate_array', return_value=None):
+                with self.assertRaises(OverflowError):
+                    self._create(formula)
+
+    def test_fallback(self):
+        for formula, to_type in (('MAX(d, e) + x', float), ('NOT(z)', int)):
+            data = self._create(formula)
+            node = data['computed']._node
+            row_count = data.row_count
+            values, missing = Node.fvalues_array(node, 0, row_count, row_count, False)
+            expected = [ convert(node.fvalue(i, row_count, False), to_type) for i in range(row_count) ]
+            self.assertEqual(str(values.tolist()), str(expected), formula)
+
+        # INT() raises an exception for each row
+        data = self._create('INT(z)')
+        row_count = data.row_count
+        values, missing = Node.fvalues_array(data['computed']._node, 0, row_count, row_count, False)
+        self.assertTrue(missing.all())
+
+
+class TestCompiler(ComputeTestCase):
+
+    # the compiled formula should give the same values as the nodes'
+    # fvalue(), row by row, and with and without the filters applied
+
+    def assertCompiles(self, formula):
+        data = self._create(formula)
+        node = data['computed']._node
+        compiled = Compiler().visit(node)
+        row_count = data.row_count
+
+        for filt in (False, True):
+            for index in range(row_count):
+                try:
+                    expected = node.fvalue(index, row_count, filt)
+                except Exception as e:
+                    with self.assertRaises(type(e), msg=formula):
+                        compiled(index, row_count, filt)
+                    continue
+                value = compiled(index, row_count, filt)
+                self.assertEqual(
+                    (type(value), str(value)),
+                    (type(expected), str(expected)),
+                    '{} (row {})'.format(formula, index))
+
+    def test_constants(self):
+        self.assertCompiles('3')
+        self.assertCompiles('2.5')
+        self.assertCompiles('"text"')
+
+    def test_unary_ops(self):
+        for formula in ('-x', '-d', '+x', '+g', '-z', 'not x', 'not z', '~d'):
+            self.assertCompiles(formula)
+
+    def test_bool_ops(self):
+        for formula in ('x > 3 and d < 1', 'x and e', 'x > 3 or d < 1', 'z or e', 'd and e or x'):
+            self.assertCompiles(formula)
+
+    def test_bin_ops(self):
+        for op in ('+', '-', '*', '/', '//', '%', '**', '^'):
+            self.assertCompiles('x {} 2'.format(op))
+            self.assertCompiles('d {} e'.format(op))
+            self.assertCompiles('z {} x'.format(op))
+        self.assertCompiles('x / 0')
+        self.assertCompiles('x // z')
+        self.assertCompiles('g + "!"')
+
+    def test_compares(self):
+        for op in ('==', '!=', '<', '<=', '>', '>='):
+            self.assertCompiles('x {} 3'.format(op))
+            self.assertCompiles('d {} e'.format(op))
+        self.assertCompiles('g == "a"')
+        self.assertCompiles('0 < d < 1')
+        self.assertCompiles('z == 1')
+
+    def test_calls(self):
+        self.assertCompiles('ABS(x)')
+        self.assertCompiles('MAX(d, e, x)')
+        self.assertCompiles('IF(x > 3, d, e)')
+        self.assertCompiles('IFMISS(d, 1, 2)')
+        self.assertCompiles('INT(z)')
+        self.assertCompiles('MEAN(d, e, min_valid=1)')
+        self.assertCompiles('SUM(d, e, ignore_missing=1)')
+        self.assertCompiles('OFFSET(x, 2)')
+        self.assertCompiles('OFFSET(d, z)')
+
+    def test_column_wise_calls(self):
+        self.assertCompiles('VMEAN(d)')
+        self.assertCompiles('x - VSUM(e, group_by=g)')
+        self.assertCompiles('ROW()')
+
+
+NaN = float('nan')
+INF = float('inf')
+
+ROWS = [
+    (1.0, 2.0, 3.0),
+    (1.0, NaN, 3.0),
+    (NaN, 2.0, NaN),
+    (NaN, NaN, NaN),
+    (0.1, 0.2, 0.3),
+    (1e9 + 0.1, 1e9 + 0.2, 1e9 + 0.4),
+    (1e308, 1e308, -1e308),
+    (1e308, 1e308, 1e308),
+    (INF, 1.0, 2.0),
+    (INF, -INF, 2.0),
+]
+
+
+class TestSums(unittest.TestCase):
+
+    # the array counterparts of MEAN(), SUM(), etc. don't sum exactly,
+    # as the row functions do, and so are compared to a tolerance
+
+    def assertMatchesRows(self, name, rows, **kwargs):
+        count = len(rows)
+        args = [ ]
+        for column in zip(*rows):
+            values = np.array(column, dtype=np.float64)
+            args.append((values, np.isnan(values)))
+        array_kwargs = { }
+        for kw_name, value in kwargs.items():
+            array_kwargs[kw_name] = (np.full(count, value, dtype=np.int64), np.zeros(count, dtype=bool))
+
+        array_func = getattr(arrayfunctions, name)
+        row_func = getattr(functions, name)
+        values, missing = array_func(np.arange(count), *args, **array_kwargs)
+
+        for i, row in enumerate(rows):
+            try:
+                expected = row_func(i, *row, **kwargs)
+            except Exception:
+                expected = NaN
+            msg = '{}{} {}'.format(name, row, kwargs)
+            if math.isnan(expected):
+                self.assertTrue(missing[i], msg)
+            else:
+                self.assertFalse(missing[i], msg)
+                self.assertTrue(math.isclose(values[i], expected, rel_tol=1e-12), msg)
+
+    def assertAllMatchRows(self, name, **kwargs):
+        self.assertMatchesRows(name, ROWS, **kwargs)
+        rng = np.random.default_rng(0)
+        rows = rng.normal(size=(1000, 5)) * 10.0 ** rng.integers(-3, 9, size=(1000, 5))
+        rows[rng.random((1000, 5)) < 0.2] = NaN
+        self.assertMatchesRows(name, rows.tolist(), **kwargs)
+
+    def test_mean(self):
+        self.assertAllMatchRows('MEAN')
+        self.assertAllMatchRows('MEAN', ignore_missing=1)
+        for min_valid in range(4):
+            self.assertAllMatchRows('MEAN', min_valid=min_valid)
+
+    def test_sum(self):
+        self.assertAllMatchRows('SUM')
+        self.assertAllMatchRows('SUM', ignore_missing=1)
+        for min_valid in range(4):
+            self.assertAllMatchRows('SUM', min_valid=min_valid)
+
+    def test_stdev(self):
+        self.assertAllMatchRows('STDEV')
+        self.assertAllMatchRows('STDEV', ignore_missing=1)
+
+    def test_var(self):
+        self.assertAllMatchRows('VAR')
+        self.assertAllMatchRows('VAR', ignore_missing=1)
+
+    def test_single_argument(self):
+        rows = [ (1.0, ), (NaN, ) ]
+        for name in ('MEAN', 'SUM', 'STDEV', 'VAR'):
+            self.assertMatchesRows(name, rows)
+            self.assertMatchesRows(name, rows, ignore_missing=1)
+
+
+class TestRecalc(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._mm = None
+
+    def tearDown(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._temp_dir.cleanup()
+
+    def _create(self, formulas):
+        data_path = os.path.join(self._temp_path, 'data.csv')
+        with open(data_path, 'w') as file:
+            file.write('x\n0.5\n1\n1.5\n2\n')
+
+        self._mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer'))
+        data = InstanceModel(None)
+        data._log = logging.getLogger(__name__)
+        data.dataset = DataSet.create(self._mm)
+        csv.read(data, data_path, lambda p: None)
+        data.setup()
+
+        for name, formula in formulas:
+            column = data.append_column(name, name)
+            column.column_type = ColumnType.COMPUTED
+            column.formula = formula
+        data.setup()
+        data._recalc_all()
+        return data
+
+    def test_dependencies_are_recalculated_first(self):
+        # a and b are independent branches from x, and c depends on both
+        # (a diamond), but comes before them. e is independent of the rest
+        data = self._create([
+            ('c', 'a + b'),
+            ('a', 'x + 1'),
+            ('b', 'x * 2'),
+            ('d', 'c - VMEAN(a)'),
+            ('e', 'x * 10'),
+        ])
+
+        recalc = Column.recalc
+        order = [ ]
+
+        def recorded(column, *args, **kwargs):
+            if column.needs_recalc:
+                order.append(column.name)
+            return recalc(column, *args, **kwargs)
+
+        with mock.patch.object(Column, 'recalc', autospec=True, side_effect=recorded):
+            data['x'].set_value(0, 4.0)
+            data['x'].set_needs_recalc(0, 1)
+            data.recalc(data)
+
+        # each column once, and after the columns it depends on
+        self.assertEqual(sorted(order), [ 'a', 'b', 'c', 'd', 'e' ])
+        self.assertLess(order.index('a'), order.index('c'))
+        self.assertLess(order.index('b'), order.index('c'))
+        self.assertLess(order.index('c'), order.index('d'))
+        self.assertFalse(any(map(lambda column: column.needs_recalc, data)))
+
+        def values(name):
+            return [ data[name][i] for i in range(data.row_count) ]
+
+        self.assertEqual(values('a'), [ 5.0, 2.0, 2.5, 3.0 ])
+        self.assertEqual(values('b'), [ 8.0, 2.0, 3.0, 4.0 ])
+        self.assertEqual(values('c'), [ 13.0, 4.0, 5.5, 7.0 ])
+        self.assertEqual(values('d'), [ 9.875, 0.875, 2.375, 3.875 ])
+        self.assertEqual(values('e'), [ 40.0, 10.0, 15.0, 20.0 ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,367 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import copy
+import gzip
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import DataType
+from jamovi.core import ColumnType
+from jamovi.core import MeasureType
+from jamovi.server.instancemodel import InstanceModel
+from jamovi.server.formatio import csv
+from jamovi.server.formatio import reader
+
+
+def write_csv(path, n_rows, mode='w'):
+    # an ascii file, with quoted values (some with newlines in them)
+    with open(path, mode, newline='') as file:
+        if mode == 'w':
+            file.write('int,float,text,quoted\n')
+        for i in range(n_rows):
+            file.write('{},{},{},"{}"\n'.format(
+                i % 97,
+                (i % 1013) / 8,
+                'level{}'.format(i % 7),
+                'a, b' if i % 3 else 'line\nbreak'))
+
+
+class CSVTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._data_path = os.path.join(self._temp_path, 'data.csv')
+        self._mms = [ ]
+
+    def tearDown(self):
+        for mm in self._mms:
+            mm.close()
+        self._temp_dir.cleanup()
+
+    def _read(self, reader):
+        mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer{}'.format(len(self._mms))))
+        self._mms.append(mm)
+        data = InstanceModel(None)
+        data.dataset = DataSet.create(mm)
+        reader.read_into(data, self._data_path, lambda p: None)
+        data.setup()
+        return data
+
+    def _values(self, data):
+        return [ (column.data_type, column.measure_type, [ column[i] for i in range(data.row_count) ])
+                 for column in data ]
+
+
+class TestCSVReader(CSVTestCase):
+
+    def setUp(self):
+        super().setUp()
+        write_csv(self._data_path, 2000)
+
+    def test_ascii_file_can_split(self):
+        reader = csv.CSVReader()
+        reader.open(self._data_path)
+        try:
+            self.assertEqual(reader._encoding, 'utf-8-sig')
+            self.assertTrue(reader._can_split())
+        finally:
+            reader.close()
+
+    def test_ascii_file_is_read_in_chunks(self):
+
+        expected = self._values(self._read(csv.CSVReader()))
+
+        with mock.patch.object(csv, 'PARALLEL_THRESHOLD', 1), \
+                mock.patch.object(csv, 'CHUNK_SIZE', 8192), \
+                mock.patch.object(csv, 'ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch.object(csv, 'read_chunk', wraps=csv.read_chunk) as read_chunk, \
+                mock.patch('os.cpu_count', return_value=4):
+            data = self._read(csv.CSVReader())
+
+        self.assertGreater(read_chunk.call_count, 1)
+        self.assertEqual(self._values(data), expected)
+
+    def test_stray_quote_chars_are_read_serially(self):
+
+        # the " in 5'10" is a literal, and throws the count of quote
+        # chars in find_row_ends() off by one
+        with open(self._data_path, 'a', newline='') as file:
+            file.write('1,2,5\'10",3\n')
+        write_csv(self._data_path, 2000, mode='a')
+
+        expected = self._values(self._read(csv.CSVReader()))
+
+        results = [ ]
+        _read_chunk = csv.read_chunk
+
+        def read_chunk(*args):
+            result = _read_chunk(*args)
+            results.append(result)
+            return result
+
+        with mock.patch.object(csv, 'PARALLEL_THRESHOLD', 1), \
+                mock.patch.object(csv, 'CHUNK_SIZE', 8192), \
+                mock.patch.object(csv, 'ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch.object(csv, 'read_chunk', read_chunk), \
+                mock.patch('os.cpu_count', return_value=4):
+            data = self._read(csv.CSVReader())
+
+        self.assertIn(None, results)
+        self.assertEqual(self._values(data), expected)
+        self.assertEqual(data[2][2000], '5\'10"')
+
+    def test_ascii_file_is_read_in_worker_processes(self):
+
+        expected = self._values(self._read(csv.CSVReader()))
+
+        with mock.patch.object(csv, 'PARALLEL_THRESHOLD', 1), \
+                mock.patch.object(csv, 'CHUNK_SIZE', 8192), \
+                mock.patch('os.cpu_count', return_value=4):
+            data = self._read(csv.CSVReader())
+
+        self.assertEqual(self._values(data), expected)
+
+    def test_ascii_file_is_sampled(self):
+
+        expected = self._values(self._read(csv.CSVReader()))
+
+        with mock.patch.object(csv, 'SAMPLE_THRESHOLD', 1), \
+                mock.patch.object(csv, 'SAMPLE_BLOCK_SIZE', 4096):
+            reader = csv.CSVReader()
+            data = self._read(reader)
+
+        self.assertIsNotNone(reader._samples)
+        self.assertTrue(reader._samples[0]._only_integers)
+        self.assertFalse(reader._samples[2]._only_floats)
+        self.assertEqual(self._values(data), expected)
+
+
+class TestColumnTypes(CSVTestCase):
+
+    # the column types are worked out as the values are read, with the
+    # values promoted (int to float to text) as needed, and the text
+    # values flushed to string tables in blocks
+
+    def setUp(self):
+        super().setUp()
+
+        self._columns = {
+            'promoted': [ ],  # ints, then floats, then text
+            'raw': [ ],       # ints which don't survive the round trip, then text
+            'nominal': [ ],
+            'id': [ ],
+        }
+        for i in range(6000):
+            if i < 3000:
+                promoted = str(i)
+            elif i == 3000:
+                promoted = '2.50'
+            elif i < 5000:
+                promoted = '{}.5'.format(i)
+            elif i == 5000:
+                promoted = 'text'
+            else:
+                promoted = str(i)
+            self._columns['promoted'].append('' if i % 13 == 0 else promoted)
+            self._columns['raw'].append('007' if i % 5 == 0 else str(i % 5) if i < 5999 else 'x')
+            self._columns['nominal'].append([ 'b', 'a', '', 'ç' ][i % 4] if i < 5990 else 'z')
+            self._columns['id'].append('id{}'.format(i % 1000))
+
+        with open(self._data_path, 'w', encoding='utf-8', newline='') as file:
+            file.write(','.join(self._columns) + '\n')
+            for row in zip(*self._columns.values()):
+                file.write(','.join(row) + '\n')
+
+    def _assert_columns(self, data):
+        self.assertEqual(data.row_count, 6000)
+        for name, values in self._columns.items():
+            mismatches = (i for i, value in enumerate(data[name]) if str(value) != values[i])
+            self.assertIsNone(next(mismatches, None), name)
+
+        self.assertEqual(data['promoted'].measure_type, MeasureType.ID)
+        self.assertEqual(data['raw'].data_type, DataType.TEXT)
+        self.assertEqual(data['raw'].measure_type, MeasureType.NOMINAL)
+        self.assertEqual(data['nominal'].measure_type, MeasureType.NOMINAL)
+        self.assertEqual([ level[1] for level in data['nominal'].levels ], [ 'a', 'b', 'z', 'ç' ])
+        self.assertEqual(data['id'].measure_type, MeasureType.ID)
+
+    def test_values_are_promoted(self):
+        with mock.patch.object(reader, 'STRING_BLOCK_ROWS', 1000):
+            self._assert_columns(self._read(csv.CSVReader()))
+
+    def test_values_are_promoted_in_chunks(self):
+        with mock.patch.object(reader, 'STRING_BLOCK_ROWS', 1000), \
+                mock.patch.object(csv, 'PARALLEL_THRESHOLD', 1), \
+                mock.patch.object(csv, 'CHUNK_SIZE', 8192), \
+                mock.patch.object(csv, 'ProcessPoolExecutor', ThreadPoolExecutor), \
+                mock.patch('os.cpu_count', return_value=4):
+            self._assert_columns(self._read(csv.CSVReader()))
+
+    def test_text_is_flushed_in_blocks(self):
+        column_reader = reader.ColumnReader(None, 0)
+        with mock.patch.object(reader, 'STRING_BLOCK_ROWS', 100):
+            column_reader.read_values([ str(i) for i in range(150) ])
+            column_reader.read_values([ 'a', 'b' ] * 100)
+
+        # 350 values, so 3 blocks, and 50 strings still buffered
+        self.assertEqual(len(column_reader._blocks), 3)
+        self.assertEqual(len(column_reader._values), 50)
+        offsets, table = column_reader._blocks[2]
+        self.assertEqual(len(offsets), 100)
+        self.assertEqual(bytes(table), b'a\0b\0')
+
+
+class TestExport(CSVTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        with open(self._data_path, 'w', encoding='utf-8', newline='') as file:
+            file.write('x,d,t,i\n')
+            for i in range(300):
+                file.write('{},{},{},{}\n'.format(
+                    '' if i % 7 == 0 else i % 5,
+                    '' if i % 11 == 0 else i / 8,
+                    [ '"a, ""b"""', 'c', '', 'é' ][i % 4],
+                    '"id\n{}"'.format(i) if i % 50 == 0 else 'id{}'.format(i)))
+
+        self._data = self._read(csv.CSVReader())
+        self._data._log = logging.getLogger(__name__)
+        self._data['i'].change(data_type=DataType.TEXT, measure_type=MeasureType.ID)
+
+        # the filter (and the rows it filters) aren't exported
+        self._data.insert_column(0, 'Filter 1')
+        filt = self._data[0]
+        filt.column_type = ColumnType.FILTER
+        filt.formula = 'ROW() % 3 != 0'
+        self._data.setup()
+        self._data._recalc_all()
+
+    def _write(self, writer, name):
+        path = os.path.join(self._temp_path, name)
+        # small blocks, so the rows are written in several
+        with mock.patch.object(csv, 'WRITE_BLOCK_ROWS', 64):
+            writer(self._data, path, lambda p: None)
+        return path
+
+    def test_csv_round_trip(self):
+        path = self._write(csv.write, 'export.csv')
+
+        self._data_path = path
+        exported = self._read(csv.CSVReader())
+
+        kept = [ i for i in range(300) if (i + 1) % 3 != 0 ]
+        self.assertEqual(exported.row_count, len(kept))
+        names = [ column.name for column in exported if not column.is_virtual ]
+        self.assertEqual(names, [ 'x', 'd', 't', 'i' ])
+        for name in ('x', 'd', 't', 'i'):
+            self.assertEqual(
+                [ str(exported[name][i]) for i in range(len(kept)) ],
+                [ str(self._data[name][i]) for i in kept ], name)
+
+    def test_csv_gz_round_trip(self):
+        plain = self._write(csv.write, 'export.csv')
+        compressed = self._write(csv.write_gz, 'export.csv.gz')
+
+        with open(plain, 'rb') as file:
+            expected = file.read()
+        with gzip.open(compressed, 'rb') as file:
+            self.assertEqual(file.read(), expected)
+
+        self.assertIn(( 'gz', csv.write_gz ), csv.get_writers())
+
+
+class TestNumberParsing(unittest.TestCase):
+
+    # chunks of numbers are parsed with numpy (see
+    # ColumnReader._read_numbers()), and should come out the same as
+    # when read a value at a time
+
+    def _state(self, column_reader):
+        # what the column would be made from. the values are compared
+        # as they are, and as the strings they'd be if promoted to text
+        as_text = copy.deepcopy(column_reader)
+        if as_text._values_type is not str:
+            as_text._promote(str)
+        as_text._flush_strings(final=True)
+        strings = [ ]
+        for offsets, table in as_text._blocks:
+            for offset in offsets:
+                if offset == -2147483648:
+                    strings.append(None)
+                else:
+                    strings.append(bytes(table[offset:table.index(0, offset)]).decode())
+
+        many_uniques = column_reader._many_uniques
+        return str((
+            column_reader._only_integers,
+            column_reader._only_floats,
+            column_reader._only_euro_floats,
+            column_reader._is_empty,
+            many_uniques,
+            None if many_uniques else sorted(column_reader._unique_values),
+            column_reader._dps,
+            column_reader._values_type,
+            list(column_reader._values),
+            strings))
+
+    def assertParsedTheSame(self, *chunks):
+        chunked = reader.ColumnReader(None, 0)
+        one_by_one = reader.ColumnReader(None, 0)
+        for chunk in chunks:
+            chunked.read_values(chunk)
+            for value in chunk:
+                one_by_one.read_value(value)
+        self.assertEqual(self._state(chunked), self._state(one_by_one), chunks)
+
+    def test_ints(self):
+        self.assertParsedTheSame([ '1', '-2', '', 'NA', ' ', '007', '+3', '2147483647' ])
+        self.assertParsedTheSame([ '1', '-2147483648' ])
+        self.assertParsedTheSame([ '1', '2147483648' ])
+        self.assertParsedTheSame([ '1', '99999999999999999999' ])
+        self.assertParsedTheSame([ '1', ' 2', '3 ', '1_000' ])
+        self.assertParsedTheSame([ '', 'NA', ' ' ])
+
+    def test_floats(self):
+        self.assertParsedTheSame([ '1', '2.5', '1e5', '-0.125', '2.50', '.5', '5.' ])
+        self.assertParsedTheSame([ '1.0005', '0.1', '1e-17', '12345.6789' ])
+        self.assertParsedTheSame([ 'nan', 'inf', '-Infinity', '1' ])
+        self.assertParsedTheSame([ '1', '2' ], [ '0.5', '' ], [ '3', '4' ])
+
+    def test_euro_floats(self):
+        self.assertParsedTheSame([ '1', '2,5', '-0,125' ])
+        self.assertParsedTheSame([ '2,5' ], [ '1', '3' ], [ '0.5' ])
+
+    def test_promoted_to_text(self):
+        self.assertParsedTheSame([ '1', '007' ], [ '2.50', '3' ], [ 'a', '' ], [ '4' ])
+        self.assertParsedTheSame([ '1', '2' ], [ 'x' ])
+
+    def test_many_uniques(self):
+        self.assertParsedTheSame([ str(i) for i in range(100) ])
+        self.assertParsedTheSame([ str(i / 4) for i in range(100) ])
+
+    def test_dps(self):
+        rng = np.random.default_rng(0)
+        values = (rng.normal(size=2000) * 10.0 ** rng.integers(-4, 6, size=2000))
+        values = np.concatenate((values, np.round(values, 2), [ 0.0005, 0.0015, 2.675, 1e-17, np.nan, np.inf ]))
+        expected = max(map(reader.calc_dps, values.tolist()))
+        self.assertEqual(reader.calc_max_dps(values), expected)
+        for value in values.tolist():
+            self.assertEqual(reader.calc_max_dps(np.array([ value ])), reader.calc_dps(value), value)
+
+
+if __name__ == '__main__':
+    unittest.main()
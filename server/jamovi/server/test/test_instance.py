@@ -0,0 +1,191 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import tempfile
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import ColumnType
+from jamovi.server.column import Column
+from jamovi.server.instance import Instance
+from jamovi.server.formatio import csv
+from jamovi.server import jamovi_pb2 as jcoms
+
+
+class InstanceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._instance = Instance(None, os.path.join(self._temp_path, 'instance'), 'instance')
+
+    def tearDown(self):
+        self._instance._mm.close()
+        self._temp_dir.cleanup()
+
+    def _open(self, content):
+        data_path = os.path.join(self._temp_path, 'data.csv')
+        with open(data_path, 'w') as file:
+            file.write(content)
+
+        instance = self._instance
+        instance._mm = MemoryMap.create(instance._buffer_path, 4 * 1024 * 1024)
+        instance._data.dataset = DataSet.create(instance._mm)
+        csv.read(instance._data, data_path, lambda p: None)
+        instance._data.setup()
+
+    def _paste(self, col_no, row_start, values):
+        request = jcoms.DataSetRR()
+        request.op = jcoms.GetSet.Value('SET')
+        request.incData = True
+        block = request.data.add()
+        block.rowStart = row_start
+        block.columnStart = col_no
+        block.rowCount = len(values)
+        block.columnCount = 1
+        for value in values:
+            if isinstance(value, float):
+                block.values.add().d = value
+            else:
+                block.values.add().s = value
+        self._instance._on_dataset_set(request, jcoms.DataSetRR())
+
+    def _add_columns(self, columns):
+        # columns is a list of (index, name, column type, formula)
+        data = self._instance._data
+        for index, name, column_type, formula in columns:
+            column = data.insert_column(index, name, name)
+            column.column_type = column_type
+            column.formula = formula
+        data.setup()
+        data._recalc_all()
+
+    def _modify(self, column, **changes):
+        # modifies the column's schema, as the client would
+        request = jcoms.DataSetRR()
+        request.op = jcoms.GetSet.Value('SET')
+        request.incSchema = True
+        column_pb = request.schema.columns.add()
+        self._instance._populate_column_schema(column, column_pb, False)
+        column_pb.action = jcoms.DataSetSchema.ColumnSchema.Action.Value('MODIFY')
+        for name, value in changes.items():
+            setattr(column_pb, name, value)
+        self._instance._on_dataset_set(request, jcoms.DataSetRR())
+
+
+class TestApplyCells(InstanceTestCase):
+
+    def test_paste_swapping_text_values(self):
+        self._open('x,y\na,1\nb,2\n')
+        column = self._instance._data[0]
+
+        self._paste(0, 0, [ 'b', 'a' ])
+
+        self.assertEqual([ column[0], column[1] ], [ 'b', 'a' ])
+        self.assertEqual(
+            sorted(map(lambda level: level[1], column.levels)),
+            [ 'a', 'b' ])
+
+    def test_paste_new_and_repeated_text_values(self):
+        self._open('x,y\na,1\nb,2\nc,3\n')
+        column = self._instance._data[0]
+
+        self._paste(0, 0, [ 'c', 'd', 'c' ])
+
+        self.assertEqual([ column[0], column[1], column[2] ], [ 'c', 'd', 'c' ])
+        self.assertEqual(
+            sorted(map(lambda level: level[1], column.levels)),
+            [ 'c', 'd' ])
+
+    def test_paste_around_filtered_rows_recalcs_only_the_pasted_rows(self):
+        self._open('x,y\n1,0.5\n2,1.5\n3,2.5\n4,3.5\n5,4.5\n')
+        data = self._instance._data
+
+        # the filter is the first column
+        self._add_columns([
+            (0, 'Filter 1', ColumnType.FILTER, 'x != 2'),
+            (3, 'c', ColumnType.COMPUTED, 'y * 10'),
+            (4, 'd', ColumnType.COMPUTED, 'c + 1'),
+            (5, 'm', ColumnType.COMPUTED, 'VMEAN(y)') ])
+        data._filters_visible = False  # the filtered rows are hidden
+
+        evaluated = [ ]
+        evaluate = Column._evaluate_array
+
+        def recorded(column, start, end, ul_type):
+            evaluated.append((column.name, start, end))
+            return evaluate(column, start, end, ul_type)
+
+        # the first three rows shown are rows 0, 2 and 3
+        with mock.patch.object(Column, '_evaluate_array', autospec=True, side_effect=recorded):
+            self._paste(2, 0, [ 6.5, 7.5, 8.5 ])
+
+        self.assertEqual(list(data['y']), [ 6.5, 1.5, 7.5, 8.5, 4.5 ])
+        self.assertEqual(list(data['c']), [ 65, 15, 75, 85, 45 ])
+        self.assertEqual(list(data['d']), [ 66, 16, 76, 86, 46 ])
+
+        # the rows between (the filtered row 1) aren't recalculated, while
+        # the column-wise m is recalculated in full
+        self.assertEqual(
+            sorted(filter(lambda e: e[0] in ('c', 'd'), evaluated)),
+            [ ('c', 0, 1), ('c', 2, 4), ('d', 0, 1), ('d', 2, 4) ])
+        self.assertIn(('m', 0, 5), evaluated)
+
+
+class TestStatCache(InstanceTestCase):
+
+    # the column-wise statistics are shared through the stat cache, and
+    # so must be invalidated by any change to the values they're of
+
+    def setUp(self):
+        InstanceTestCase.setUp(self)
+        self._open('x,y,g\n1.5,1,a\n2.5,2,a\n3.5,3,b\n4.5,4,b\n')
+        self._add_columns([
+            (0, 'Filter 1', ColumnType.FILTER, 'y != 4'),
+            (4, 'm', ColumnType.COMPUTED, 'VMEAN(x)'),
+            (5, 'mg', ColumnType.COMPUTED, 'VMEAN(x, group_by=g)') ])
+        self._data = self._instance._data
+
+        self.assertEqual(self._data['m'][0], 2.5)
+        self.assertEqual(self._data['mg'][0], 2)
+        self.assertEqual(self._cached(), { ('VMEAN', 0), ('VMEAN', self._data['g'].id) })
+
+    def _cached(self):
+        # the (function name, group_by id) of the cached values of x
+        x_id = self._data['x'].id
+        return set(map(
+            lambda key: (key[0], key[4]),
+            filter(lambda key: key[1] == x_id, self._data.stat_cache._values)))
+
+    def test_editing_a_source_cell(self):
+        # (not a schema change, so the key of the cached values is as it was)
+        changes = self._data['x'].changes
+        self._paste(1, 0, [ 5.5 ])
+        self.assertEqual(self._data['x'].changes, changes)
+
+        self.assertEqual(self._data['m'][0], 11.5 / 3)
+        self.assertEqual(self._data['mg'][0], 4)
+
+    def test_changing_a_filter(self):
+        self._modify(self._data['Filter 1'], formula='y != 1')
+        self.assertEqual(self._data['m'][1], 3.5)
+        self.assertEqual(self._data['mg'][1], 2.5)
+
+        self._modify(self._data['Filter 1'], active=False)
+        self.assertEqual(self._data['m'][0], 3)
+        self.assertEqual(self._data['mg'][0], 2)
+
+    def test_editing_the_group_by_column(self):
+        self._paste(3, 0, [ 'b' ])
+        self.assertEqual(self._data['m'][0], 2.5)
+        self.assertEqual(self._data['mg'][0], 2.5)  # b is now 1.5 and 3.5 (4.5 is filtered)
+        self.assertEqual(self._data['mg'][1], 2.5)  # a is now just 2.5
+
+if __name__ == '__main__':
+    unittest.main()
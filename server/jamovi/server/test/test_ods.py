@@ -0,0 +1,174 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import tempfile
+from zipfile import ZipFile
+from zipfile import ZIP_STORED
+
+from ezodf import opendoc
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.server.formatio import ods
+
+
+MANIFEST = '''<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">
+<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>
+<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>
+</manifest:manifest>'''
+
+CONTENT = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content
+    xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+    office:version="1.2">
+<office:body><office:spreadsheet>
+{}
+</office:spreadsheet></office:body></office:document-content>'''
+
+
+def cell(value_type=None, value=None, text=None, repeat=None):
+    attrs = ''
+    if value_type is not None:
+        attrs += ' office:value-type="{}"'.format(value_type)
+    if value is not None:
+        attr = {
+            'date': 'date-value',
+            'time': 'time-value',
+            'boolean': 'boolean-value' }.get(value_type, 'value')
+        attrs += ' office:{}="{}"'.format(attr, value)
+    if repeat is not None:
+        attrs += ' table:number-columns-repeated="{}"'.format(repeat)
+    if text is None:
+        return '<table:table-cell{}/>'.format(attrs)
+    return '<table:table-cell{}>{}</table:table-cell>'.format(attrs, text)
+
+
+def string(value):
+    return cell('string', text='<text:p>{}</text:p>'.format(value))
+
+
+def row(*cells, repeat=None):
+    attrs = ''
+    if repeat is not None:
+        attrs = ' table:number-rows-repeated="{}"'.format(repeat)
+    return '<table:table-row{}>{}</table:table-row>'.format(attrs, ''.join(cells))
+
+
+def table(name, *rows):
+    return '<table:table table:name="{}">{}</table:table>'.format(name, ''.join(rows))
+
+
+SHEET = table(
+    'Sheet1',
+    row(cell(repeat=6), repeat=2),
+    row(cell(), string('name'), string('x'), string('when'), string('flag'), cell()),
+    row(
+        cell(),
+        cell('string', text='<text:p>a<text:s text:c="2"/>b<text:tab/>c</text:p><text:p>d<text:line-break/><text:span>e</text:span></text:p>'),
+        cell('float', '3'),
+        cell('date', '2021-03-04'),
+        cell('boolean', 'true'),
+        cell()),
+    row(cell(), string('rep'), cell('percentage', '0.25', repeat=2), cell('boolean', 'false'), cell()),
+    row(cell(repeat=6)),
+    row(cell(), string('same'), cell('currency', '1.5'), cell('time', 'PT13H14M15S'), cell(), cell(), repeat=3),
+    row(cell(), '<table:covered-table-cell/>', cell('float', '-2e-3'), cell(repeat=3)),
+    row(cell(repeat=6), repeat=4))
+
+OTHER_SHEET = table('Sheet2', row(string('other')))
+
+
+class TestODS(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _write(self, *tables):
+        path = os.path.join(self._temp_path, 'data.ods')
+        with ZipFile(path, 'w') as zip:
+            zip.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet', compress_type=ZIP_STORED)
+            zip.writestr('META-INF/manifest.xml', MANIFEST)
+            zip.writestr('content.xml', CONTENT.format(''.join(tables)))
+        return path
+
+    def _read(self, path):
+        reader = ods.ODSReader()
+        reader.open(path)
+        try:
+            return list(reader)
+        finally:
+            reader.close()
+
+    def _read_with_ezodf(self, path):
+        # as the first sheet was read with ezodf, from the first row and
+        # column with a value to the last
+        sheet = opendoc(path).sheets[0]
+        rows = [ [ cell.value for cell in row ] for row in sheet.rows() ]
+        with_values = [ i for i, row in enumerate(rows) if any(value is not None for value in row) ]
+        cols = [ j for row in rows for j, value in enumerate(row) if value is not None ]
+        return [
+            [ '' if value is None else str(value) for value in row[min(cols):max(cols) + 1] ]
+            for row in rows[with_values[0]:with_values[-1] + 1] ]
+
+    def test_values_are_read_as_ezodf_reads_them(self):
+        path = self._write(SHEET, OTHER_SHEET)
+
+        rows = self._read(path)
+        self.assertEqual(rows, self._read_with_ezodf(path))
+        self.assertEqual(rows[0], [ 'name', 'x', 'when', 'flag' ])
+        self.assertEqual(rows[1], [ 'a  b\tc\nd\ne', '3.0', '2021-03-04', 'True' ])
+        self.assertEqual(rows[2], [ 'rep', '0.25', '0.25', 'False' ])
+        self.assertEqual(rows[3], [ '', '', '', '' ])
+        self.assertEqual(rows[4:7], [ [ 'same', '1.5', 'PT13H14M15S', '' ] ] * 3)
+        self.assertEqual(rows[7], [ '', '-0.002', '', '' ])
+        self.assertEqual(len(rows), 8)
+
+    def test_padding_is_skipped(self):
+        # as LibreOffice pads sheets out to their full size
+        path = self._write(table(
+            'Sheet1',
+            row(cell(repeat=1024), repeat=3),
+            row(cell(repeat=2), string('x'), cell(repeat=1021)),
+            row(cell(repeat=2), cell('float', '1'), cell(repeat=1021), repeat=2),
+            row(cell(repeat=1024), repeat=1048570)))
+
+        self.assertEqual(self._read(path), [ [ 'x' ], [ '1.0' ], [ '1.0' ] ])
+
+    def test_columns_are_those_of_the_lookahead(self):
+        path = self._write(table(
+            'Sheet1',
+            row(string('a'), string('b')),
+            row(cell('float', '1'), cell('float', '2')),
+            row(cell(repeat=2), repeat=2),
+            row(cell('float', '3'), cell('float', '4'), cell('float', '5'))))
+
+        with mock.patch.object(ods, 'LOOKAHEAD_ROWS', 2):
+            rows = self._read(path)
+
+        self.assertEqual(rows, [ [ 'a', 'b' ], [ '1.0', '2.0' ], [ '', '' ], [ '', '' ], [ '3.0', '4.0' ] ])
+
+    def test_empty_sheet(self):
+        path = self._write(table('Sheet1', row(cell(repeat=4), repeat=10)))
+        self.assertEqual(self._read(path), [ ])
+
+    def test_corrupt_file(self):
+        path = os.path.join(self._temp_path, 'data.ods')
+        with ZipFile(path, 'w') as zip:
+            zip.writestr('content.xml', '<office:document-content')
+        with self.assertRaises(ods.FileCorruptError):
+            self._read(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
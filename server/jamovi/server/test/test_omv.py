@@ -0,0 +1,393 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import json
+import struct
+import zlib
+import asyncio
+import threading
+import tempfile
+from types import SimpleNamespace
+import zipfile
+from zipfile import ZipFile
+
+import numpy as np
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import DataType
+from jamovi.core import MeasureType
+from jamovi.server.instancemodel import InstanceModel
+from jamovi.server.instance import Instance
+from jamovi.server.formatio import csv
+from jamovi.server.formatio import omv
+
+
+class TestLazyRead(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._mms = [ ]
+
+        csv_path = os.path.join(self._temp_path, 'data.csv')
+        with open(csv_path, 'w') as file:
+            file.write('x,t,d\n1,a,0.5\n2,b,1.5\n1,b,2.5\n3,b,\n')
+
+        data = self._create()
+        csv.read(data, csv_path, lambda p: None)
+        data.setup()
+
+        self._path = os.path.join(self._temp_path, 'data.omv')
+        omv.write(data, self._path, lambda p: None, compression='stored')
+
+        self._deflated_path = os.path.join(self._temp_path, 'deflated.omv')
+        omv.write(data, self._deflated_path, lambda p: None)
+
+    def tearDown(self):
+        for mm in self._mms:
+            mm.close()
+        self._temp_dir.cleanup()
+
+    def _create(self):
+        mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer{}'.format(len(self._mms))))
+        self._mms.append(mm)
+        data = InstanceModel(None)
+        data.dataset = DataSet.create(mm)
+        return data
+
+    def _read(self, path=None):
+        data = self._create()
+        omv.read(data, path or self._path, lambda p: None, lazy=True)
+        data.setup()
+        return data
+
+    def _assert_values(self, data):
+        self.assertEqual(list(data['x']), [ 1, 2, 1, 3 ])
+        self.assertEqual(list(data['t']), [ 'a', 'b', 'b', 'b' ])
+        self.assertEqual(list(data['d'])[:3], [ 0.5, 1.5, 2.5 ])
+
+    def test_default_save_is_read_lazily(self):
+        data = self._read(self._deflated_path)
+        self.assertEqual(
+            list(data._deferred_reads.keys()),
+            [ data['x'].id, data['t'].id, data['d'].id ])
+        self.assertEqual([ level[0] for level in data['t'].levels ], [ 0, 1 ])
+
+        column_id, decode = data.next_deferred()
+        self.assertEqual(column_id, data['x'].id)
+        self.assertIsNotNone(decode)
+
+        self._assert_values(data)
+        self.assertFalse(data.has_deferred_reads)
+
+    def test_deflated_columns_are_decoded_off_the_event_loop(self):
+        data = self._read(self._deflated_path)
+
+        threads = [ ]
+        for column_id, (read, set_level_counts, decode) in list(data._deferred_reads.items()):
+            def recording_decode(decode=decode):
+                threads.append(threading.current_thread())
+                return decode()
+            data._deferred_reads[column_id] = (read, set_level_counts, recording_decode)
+
+        asyncio.run(Instance._read_deferred(SimpleNamespace(_data=data)))
+
+        self.assertFalse(data.has_deferred_reads)
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.current_thread(), threads)
+        self._assert_values(data)
+
+    def test_column_read_while_decoding_is_read_once(self):
+        data = self._read(self._deflated_path)
+        column_id, decode = data.next_deferred()
+        decoded = decode()
+
+        # the column is needed before its decode comes back
+        self.assertEqual(list(data['x']), [ 1, 2, 1, 3 ])
+        data['x'].set_value(0, 3)
+
+        data.read_decoded(column_id, decoded)
+        self.assertEqual(list(data['x']), [ 3, 2, 1, 3 ])
+
+    def test_filter_change_leaves_the_columns_deferred(self):
+        for path in (self._path, self._deflated_path):
+            data = self._read(path)
+            data.refresh_filter_state()
+            self.assertEqual(len(data._deferred_reads), 3)
+
+            # the levels aren't trimmed, as the counts from the file stand
+            self.assertEqual([ level[0] for level in data['x'].levels ], [ 1, 2, 3 ])
+            self._assert_values(data)
+
+    def test_archive_version(self):
+        with ZipFile(self._deflated_path) as zip:
+            manifest = zip.read('META-INF/MANIFEST.MF').decode('utf-8')
+        self.assertIn('jamovi-Archive-Version: 9.1\n', manifest)
+
+    def test_earlier_versions_are_read_in_full(self):
+        # the dps and level counts of earlier versions aren't relied on
+        for name in ('data.omv', 'deflated.omv'):
+            path = os.path.join(self._temp_path, name)
+            old_path = os.path.join(self._temp_path, 'old.omv')
+            with ZipFile(path) as zip, ZipFile(old_path, 'w') as old:
+                for info in zip.infolist():
+                    content = zip.read(info)
+                    if info.filename == 'META-INF/MANIFEST.MF':
+                        content = content.replace(b'9.1', b'9.0')
+                    old.writestr(info, content)
+
+            data = self._read(old_path)
+            self.assertFalse(data.has_deferred_reads)
+            self._assert_values(data)
+
+    def test_level_counts_are_saved(self):
+        with ZipFile(self._path) as zip:
+            xdata = json.loads(zip.read('xdata.json').decode('utf-8'))
+        self.assertEqual(xdata['x']['counts'], [ [ 2, 2 ], [ 1, 1 ], [ 1, 1 ] ])
+        self.assertEqual(xdata['t']['counts'], [ [ 1, 1 ], [ 3, 3 ] ])
+
+    def test_map_is_closed_after_the_deferred_reads(self):
+        with mock.patch.object(omv, '_release_map', wraps=omv._release_map) as release_map:
+            data = self._read()
+            self.assertTrue(data.has_deferred_reads)
+            release_map.assert_not_called()
+
+            data.read_next_deferred()
+            release_map.assert_not_called()
+
+            data.read_deferred()
+            release_map.assert_called_once()
+
+        self.assertEqual(list(data['x']), [ 1, 2, 1, 3 ])
+        self.assertEqual(list(data['t']), [ 'a', 'b', 'b', 'b' ])
+
+    def test_map_is_closed_when_the_deferred_reads_are_discarded(self):
+        with mock.patch.object(omv, '_release_map', wraps=omv._release_map) as release_map:
+            data = self._read()
+            data.delete_columns(0, data.column_count - 1)
+            self.assertFalse(data.has_deferred_reads)
+            release_map.assert_called_once()
+
+    def test_level_counts_after_deferred_read(self):
+        data = self._read()
+        column = data['x']
+
+        # the levels are counted again once read in, so with its only use
+        # replaced, the level is trimmed
+        column.set_value(1, 3)
+        self.assertEqual([ level[0] for level in column.levels ], [ 1, 3 ])
+
+    def test_string_table_offsets_out_of_range(self):
+        # as in a corrupt file, these are read as empty
+        data = self._create()
+        data.set_row_count(5)
+        column = data.append_column('id', 'id')
+        column.change(data_type=DataType.TEXT, measure_type=MeasureType.ID)
+
+        offsets = np.array([ 0, 3, 99, -5, -2147483648 ], dtype=np.int32)
+        column.set_values(0, offsets, b'ab\0cd')
+
+        self.assertEqual(list(column), [ 'ab', 'cd', '', '', '' ])
+
+
+class TestWrite(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._mms = [ ]
+
+        csv_path = os.path.join(self._temp_path, 'data.csv')
+        with open(csv_path, 'w') as file:
+            file.write('x,t,d,i\n')
+            for i in range(50):
+                file.write('{},{},{},{}\n'.format(
+                    i % 7, 'abc'[i % 3], '' if i % 11 == 0 else i / 4, 'id{}'.format(i)))
+
+        self._data = self._create()
+        csv.read(self._data, csv_path, lambda p: None)
+        self._data.setup()
+        self._data['i'].change(data_type=DataType.TEXT, measure_type=MeasureType.ID)
+
+    def tearDown(self):
+        for mm in self._mms:
+            mm.close()
+        self._temp_dir.cleanup()
+
+    def _create(self):
+        mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer{}'.format(len(self._mms))))
+        self._mms.append(mm)
+        data = InstanceModel(None)
+        data.dataset = DataSet.create(mm)
+        return data
+
+    def _write(self, name, workers, compression=None):
+        # small slabs, so data.bin is made of many of them
+        path = os.path.join(self._temp_path, name)
+        with mock.patch.object(omv, 'CHUNK_ROWS', 8), \
+                mock.patch.object(omv, 'WORKERS', workers), \
+                mock.patch.object(omv, 'ENCODE_WINDOW', 2 * workers):
+            omv.write(self._data, path, lambda p: None, compression=compression)
+        return path
+
+    def _raw_member(self, path, name):
+        # the member's bytes as they are in the archive (compressed)
+        with ZipFile(path) as zip:
+            info = zip.getinfo(name)
+        with open(path, 'rb') as file:
+            file.seek(info.header_offset)
+            header = file.read(30)
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            return info.compress_type, file.read(info.compress_size)
+
+    def test_parallel_write_is_the_same_as_a_serial_write(self):
+        for compression in (None, 'fast', 'max'):
+            with mock.patch.object(omv, '_Deflated', wraps=omv._Deflated) as deflated:
+                serial = self._write('serial.omv', 1, compression)
+                parallel = self._write('parallel.omv', 4, compression)
+            # the slabs were deflated in the workers
+            self.assertEqual(deflated.call_count, 2)
+
+            serial_type, serial_bytes = self._raw_member(serial, 'data.bin')
+            parallel_type, parallel_bytes = self._raw_member(parallel, 'data.bin')
+
+            self.assertEqual(serial_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(parallel_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(serial_bytes, parallel_bytes)
+
+    def test_deflated_data_is_the_same_as_stored(self):
+        stored = self._write('stored.omv', 4, 'stored')
+        deflated = self._write('deflated.omv', 4)
+
+        with ZipFile(stored) as zip:
+            stored_data = zip.read('data.bin')
+            stored_strings = zip.read('strings.bin')
+        with ZipFile(deflated) as zip:
+            self.assertIsNone(zip.testzip())
+            self.assertEqual(zip.read('data.bin'), stored_data)
+            self.assertEqual(zip.read('strings.bin'), stored_strings)
+
+    def test_data_is_written_a_column_at_a_time(self):
+        # the slabs (of 8 rows) are joined up into each column's values
+        path = self._write('stored.omv', 4, 'stored')
+        with ZipFile(path) as zip:
+            data_bin = zip.read('data.bin')
+            strings_bin = zip.read('strings.bin')
+
+        row_count = self._data.row_count
+        pos = 0
+        for name in ('x', 't', 'd', 'i'):
+            column = self._data[name]
+            if name == 'i':
+                offsets = np.frombuffer(data_bin, dtype=np.int32, count=row_count, offset=pos)
+                values = [ strings_bin[offset:strings_bin.index(b'\0', offset)].decode() for offset in offsets ]
+                self.assertEqual(values, list(column), name)
+                pos += 4 * row_count
+            else:
+                expected = column.get_values(0, row_count).tobytes()
+                self.assertEqual(data_bin[pos:pos + len(expected)], expected, name)
+                pos += len(expected)
+        self.assertEqual(pos, len(data_bin))
+
+    def _add_analysis(self):
+        # an analysis with an image, and a text resource
+        instance_path = os.path.join(self._temp_path, 'instance')
+        resources_path = os.path.join(instance_path, '01 ttest', 'resources')
+        os.makedirs(resources_path)
+        for name in ('plot.png', 'notes.txt'):
+            with open(os.path.join(resources_path, name), 'wb') as file:
+                file.write(b'resource ' * 100)
+
+        analysis = SimpleNamespace(
+            has_results=True, id=1, name='ttest',
+            serialize=lambda strip_content: b'analysis ' * 100,
+            resources=[ '01 ttest/resources/plot.png', '01 ttest/resources/notes.txt' ])
+
+        self._data._analyses = [ analysis ]
+        self._data._instance = SimpleNamespace(instance_path=instance_path)
+
+    def test_members_are_compressed_by_category(self):
+        self._add_analysis()
+
+        categories = {
+            'META-INF/MANIFEST.MF': 'meta',
+            'metadata.json': 'meta',
+            'xdata.json': 'meta',
+            'strings.bin': 'data',
+            'data.bin': 'data',
+            '01 ttest/analysis': 'analyses',
+            '01 ttest/resources/notes.txt': 'resources',
+            '01 ttest/resources/plot.png': None,  # always stored
+        }
+
+        for spec in ('default', 'stored', 'fast', 'max', 'data:stored,meta:max,analyses:fast'):
+            path = self._write('data.omv', 4, spec)
+            compression = omv.parse_compression(spec)
+
+            with ZipFile(path) as zip:
+                names = [ info.filename for info in zip.infolist() ]
+                self.assertEqual(sorted(names), sorted(categories.keys()))
+                self.assertIsNone(zip.testzip())
+                contents = { name: zip.read(name) for name in names }
+
+            for name, category in categories.items():
+                compress_type, level = self._raw_member(path, name)[0], None
+                if category is not None:
+                    expected_type, level = compression[category]
+                else:
+                    expected_type = zipfile.ZIP_STORED
+                self.assertEqual(compress_type, expected_type, (spec, name))
+
+                # the level too, where it's something zlib reproduces
+                if compress_type == zipfile.ZIP_DEFLATED and name != 'data.bin':
+                    if level is None:
+                        level = zlib.Z_DEFAULT_COMPRESSION
+                    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+                    deflated = compressor.compress(contents[name]) + compressor.flush()
+                    self.assertEqual(self._raw_member(path, name)[1], deflated, (spec, name))
+
+    def test_stored_data_is_read_in_place(self):
+        path = self._write('stored.omv', 4, 'stored')
+
+        for lazy in (False, True):
+            # small slabs, so each column is read in many of them, from
+            # the map, rather than a stream of the member
+            with mock.patch.object(omv, 'BUFF_SIZE', 64), \
+                    mock.patch.object(omv, '_stream_reader', side_effect=AssertionError), \
+                    mock.patch.object(omv, '_release_map', wraps=omv._release_map) as release_map:
+                data = self._create()
+                omv.read(data, path, lambda p: None, lazy=lazy)
+                data.setup()
+                self.assertEqual(data.has_deferred_reads, lazy)
+
+                for name in ('x', 't', 'd', 'i'):
+                    self.assertEqual(
+                        list(map(str, data[name])),
+                        list(map(str, self._data[name])), (lazy, name))
+
+                self.assertFalse(data.has_deferred_reads)
+                release_map.assert_called_once()
+
+    def test_deflated_data_is_read(self):
+        path = self._write('data.omv', 4)
+
+        data = self._create()
+        omv.read(data, path, lambda p: None)
+        data.setup()
+
+        for name in ('x', 't', 'd', 'i'):
+            self.assertEqual(
+                list(map(str, data[name])),
+                list(map(str, self._data[name])))
+
+
+if __name__ == '__main__':
+    unittest.main()
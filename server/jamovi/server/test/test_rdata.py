@@ -0,0 +1,164 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import sys
+import enum
+import tempfile
+from types import ModuleType
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import DataType
+from jamovi.core import MeasureType
+from jamovi.server.instancemodel import InstanceModel
+from jamovi.server.formatio import csv
+
+
+def _stub_librdata():
+    # the parts of jamovi.librdata rdata uses, where it isn't built.
+    # the writer is replaced by these tests
+
+    class DataType(enum.Enum):
+        CHARACTER = 0
+        NUMERIC = 1
+        INTEGER = 2
+        LOGICAL = 3
+
+    stub = ModuleType('jamovi.librdata')
+    stub.Parser = object
+    stub.DataType = DataType
+    stub.Writer = object
+    return stub
+
+
+try:
+    from jamovi.server.formatio import rdata
+except ImportError:
+    with mock.patch.dict(sys.modules, { 'jamovi.librdata': _stub_librdata() }):
+        from jamovi.server.formatio import rdata
+
+
+class RecordingColumn:
+
+    def __init__(self, name, data_type):
+        self.name = name
+        self.data_type = data_type
+        self.labels = None
+
+    def add_level_labels(self, labels):
+        self.labels = list(labels)
+
+
+class RecordingWriter:
+
+    # records what a librdata.Writer is given
+
+    def __init__(self):
+        self.columns = [ ]
+        self.row_count = None
+        self.values = [ ]
+        self.closed = False
+
+    def open(self, path, format):
+        pass
+
+    def set_row_count(self, row_count):
+        self.row_count = row_count
+
+    def add_column(self, name, data_type):
+        column = RecordingColumn(name, data_type)
+        self.columns.append(column)
+        return column
+
+    def insert_value(self, row_no, col_no, value):
+        self.values.append((row_no, col_no, value))
+
+    def close(self):
+        self.closed = True
+
+
+class TestWrite(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer'))
+
+        csv_path = os.path.join(self._temp_path, 'data.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('x,d,t,i\n')
+            for i in range(50):
+                file.write('{},{},{},{}\n'.format(
+                    '' if i % 7 == 0 else i % 4,
+                    '' if i % 11 == 0 else i / 8,
+                    [ 'b', 'a', '', 'bé' ][i % 4],
+                    'id{}'.format(i)))
+
+        self._data = InstanceModel(None)
+        self._data.dataset = DataSet.create(self._mm)
+        csv.read(self._data, csv_path, lambda p: None)
+        self._data.setup()
+        self._data['i'].change(data_type=DataType.TEXT, measure_type=MeasureType.ID)
+
+    def tearDown(self):
+        self._mm.close()
+        self._temp_dir.cleanup()
+
+    def test_values_are_written_a_column_at_a_time(self):
+        writer = RecordingWriter()
+        path = os.path.join(self._temp_path, 'data.RData')
+
+        # small blocks, so each column is read in several
+        with mock.patch.object(rdata, 'Writer', return_value=writer), \
+                mock.patch.object(rdata, 'WRITE_BLOCK_ROWS', 8):
+            rdata.write(self._data, path, lambda p: None, 'RData')
+
+        self.assertEqual(
+            [ (column.name, column.data_type, column.labels) for column in writer.columns ],
+            [ ('x', int, None), ('d', float, None), ('t', int, [ 'a', 'b', 'bé' ]), ('i', str, None) ])
+
+        # factors are written as the (1 based) index of their level
+        labels = [ 'a', 'b', 'bé' ]
+        data = self._data
+        expected = [ ]
+        for col_no in range(data.column_count):
+            for row_no in range(data.row_count):
+                value = data[col_no][row_no]
+                if col_no == 2:
+                    value = labels.index(value) + 1 if value != '' else -2147483648
+                expected.append((row_no, col_no, value))
+
+        self.assertEqual(str(writer.values), str(expected))
+        self.assertEqual(writer.row_count, 50)
+        self.assertTrue(writer.closed)
+
+    def test_integer_factor(self):
+        # integer columns with changed levels are written as factors
+        column = self._data['x']
+        column.change(levels=[
+            (3, 'three', 'three', False),
+            (1, 'one', 'one', False),
+            (0, 'zero', 'zero', False),
+            (2, 'two', 'two', False) ])
+        self.assertFalse(column.levels_are_unchanged)
+
+        writer = RecordingWriter()
+        with mock.patch.object(rdata, 'Writer', return_value=writer), \
+                mock.patch.object(rdata, 'WRITE_BLOCK_ROWS', 8):
+            rdata.write(self._data, os.path.join(self._temp_path, 'data.RData'), lambda p: None, 'RData')
+
+        self.assertEqual(writer.columns[0].labels, [ 'three', 'one', 'zero', 'two' ])
+        codes = { 3: 1, 1: 2, 0: 3, 2: 4, -2147483648: -2147483648 }
+        self.assertEqual(
+            [ value for row_no, col_no, value in writer.values if col_no == 0 ],
+            [ codes[column.get_value(row_no)] for row_no in range(50) ])
+
+
+if __name__ == '__main__':
+    unittest.main()
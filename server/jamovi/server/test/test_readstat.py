@@ -0,0 +1,269 @@
+
+import unittest
+from unittest import mock
+
+import os
+import os.path
+import sys
+import enum
+import logging
+import tempfile
+from datetime import date
+from types import ModuleType
+from types import SimpleNamespace
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.core import MemoryMap
+from jamovi.core import DataSet
+from jamovi.core import DataType
+from jamovi.core import MeasureType
+from jamovi.server.instancemodel import InstanceModel
+from jamovi.server.formatio import csv
+
+
+def _stub_readstat():
+    # the parts of jamovi.readstat the parser uses, where it isn't built.
+    # the parser's callbacks are called directly by these tests
+
+    class Measure(enum.Enum):
+        UNKNOWN = 0
+        NOMINAL = 1
+        ORDINAL = 2
+        SCALE = 3
+
+    class Error(Exception):
+        errno = 0
+
+    stub = ModuleType('jamovi.readstat')
+    stub.Parser = object
+    stub.Error = Error
+    stub.Writer = object
+    stub.Measure = Measure
+    return stub
+
+
+try:
+    from jamovi.server.formatio import readstat
+except ImportError:
+    with mock.patch.dict(sys.modules, { 'jamovi.readstat': _stub_readstat() }):
+        from jamovi.server.formatio import readstat
+
+
+class TestBatches(unittest.TestCase):
+
+    # the values are buffered, and written a batch at a time. values in
+    # a later batch can change the column's type, and the values already
+    # written should be kept
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._mm = MemoryMap.create(os.path.join(self._temp_dir.name, 'buffer'))
+        self._data = InstanceModel(None)
+        self._data._log = logging.getLogger(__name__)
+        self._data.dataset = DataSet.create(self._mm)
+
+    def tearDown(self):
+        self._mm.close()
+        self._temp_dir.cleanup()
+
+    def _parse(self, variables, rows, batch_rows=4):
+        # variables are (type, measure), and the rows are written
+        # batch_rows at a time. None values aren't passed to the parser
+        parser = readstat.Parser(self._data, lambda p: None)
+        parser.handle_metadata(SimpleNamespace(row_count=len(rows)))
+        for index, (var_type, measure) in enumerate(variables):
+            variable = SimpleNamespace(
+                name='v{}'.format(index),
+                label=None,
+                display_width=8,
+                measure=measure,
+                type=var_type,
+                missing_ranges=[ ])
+            parser.handle_variable(index, variable, None)
+
+        with mock.patch.object(readstat, 'BATCH_CELLS', batch_rows * len(variables)):
+            for row_index, row in enumerate(rows):
+                for var_index, value in enumerate(row):
+                    if value is not None:
+                        parser.handle_value(var_index, row_index, value)
+            parser._flush()
+
+        return [ self._data[i] for i in range(len(variables)) ]
+
+    def _values(self, column):
+        return [ column[i] for i in range(self._data.row_count) ]
+
+    def test_nominal_becomes_decimal(self):
+        # the fraction is in the second batch
+        column, = self._parse(
+            [ (float, readstat.Measure.NOMINAL) ],
+            [ (1.0,), (2.0,), (None,), (1.0,), (3.0,), (2.5,) ])
+
+        self.assertEqual(column.data_type, DataType.DECIMAL)
+        self.assertEqual(str(self._values(column)), str([ 1.0, 2.0, float('nan'), 1.0, 3.0, 2.5 ]))
+
+    def test_nominal_becomes_continuous(self):
+        column, = self._parse(
+            [ (float, readstat.Measure.NOMINAL) ],
+            [ (1.0,), (2.0,), (3.0,), (4.0,), (2.0 ** 33,) ])
+
+        self.assertEqual(column.data_type, DataType.DECIMAL)
+        self.assertEqual(column.measure_type, MeasureType.CONTINUOUS)
+        self.assertEqual(self._values(column), [ 1.0, 2.0, 3.0, 4.0, 2.0 ** 33 ])
+
+    def test_nominal_integers(self):
+        column, = self._parse(
+            [ (float, readstat.Measure.NOMINAL) ],
+            [ (3.0,), (1.0,), (None,), (1.0,), (2.0,), (3.0,) ])
+
+        self.assertEqual(column.data_type, DataType.INTEGER)
+        self.assertEqual(column.measure_type, MeasureType.NOMINAL)
+        self.assertEqual(self._values(column), [ 3, 1, -2147483648, 1, 2, 3 ])
+
+    def test_many_levels_become_id(self):
+        # the 51st level is in the third batch of 20
+        values = [ 'value{}'.format(i % 60) for i in range(70) ]
+        values[5] = ''
+        column, = self._parse(
+            [ (str, readstat.Measure.NOMINAL) ],
+            [ (value,) for value in values ],
+            batch_rows=20)
+
+        self.assertEqual(column.data_type, DataType.TEXT)
+        self.assertEqual(column.measure_type, MeasureType.ID)
+        self.assertEqual(self._values(column), values)
+
+    def test_few_levels_stay_nominal(self):
+        values = [ 'b', 'a', '', 'c', 'a', 'b', None, 'd' ]
+        column, = self._parse(
+            [ (str, readstat.Measure.NOMINAL) ],
+            [ (value,) for value in values ])
+
+        self.assertEqual(column.measure_type, MeasureType.NOMINAL)
+        self.assertEqual(self._values(column), [ value or '' for value in values ])
+        self.assertEqual([ level[1] for level in column.levels ], [ 'b', 'a', 'c', 'd' ])
+
+    def test_dates(self):
+        dates = [ date(2021, 3, 4), date(1969, 12, 31), None, date(2021, 3, 4), date(2000, 1, 1) ]
+        column, = self._parse(
+            [ (date, readstat.Measure.SCALE) ],
+            [ (value,) for value in dates ])
+
+        self.assertEqual(column.data_type, DataType.INTEGER)
+        self.assertEqual(column.measure_type, MeasureType.ORDINAL)
+        self.assertEqual(
+            [ column.get_label(column.get_value(i)) for i in range(5) ],
+            [ '2021-03-04', '1969-12-31', '', '2021-03-04', '2000-01-01' ])
+
+    def test_columns_of_each_type(self):
+        # with short rows, and the rows spread over batches
+        rows = [ (i, i / 4, 'abc'[i % 3]) if i % 5 else (i, None) for i in range(11) ]
+        integer, decimal, text = self._parse(
+            [
+                (int, readstat.Measure.SCALE),
+                (float, readstat.Measure.SCALE),
+                (str, readstat.Measure.NOMINAL),
+            ],
+            rows,
+            batch_rows=3)
+
+        self.assertEqual(self._values(integer), list(range(11)))
+        self.assertEqual(
+            str(self._values(decimal)),
+            str([ float('nan') if i % 5 == 0 else i / 4 for i in range(11) ]))
+        self.assertEqual(self._values(text), [ '' if i % 5 == 0 else 'abc'[i % 3] for i in range(11) ])
+
+
+class RecordingWriter:
+
+    # records what a readstat.Writer is given
+
+    def __init__(self):
+        self.variables = [ ]
+        self.value_labels = [ ]
+        self.row_count = None
+        self.values = [ ]
+        self.closed = False
+
+    def open(self, path, format):
+        pass
+
+    def set_file_label(self, label):
+        pass
+
+    def add_variable(self, name, data_type, storage_width):
+        variable = SimpleNamespace(name=name, data_type=data_type, storage_width=storage_width)
+        self.variables.append(variable)
+        return variable
+
+    def add_value_labels(self, variable, data_type, levels):
+        self.value_labels.append((variable.name, list(levels)))
+
+    def set_row_count(self, row_count):
+        self.row_count = row_count
+
+    def insert_value(self, row_no, col_no, value):
+        self.values.append((row_no, col_no, value))
+
+    def close(self):
+        self.closed = True
+
+
+class TestWrite(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+        self._mm = MemoryMap.create(os.path.join(self._temp_path, 'buffer'))
+
+        csv_path = os.path.join(self._temp_path, 'data.csv')
+        with open(csv_path, 'w', encoding='utf-8') as file:
+            file.write('x,d,t,i\n')
+            for i in range(50):
+                file.write('{},{},{},{}\n'.format(
+                    '' if i % 7 == 0 else i % 4,
+                    '' if i % 11 == 0 else i / 8,
+                    [ 'a', 'bé', '', 'c' ][i % 4],
+                    'id{}'.format(i)))
+
+        self._data = InstanceModel(None)
+        self._data.dataset = DataSet.create(self._mm)
+        csv.read(self._data, csv_path, lambda p: None)
+        self._data.setup()
+        self._data['i'].change(data_type=DataType.TEXT, measure_type=MeasureType.ID)
+
+    def tearDown(self):
+        self._mm.close()
+        self._temp_dir.cleanup()
+
+    def test_values_are_written_row_by_row(self):
+        writer = RecordingWriter()
+        path = os.path.join(self._temp_path, 'data.sav')
+
+        # small blocks, so the rows are read in several
+        with mock.patch.object(readstat, 'Writer', return_value=writer), \
+                mock.patch.object(readstat, 'WRITE_BLOCK_ROWS', 8):
+            readstat.write(self._data, path, lambda p: None, 'sav')
+
+        data = self._data
+        expected = [
+            (row_no, col_no, data[col_no][row_no])
+            for row_no in range(data.row_count)
+            for col_no in range(data.column_count) ]
+
+        self.assertEqual(str(writer.values), str(expected))
+        self.assertEqual(writer.row_count, 50)
+        self.assertTrue(writer.closed)
+
+        self.assertEqual(
+            [ (variable.name, variable.data_type, variable.storage_width) for variable in writer.variables ],
+            [ ('x', int, 4), ('d', float, 8), ('t', str, 3), ('i', str, 4) ])
+        self.assertEqual(writer.value_labels, [
+            ('x', [ (0, '0'), (1, '1'), (2, '2'), (3, '3') ]),
+            ('t', [ ('a', 'a'), ('bé', 'bé'), ('c', 'c') ]) ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+
+import unittest
+
+import os
+import os.path
+import tempfile
+from zipfile import ZipFile
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+
+from openpyxl import Workbook
+from openpyxl import load_workbook
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+# no modules are needed for these tests
+os.environ.setdefault('JAMOVI_MODULES_PATH', tempfile.gettempdir())
+
+from jamovi.server.formatio import xlsx
+
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+</Types>'''
+
+ROOT_RELS = '''<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>'''
+
+WORKBOOK_RELS = '''<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>
+</Relationships>'''
+
+WORKBOOK = '''<?xml version="1.0" encoding="UTF-8"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>
+</workbook>'''
+
+STRINGS = '''<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="3" uniqueCount="3">
+<si><t>x</t></si>
+<si><r><t>ri</t></r><r><rPr><b/></rPr><t>ch</t></r><rPh><t>phonetic</t></rPh></si>
+<si><t></t></si>
+</sst>'''
+
+SHEET = '''<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<dimension ref="A1:B4"/>
+<sheetData>
+<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="inlineStr"><is><t>y</t></is></c></row>
+<row r="2"><c r="A2" t="s"><v>1</v></c><c r="B2" t="inlineStr"><is><r><t>in</t></r><r><t>line</t></r></is></c></row>
+<row r="4"><c r="A4" t="s"><v>2</v></c><c r="B4" t="str"><v>formula</v></c></row>
+</sheetData>
+</worksheet>'''
+
+
+class TestXLSX(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._temp_path = self._temp_dir.name
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _read(self, path):
+        reader = xlsx.XLSXReader()
+        reader.open(path)
+        try:
+            return list(reader)
+        finally:
+            reader.close()
+
+    def _read_with_openpyxl(self, path):
+        # as the file was read before the sheets were streamed
+        wb = load_workbook(filename=path, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        rows = [ list(map(xlsx.to_string, row)) for row in rows ]
+        wb.close()
+        return rows
+
+    def _save(self, wb):
+        path = os.path.join(self._temp_path, 'data.xlsx')
+        wb.save(path)
+        return path
+
+    def test_shared_strings_and_numbers(self):
+        wb = Workbook()
+        ws = wb.active
+        ws.append([ 'name', 'n', 'x', 'flag' ])
+        ws.append([ 'alpha', 1, 0.5, True ])
+        ws.append([ 'beta', None, 1e-7, False ])
+        ws.append([ 'alpha', 3, 12345678.25, None ])
+        path = self._save(wb)
+
+        rows = self._read(path)
+        self.assertEqual(rows, self._read_with_openpyxl(path))
+        self.assertEqual(rows[1], [ 'alpha', '1', '0.5', 'True' ])
+        self.assertEqual(rows[2][1], '')
+
+    def test_dates(self):
+        for epoch in (None, CALENDAR_MAC_1904):
+            wb = Workbook()
+            if epoch is not None:
+                wb.epoch = epoch
+            ws = wb.active
+            ws.append([ 'date', 'datetime', 'time', 'duration' ])
+            ws.append([
+                date(2021, 3, 4),
+                datetime(2021, 3, 4, 5, 6, 7),
+                time(13, 14, 15),
+                timedelta(hours=30) ])
+            ws['D2'].number_format = '[h]:mm:ss'
+            path = self._save(wb)
+
+            rows = self._read(path)
+            self.assertEqual(rows, self._read_with_openpyxl(path))
+            self.assertEqual(rows[1][0:2], [ '2021-03-04', '2021-03-04 05:06:07' ])
+
+    def test_the_active_sheet_is_read(self):
+        wb = Workbook()
+        wb.active.append([ 'first' ])
+        wb.active.append([ 1 ])
+        ws = wb.create_sheet('second')
+        ws.append([ 'second' ])
+        ws.append([ 2 ])
+        wb.active = 1
+        path = self._save(wb)
+
+        rows = self._read(path)
+        self.assertEqual(rows, [ [ 'second' ], [ '2' ] ])
+        self.assertEqual(rows, self._read_with_openpyxl(path))
+
+    def test_inline_and_rich_strings(self):
+        path = os.path.join(self._temp_path, 'data.xlsx')
+        with ZipFile(path, 'w') as zip:
+            zip.writestr('[Content_Types].xml', CONTENT_TYPES)
+            zip.writestr('_rels/.rels', ROOT_RELS)
+            zip.writestr('xl/workbook.xml', WORKBOOK)
+            zip.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+            zip.writestr('xl/sharedStrings.xml', STRINGS)
+            zip.writestr('xl/worksheets/sheet1.xml', SHEET)
+
+        rows = self._read(path)
+        self.assertEqual(rows, [
+            [ 'x', 'y' ],
+            [ 'rich', 'inline' ],
+            [ '', '' ],
+            [ '', 'formula' ] ])
+
+
+if __name__ == '__main__':
+    unittest.main()